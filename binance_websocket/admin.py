@@ -1,11 +1,42 @@
 from django.contrib import admin
-from .models import PriceUpdate
+from .models import Candle, PriceUpdate, RollupWatermark, SymbolScale
 
 @admin.register(PriceUpdate)
 class PriceUpdateAdmin(admin.ModelAdmin):
-    list_display = ('ticker_symbol', 'price', 'timestamp', 'volume', 'exchange')
+    list_display = ('ticker_symbol', 'price_display', 'volume_display', 'trade_id', 'trade_time', 'timestamp', 'exchange')
     list_filter = ('ticker_symbol', 'exchange')
     search_fields = ('ticker_symbol',)
     date_hierarchy = 'timestamp'
     readonly_fields = ('timestamp',)
     ordering = ('-timestamp',)
+
+    @admin.display(description='Price')
+    def price_display(self, obj):
+        return obj.get_price()
+
+    @admin.display(description='Volume')
+    def volume_display(self, obj):
+        return obj.get_volume()
+
+
+@admin.register(SymbolScale)
+class SymbolScaleAdmin(admin.ModelAdmin):
+    list_display = ('ticker_symbol', 'exchange', 'price_scale', 'volume_scale')
+    list_filter = ('exchange',)
+    search_fields = ('ticker_symbol',)
+
+
+@admin.register(Candle)
+class CandleAdmin(admin.ModelAdmin):
+    list_display = ('ticker_symbol', 'interval', 'open_time', 'open', 'high', 'low', 'close', 'volume', 'trade_count')
+    list_filter = ('interval', 'ticker_symbol', 'exchange')
+    search_fields = ('ticker_symbol',)
+    date_hierarchy = 'open_time'
+    ordering = ('-open_time',)
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('ticker_symbol', 'exchange', 'timestamp', 'last_id', 'updated_at')
+    list_filter = ('exchange',)
+    search_fields = ('ticker_symbol',)
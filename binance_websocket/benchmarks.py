@@ -0,0 +1,334 @@
+import gc
+import inspect
+import json
+import platform
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from binance_websocket.streams import unwrap_combined_message
+
+RESULTS_VERSION = 1
+
+DEFAULT_SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT', 'ADAUSDT', 'DOGEUSDT', 'LTCUSDT')
+
+# Rough starting prices, so generated frames have realistic digit counts.
+START_PRICES = {
+    'BTCUSDT': 11850.15,
+    'ETHUSDT': 385.42,
+    'BNBUSDT': 23.1045,
+    'SOLUSDT': 3.2161,
+    'XRPUSDT': 0.28431,
+    'ADAUSDT': 0.10512,
+    'DOGEUSDT': 0.003587,
+    'LTCUSDT': 61.83,
+}
+
+START_TIME_MS = 1598520003276
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+SCENARIO_NAMES = ('decode', 'parse', 'standalone', 'process')
+
+
+def tick_decimals(price):
+    if price >= 100:
+        return 2
+    if price >= 1:
+        return 4
+    return 6
+
+
+def generate_trades(count, symbols=DEFAULT_SYMBOLS, seed=0, start_ms=START_TIME_MS):
+    """
+    Yield ``count`` trade payloads shaped like Binance's ``@trade`` events.
+    Prices random-walk on each symbol's tick size, and earlier symbols trade
+    more often, as the majors do.
+    """
+    rng = random.Random(seed)
+    symbols = list(symbols)
+    weights = [1.0 / (rank + 1) for rank in range(len(symbols))]
+    prices = {symbol: START_PRICES.get(symbol, 100.0) for symbol in symbols}
+    trade_ids = {symbol: 100000000 + rank * 1000000 for rank, symbol in enumerate(symbols)}
+    time_ms = start_ms
+
+    for _ in range(count):
+        symbol = rng.choices(symbols, weights)[0]
+        prices[symbol] *= 1 + rng.gauss(0, 0.0002)
+        trade_ids[symbol] += 1
+        time_ms += rng.randint(0, 3)
+        price = round(prices[symbol], tick_decimals(prices[symbol]))
+
+        yield {
+            "e": "trade",
+            "E": time_ms + 1,
+            "s": symbol,
+            "t": trade_ids[symbol],
+            "p": f"{price:.8f}",
+            "q": f"{rng.expovariate(1 / 500.0) / price:.8f}",
+            "T": time_ms,
+            "m": rng.random() < 0.5,
+            "M": True,
+        }
+
+
+def encode_frames(trades, combined=False):
+    """
+    Serialize trades into text frames as the exchange sends them, optionally
+    wrapped as combined-stream frames.
+    """
+    frames = []
+
+    for trade in trades:
+        if combined:
+            trade = {"stream": f"{trade['s'].lower()}@trade", "data": trade}
+        frames.append(json.dumps(trade, separators=(',', ':')))
+
+    return frames
+
+
+def load_frames(path, limit=None):
+    """
+    Read raw frames from a file with one frame per line.
+    """
+    frames = []
+
+    with open(path) as frame_file:
+        for line in frame_file:
+            line = line.strip()
+
+            if line:
+                frames.append(line)
+
+                if limit is not None and len(frames) >= limit:
+                    break
+
+    return frames
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies_ns):
+    """
+    Turn per-message latencies in nanoseconds into microsecond percentiles.
+    """
+    ordered = sorted(latencies_ns)
+    summary = {f"p{pct:g}": percentile(ordered, pct) / 1000.0 for pct in PERCENTILES}
+    summary['mean'] = sum(ordered) / len(ordered) / 1000.0
+    summary['max'] = ordered[-1] / 1000.0
+    return summary
+
+
+class NullWriter:
+    """
+    Stands in for ``BatchWriter`` so batches cost nothing but are counted.
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+
+    async def flush(self, batch):
+        self.batches += 1
+        self.rows += len(batch)
+
+    async def flush_candles(self, bars):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullChannelLayer:
+
+    def __init__(self):
+        self.sent = 0
+
+    async def group_send(self, group, message):
+        self.sent += 1
+
+
+def build_client(options, writer=None, channel_layer=None):
+    from binance_websocket.candles import parse_intervals
+    from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+
+    client = BinanceWebSocketClient(
+        batch_size=options.get('batch_size') or 500,
+        flush_interval=None,
+        writer=writer or NullWriter(),
+        json_backend=options.get('json_backend') or 'auto',
+        trade_log_every=0,
+        conflate_window=options['conflate_ms'] / 1000.0 if options.get('conflate_ms') else None,
+        candle_intervals=parse_intervals(options['candles']) if options.get('candles') else None,
+    )
+
+    client.channel_layer = channel_layer or NullChannelLayer()
+    return client
+
+
+def decode_scenario(frames, options):
+    client = build_client(options)
+    return client.decode_message, frames
+
+
+def parse_scenario(frames, options):
+    client = build_client(options)
+    return client.parse_trade_message, [unwrap_combined_message(json.loads(frame)) for frame in frames]
+
+
+def standalone_scenario(frames, options):
+    from binance_websocket.scripts.standalone_client import StandaloneBinanceClient
+
+    client = StandaloneBinanceClient()
+
+    def handle(frame):
+        return client.parse_trade_message(unwrap_combined_message(json.loads(frame)))
+
+    return handle, frames
+
+
+def process_scenario(frames, options):
+    client = build_client(options, options.get('writer'), options.get('channel_layer'))
+    return client.process_message, frames
+
+
+SCENARIOS = {
+    'decode': decode_scenario,
+    'parse': parse_scenario,
+    'standalone': standalone_scenario,
+    'process': process_scenario,
+}
+
+
+async def time_calls(call, items):
+    latencies = []
+    clock = time.perf_counter_ns
+    started = clock()
+
+    if inspect.iscoroutinefunction(call):
+        for item in items:
+            before = clock()
+            await call(item)
+            latencies.append(clock() - before)
+    else:
+        for item in items:
+            before = clock()
+            call(item)
+            latencies.append(clock() - before)
+
+    return clock() - started, latencies
+
+
+async def trace_memory(call, items):
+    """
+    Run ``items`` under tracemalloc and return the mean peak bytes allocated
+    while handling one message and the bytes still held per message after.
+    """
+    is_async = inspect.iscoroutinefunction(call)
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        peak_total = 0
+
+        for item in items:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+
+            if is_async:
+                await call(item)
+            else:
+                call(item)
+
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'sampled_messages': len(items),
+        'peak_bytes_per_message': peak_total / len(items),
+        'retained_bytes_per_message': retained / len(items),
+    }
+
+
+async def run_scenario(name, frames, options, warmup=1000, memory_sample=2000):
+    call, items = SCENARIOS[name](frames, options)
+
+    if warmup:
+        await time_calls(call, items[:warmup])
+
+    elapsed_ns, latencies = await time_calls(call, items)
+    result = {
+        'messages': len(items),
+        'seconds': elapsed_ns / 1e9,
+        'messages_per_second': len(items) / (elapsed_ns / 1e9),
+        'latency_us': summarize_latencies(latencies),
+    }
+
+    if memory_sample:
+        # A fresh set of handlers, so buffers filled by the timed run do not
+        # count against the sample.
+        call, items = SCENARIOS[name](frames, options)
+        result['memory'] = await trace_memory(call, items[:memory_sample])
+
+    return result
+
+
+async def run_benchmarks(frames, scenarios=SCENARIO_NAMES, options=None, warmup=1000, memory_sample=2000):
+    options = options or {}
+    return {
+        name: await run_scenario(name, frames, options, warmup, memory_sample)
+        for name in scenarios
+    }
+
+
+def build_report(results, frames_info, options=None):
+    from binance_websocket.decoding import get_decoder
+    from binance_websocket.eventloop import resolve_loop
+
+    options = options or {}
+    return {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': f"{platform.python_implementation()} {platform.python_version()}",
+        'platform': platform.platform(),
+        'decoder': get_decoder(options.get('json_backend') or 'auto').name,
+        'loop': resolve_loop(options.get('loop') or 'auto'),
+        'frames': frames_info,
+        'results': results,
+    }
+
+
+def compare_reports(baseline, current, tolerance=0.1):
+    """
+    Return the regressions of ``current`` against ``baseline``: throughput
+    more than ``tolerance`` lower, or p99 latency more than ``tolerance``
+    higher, for every scenario present in both.
+    """
+    regressions = []
+
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+
+        if before is None:
+            continue
+
+        checks = (
+            ('messages_per_second', before['messages_per_second'], result['messages_per_second'], -1),
+            ('p99_us', before['latency_us']['p99'], result['latency_us']['p99'], 1),
+        )
+
+        for metric, old, new, direction in checks:
+            change = (new - old) / old if old else 0.0
+
+            if change * direction > tolerance:
+                regressions.append({'scenario': name, 'metric': metric, 'baseline': old, 'current': new, 'change': change})
+
+    return regressions
@@ -0,0 +1,225 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+DEFAULT_INTERVALS = ('1s', '1m', '5m', '1h')
+
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# A bar stays open this long past its end so trades stamped just before the
+# boundary by the exchange can still land in it.
+CLOSE_GRACE_MS = 1000
+
+# Longest run of empty bars filled in after a gap; after that the builder
+# jumps straight to the bar containing the current time.
+MAX_GAP_BARS = 1000
+
+ZERO = Decimal(0)
+
+
+def interval_ms(interval):
+    """
+    Return the length of an interval such as ``1s``, ``5m`` or ``1h`` in
+    milliseconds.
+    """
+    count, unit = interval[:-1], interval[-1:]
+
+    if unit not in INTERVAL_UNITS or not count.isdigit() or int(count) <= 0:
+        raise ValueError(f"Invalid candle interval: {interval!r}")
+
+    return int(count) * INTERVAL_UNITS[unit] * 1000
+
+
+def parse_intervals(spec):
+    intervals = [interval.strip() for interval in spec.split(',') if interval.strip()]
+
+    for interval in intervals:
+        interval_ms(interval)
+
+    return sorted(set(intervals), key=interval_ms)
+
+
+class Bar:
+    __slots__ = (
+        'ticker_symbol', 'interval', 'open_time_ms', 'close_time_ms',
+        'open', 'high', 'low', 'close', 'volume', 'trade_count', 'closed', 'partial',
+    )
+
+    def __init__(self, ticker_symbol, interval, open_time_ms, length_ms, price, volume=ZERO):
+        self.ticker_symbol = ticker_symbol
+        self.interval = interval
+        self.open_time_ms = open_time_ms
+        self.close_time_ms = open_time_ms + length_ms
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.volume = volume
+        self.trade_count = 0
+        self.closed = False
+        # Set when the builder did not see the whole bar, e.g. the first bar
+        # after start-up or the bar open when the stream stopped.
+        self.partial = False
+
+    def add(self, price, volume):
+        if self.trade_count == 0:
+            self.open = self.high = self.low = price
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+
+        self.close = price
+        self.volume += volume
+        self.trade_count += 1
+
+    def merge(self, bar):
+        """
+        Fold a shorter bar that lies inside this one into it. Bars have to be
+        merged in time order; bars without trades are skipped.
+        """
+        if not bar.trade_count:
+            return
+
+        if self.trade_count == 0:
+            self.open, self.high, self.low = bar.open, bar.high, bar.low
+        else:
+            self.high = max(self.high, bar.high)
+            self.low = min(self.low, bar.low)
+
+        self.close = bar.close
+        self.volume += bar.volume
+        self.trade_count += bar.trade_count
+
+    def next_bar(self, length_ms, open_time_ms=None):
+        """
+        Return a later bar with no trades, flat at this bar's close. It
+        starts where this bar ends unless ``open_time_ms`` is given.
+        """
+        if open_time_ms is None:
+            open_time_ms = self.close_time_ms
+
+        return Bar(self.ticker_symbol, self.interval, open_time_ms, length_ms, self.close)
+
+    @property
+    def open_time(self):
+        return datetime.fromtimestamp(self.open_time_ms / 1000, tz=timezone.utc)
+
+    def to_message(self):
+        return {
+            "ticker_symbol": self.ticker_symbol,
+            "interval": self.interval,
+            "open_time": self.open_time.isoformat(),
+            "open": str(self.open),
+            "high": str(self.high),
+            "low": str(self.low),
+            "close": str(self.close),
+            "volume": str(self.volume),
+            "trade_count": self.trade_count,
+            "closed": self.closed,
+            "partial": self.partial,
+        }
+
+    def __repr__(self):
+        return f"<Bar {self.ticker_symbol} {self.interval} @ {self.open_time_ms}>"
+
+
+class CandleBuilder:
+    """
+    Keeps one open OHLCV bar per symbol and interval, fed by parsed trades.
+
+    Bars close when a trade for a later bar arrives or when ``close_due`` is
+    called past their end. Intervals without trades produce flat bars at the
+    previous close with zero volume, so charts have no holes. Closed bars and
+    the keys of bars touched since the last ``drain`` are collected for the
+    caller to persist and publish.
+
+    The first bar of each symbol and interval starts mid-way through, so it
+    is marked partial; so are the bars still open in ``close_open``.
+    """
+
+    def __init__(self, intervals=DEFAULT_INTERVALS, grace_ms=CLOSE_GRACE_MS, max_gap_bars=MAX_GAP_BARS):
+        self.lengths = {interval: interval_ms(interval) for interval in intervals}
+        self.grace_ms = grace_ms
+        self.max_gap_bars = max_gap_bars
+        self.bars = {}
+        self.closed = []
+        self.updated = set()
+        self.late_trades = 0
+
+    def advance(self, key, bar, length_ms, time_ms):
+        """
+        Close ``bar`` and any empty bars after it that end at or before
+        ``time_ms``, returning the bar that is open at ``time_ms``.
+        """
+        if (time_ms - bar.close_time_ms) // length_ms > self.max_gap_bars:
+            bar.closed = True
+            self.closed.append(bar)
+            bar = bar.next_bar(length_ms, time_ms - time_ms % length_ms)
+
+        while bar.close_time_ms <= time_ms:
+            bar.closed = True
+            self.closed.append(bar)
+            bar = bar.next_bar(length_ms)
+
+        self.bars[key] = bar
+        return bar
+
+    def add(self, trade):
+        symbol = trade['ticker_symbol']
+        time_ms = trade['trade_time_ms']
+        price = trade['price']
+        volume = trade['volume']
+
+        for interval, length_ms in self.lengths.items():
+            key = (symbol, interval)
+            bar = self.bars.get(key)
+
+            if bar is None:
+                bar = Bar(symbol, interval, time_ms - time_ms % length_ms, length_ms, price)
+                bar.partial = True
+                self.bars[key] = bar
+            elif time_ms < bar.open_time_ms:
+                self.late_trades += 1
+                continue
+            elif time_ms >= bar.close_time_ms:
+                bar = self.advance(key, bar, length_ms, time_ms)
+
+            bar.add(price, volume)
+            self.updated.add(key)
+
+    def close_due(self, now_ms):
+        cutoff = now_ms - self.grace_ms
+
+        for key, bar in list(self.bars.items()):
+            if bar.close_time_ms <= cutoff:
+                self.advance(key, bar, self.lengths[key[1]], cutoff)
+
+    def close_open(self):
+        """
+        Close every open bar as partial, for when trades are about to be
+        missed: the stream is stopping or reconnecting. The next trade of a
+        symbol starts a new partial bar rather than filling the gap with flat
+        bars that would hide the missed trades.
+        """
+        for bar in self.bars.values():
+            if bar.trade_count:
+                bar.partial = True
+                bar.closed = True
+                self.closed.append(bar)
+
+        self.bars = {}
+        self.updated = set()
+
+    def drain(self):
+        """
+        Return ``(closed, updated)``: bars closed since the last call, and the
+        open bars that received trades since then.
+        """
+        closed = self.closed
+        updated = [self.bars[key] for key in self.updated if self.bars[key].trade_count]
+        self.closed = []
+        self.updated = set()
+        return closed, updated
+
+    def __len__(self):
+        return len(self.bars)
@@ -0,0 +1,277 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+logger = logging.getLogger('binance_websocket_client')
+
+CAPTURE_VERSION = 1
+
+SEGMENT_SUFFIX = '.frames.gz'
+INDEX_SUFFIX = '.idx.json'
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_SECONDS = 3600.0
+
+# Frames are compressed in blocks of about this many uncompressed bytes, each
+# a complete gzip member, so readers can seek to a block via the index.
+BLOCK_BYTES = 256 * 1024
+
+# A partly filled block is written out after this long, so a crash loses at
+# most this much of the capture.
+BLOCK_FLUSH_INTERVAL = 1.0
+
+# Frames waiting for the capture thread; past this they are dropped rather
+# than letting memory grow or blocking the event loop.
+DEFAULT_QUEUE_SIZE = 200000
+
+COMPRESSION_LEVEL = 6
+
+SYMBOL_FIELD = re.compile(r'"s":\s*"([^"]+)"')
+
+_STOP = object()
+
+
+def frame_symbol(frame):
+    match = SYMBOL_FIELD.search(frame)
+    return match.group(1) if match else None
+
+
+def index_path(segment_path):
+    return segment_path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+
+
+def read_index(segment_path):
+    """
+    Return a segment's index, or ``None`` if the segment was not closed
+    cleanly and has no index.
+    """
+    try:
+        with open(index_path(segment_path)) as index_file:
+            return json.load(index_file)
+    except FileNotFoundError:
+        return None
+
+
+def read_segment(segment_path):
+    """
+    Yield ``(receive_time_ns, frame)`` for every frame in a segment. The
+    segment is plain multi-member gzip of ``<ns>\\t<frame>`` lines, so
+    ``zcat`` reads it too.
+    """
+    with gzip.open(segment_path, 'rt', encoding='utf-8') as segment:
+        for line in segment:
+            received, _, frame = line.rstrip('\n').partition('\t')
+            yield int(received), frame
+
+
+class _Block:
+
+    def __init__(self):
+        self.lines = []
+        self.size = 0
+        self.first_ns = None
+        self.last_ns = None
+        self.symbols = {}
+        self.started_at = time.monotonic()
+
+    def add(self, received_ns, frame):
+        line = f"{received_ns}\t{frame}\n".encode()
+        self.lines.append(line)
+        self.size += len(line)
+
+        if self.first_ns is None:
+            self.first_ns = received_ns
+        self.last_ns = received_ns
+
+        symbol = frame_symbol(frame)
+
+        if symbol is not None:
+            entry = self.symbols.get(symbol)
+
+            if entry is None:
+                self.symbols[symbol] = [received_ns, received_ns, 1]
+            else:
+                entry[1] = received_ns
+                entry[2] += 1
+
+
+class CaptureWriter:
+    """
+    Archives raw frames, each with its receive time, to rotating compressed
+    segment files.
+
+    ``write`` only timestamps the frame and puts it on a queue; a background
+    thread does the compression and disk writes, so the event loop never
+    waits on the disk. Each segment gets an ``.idx.json`` sidecar when it is
+    closed, listing its blocks with their byte offsets, time ranges and
+    per-symbol first/last receive times and counts.
+    """
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES, segment_seconds=DEFAULT_SEGMENT_SECONDS,
+                 block_bytes=BLOCK_BYTES, queue_size=DEFAULT_QUEUE_SIZE, compression_level=COMPRESSION_LEVEL):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.block_bytes = block_bytes
+        self.compression_level = compression_level
+        self.queue = queue.Queue(queue_size)
+        self.thread = None
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.segments = []
+
+        self.segment = None
+        self.segment_path = None
+        self.segment_opened_at = None
+        self.segment_size = 0
+        self.segment_blocks = []
+        self.segment_sequence = 0
+        self.block = None
+
+    def start(self):
+        if self.thread is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name='binance-capture', daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        try:
+            self.queue.put_nowait((time.time_ns(), frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def close(self):
+        if self.thread is None:
+            return
+
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.thread = None
+
+        if self.frames_dropped:
+            logger.warning(f"Capture dropped {self.frames_dropped} frames because the disk could not keep up")
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=BLOCK_FLUSH_INTERVAL)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                break
+
+            try:
+                if item is not None:
+                    self.add(*item)
+
+                if self.block is not None and time.monotonic() - self.block.started_at >= BLOCK_FLUSH_INTERVAL:
+                    self.flush_block()
+            except Exception as e:
+                logger.error(f"Error writing capture segment: {str(e)}")
+
+        try:
+            self.flush_block()
+            self.close_segment()
+        except Exception as e:
+            logger.error(f"Error closing capture segment: {str(e)}")
+
+    def add(self, received_ns, frame):
+        if isinstance(frame, bytes):
+            frame = frame.decode('utf-8', 'replace')
+
+        if self.block is None:
+            self.block = _Block()
+
+        self.block.add(received_ns, frame)
+        self.frames_written += 1
+
+        if self.block.size >= self.block_bytes:
+            self.flush_block()
+
+    def open_segment(self):
+        self.segment_sequence += 1
+        started = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        name = f"frames-{started}-{os.getpid()}-{self.segment_sequence:06d}{SEGMENT_SUFFIX}"
+
+        self.segment_path = os.path.join(self.directory, name)
+        self.segment = open(self.segment_path, 'wb')
+        self.segment_opened_at = time.monotonic()
+        self.segment_size = 0
+        self.segment_blocks = []
+
+    def flush_block(self):
+        block, self.block = self.block, None
+
+        if block is None:
+            return
+
+        if self.segment is None:
+            self.open_segment()
+
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 31)
+        data = compressor.compress(b''.join(block.lines)) + compressor.flush()
+
+        self.segment.write(data)
+        self.segment.flush()
+        self.segment_blocks.append({
+            'offset': self.segment_size,
+            'length': len(data),
+            'frames': len(block.lines),
+            'first_ns': block.first_ns,
+            'last_ns': block.last_ns,
+            'symbols': block.symbols,
+        })
+        self.segment_size += len(data)
+
+        if (self.segment_size >= self.segment_bytes
+                or time.monotonic() - self.segment_opened_at >= self.segment_seconds):
+            self.close_segment()
+
+    def close_segment(self):
+        if self.segment is None:
+            return
+
+        self.segment.close()
+        symbols = {}
+
+        for block in self.segment_blocks:
+            for symbol, (first_ns, last_ns, count) in block['symbols'].items():
+                entry = symbols.get(symbol)
+
+                if entry is None:
+                    symbols[symbol] = [first_ns, last_ns, count]
+                else:
+                    entry[1] = last_ns
+                    entry[2] += count
+
+        index = {
+            'version': CAPTURE_VERSION,
+            'segment': os.path.basename(self.segment_path),
+            'frames': sum(block['frames'] for block in self.segment_blocks),
+            'first_ns': self.segment_blocks[0]['first_ns'],
+            'last_ns': self.segment_blocks[-1]['last_ns'],
+            'symbols': symbols,
+            'blocks': self.segment_blocks,
+        }
+
+        # Written under a temporary name first so readers never see half an index.
+        path = index_path(self.segment_path)
+
+        with open(path + '.tmp', 'w') as index_file:
+            json.dump(index, index_file, separators=(',', ':'))
+
+        os.replace(path + '.tmp', path)
+
+        self.segments.append(self.segment_path)
+        self.segment = None
+        logger.info(f"Closed capture segment {index['segment']} with {index['frames']} frames")
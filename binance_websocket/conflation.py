@@ -0,0 +1,79 @@
+class SymbolWindow:
+    __slots__ = ('ticker_symbol', 'last', 'volume', 'trade_count', 'high', 'low')
+
+    def __init__(self, trade):
+        price = trade['price']
+        self.ticker_symbol = trade['ticker_symbol']
+        self.last = trade
+        self.volume = trade['volume']
+        self.trade_count = 1
+        self.high = price
+        self.low = price
+
+    def add(self, trade):
+        price = trade['price']
+        self.last = trade
+        self.volume += trade['volume']
+        self.trade_count += 1
+
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+
+    def to_message(self):
+        return {
+            "ticker_symbol": self.ticker_symbol,
+            "price": str(self.last['price']),
+            "volume": str(self.volume),
+            "trade_time": self.last['trade_time'].isoformat(),
+            "trade_count": self.trade_count,
+            "high": str(self.high),
+            "low": str(self.low),
+            "conflated": True,
+        }
+
+    def to_fields(self):
+        return {
+            's': self.ticker_symbol,
+            'p': self.last['price_text'],
+            'q': format(self.volume, 'f'),
+            'T': self.last['trade_time_ms'],
+            'n': self.trade_count,
+            'h': format(self.high, 'f'),
+            'l': format(self.low, 'f'),
+        }
+
+
+class Conflator:
+    """
+    Groups trades per symbol over a publishing window so that a burst of
+    trades on one symbol turns into a single channel-layer message carrying
+    the last price, summed volume, trade count and high/low for the window.
+
+    Symbols listed in ``raw_symbols`` are not conflated.
+    """
+
+    def __init__(self, window, raw_symbols=None):
+        self.window = window
+        self.raw_symbols = {symbol.strip().upper() for symbol in raw_symbols or () if symbol.strip()}
+        self.windows = {}
+
+    def is_raw(self, ticker_symbol):
+        return ticker_symbol in self.raw_symbols
+
+    def add(self, trade):
+        window = self.windows.get(trade['ticker_symbol'])
+
+        if window is None:
+            self.windows[trade['ticker_symbol']] = SymbolWindow(trade)
+        else:
+            window.add(trade)
+
+    def drain(self):
+        windows = list(self.windows.values())
+        self.windows = {}
+        return windows
+
+    def __len__(self):
+        return len(self.windows)
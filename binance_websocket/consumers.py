@@ -1,33 +1,255 @@
 import json
+import logging
+import re
+import time
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from binance_websocket.encoding import (
+    WIRE_MSGPACK,
+    WIRE_STRUCT,
+    DeltaStructEncoder,
+    encode_text,
+    negotiate_wire_format,
+)
+from binance_websocket.groups import ALL_GROUP, DEFAULT_CHANNEL, symbol_group
+from binance_websocket.metrics import (
+    CONSUMER_CONNECTS,
+    CONSUMER_MESSAGES_SENT,
+    CONSUMERS_ACTIVE,
+    STAGE_LATENCY_SECONDS,
+)
+from binance_websocket.snapshots import load_snapshots
+
+logger = logging.getLogger('binance_websocket_client')
+
+# Upper bound on symbol/channel subscriptions held by one connection.
+MAX_SUBSCRIPTIONS = 200
+
+VALID_NAME = re.compile(r'^[A-Za-z0-9_]{1,20}$')
+
+DELIVER_LATENCY = STAGE_LATENCY_SECONDS.labels('deliver')
+END_TO_END_LATENCY = STAGE_LATENCY_SECONDS.labels('end_to_end')
+
 class BinanceConsumer(AsyncWebsocketConsumer):
+    """
+    Connections start on the all-symbols group. The first
+    ``{"action": "subscribe", "symbols": [...], "channels": [...]}`` moves the
+    connection onto per-symbol groups instead, and later subscriptions add to
+    them; ``"*"`` as a symbol (re)joins the all-symbols group.
+    ``"unsubscribe"`` takes the same arguments.
+
+    Right after connecting, and for newly subscribed trade symbols, the
+    consumer sends a ``snapshot`` message with the last cached trade per
+    symbol, read from the shared cache rather than the database.
+
+    Browsers that offer the ``binance.msgpack`` or ``binance.struct``
+    subprotocol get trade messages as binary frames; control messages are
+    always JSON text.
+
+    Traced trades record how long the channel layer took to deliver them
+    and their total delay since Binance's event time; when the ingest
+    client runs with ``--trace`` the send time is added to the message's
+    ``trace`` as ``s``.
+    """
+
     async def connect(self):
-        await self.accept()
-        
+        self.wire_format = negotiate_wire_format(self.scope.get('subprotocols'))
+        self.struct_encoder = DeltaStructEncoder() if self.wire_format == WIRE_STRUCT else None
+        self.messages_sent = CONSUMER_MESSAGES_SENT.labels(self.wire_format or 'json')
+
+        await self.accept(subprotocol=self.wire_format)
+        CONSUMER_CONNECTS.inc()
+        CONSUMERS_ACTIVE.inc()
+
+        self.subscriptions = set()
+        self.subscribed_all = True
+        self.implicit_all = True
+
         await self.channel_layer.group_add(
-            "binance_data",
+            ALL_GROUP,
             self.channel_name
         )
-        
+
         await self.send(text_data=json.dumps({
             'type': 'connection_established',
             'message': 'You are now connected to the Binance WebSocket server!'
         }))
 
+        await self.send_snapshot()
+
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            "binance_data",
-            self.channel_name
+        CONSUMERS_ACTIVE.dec()
+
+        if self.subscribed_all:
+            await self.channel_layer.group_discard(
+                ALL_GROUP,
+                self.channel_name
+            )
+
+        for group in self.subscriptions:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        request = self.parse_request(text_data)
+
+        if request is None:
+            text_data_json = json.dumps({
+                'type': 'echo',
+                'message': 'Received: ' + (text_data or ''),
+            })
+
+            await self.send(text_data=text_data_json)
+            return
+
+        symbols = request.get('symbols') or []
+        channels = request.get('channels') or [DEFAULT_CHANNEL]
+
+        if not isinstance(symbols, list) or not isinstance(channels, list):
+            await self.send_error('symbols and channels must be lists')
+            return
+
+        names_valid = (
+            all(symbol == '*' or self.is_valid_name(symbol) for symbol in symbols)
+            and all(self.is_valid_name(channel) for channel in channels)
         )
 
-    async def receive(self, text_data):
-        text_data_json = json.dumps({
-            'type': 'echo',
-            'message': 'Received: ' + text_data,
+        if not names_valid:
+            await self.send_error('Invalid symbol or channel name')
+            return
+
+        if request['action'] == 'subscribe':
+            await self.subscribe(symbols, channels)
+        else:
+            await self.unsubscribe(symbols, channels)
+
+    def parse_request(self, text_data):
+        try:
+            request = json.loads(text_data or '')
+        except ValueError:
+            return None
+
+        if not isinstance(request, dict) or request.get('action') not in ('subscribe', 'unsubscribe'):
+            return None
+
+        return request
+
+    @staticmethod
+    def is_valid_name(name):
+        return isinstance(name, str) and bool(VALID_NAME.match(name))
+
+    async def subscribe(self, symbols, channels):
+        wants_all = '*' in symbols
+        groups = {
+            symbol_group(symbol, channel)
+            for symbol in symbols if symbol != '*'
+            for channel in channels
+        }
+        new_groups = groups - self.subscriptions
+
+        if len(self.subscriptions) + len(new_groups) > MAX_SUBSCRIPTIONS:
+            await self.send_error(f'At most {MAX_SUBSCRIPTIONS} subscriptions are allowed per connection')
+            return
+
+        for group in new_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.subscriptions |= new_groups
+
+        snapshot_symbols = sorted({
+            symbol.upper() for symbol in symbols
+            if symbol != '*' and symbol_group(symbol, DEFAULT_CHANNEL) in new_groups
         })
-        
-        await self.send(text_data=text_data_json)
-    
+
+        if wants_all and not self.subscribed_all:
+            await self.set_all_subscription(True)
+        elif not wants_all and self.implicit_all:
+            await self.set_all_subscription(False)
+
+        self.implicit_all = False
+
+        await self.send_subscriptions()
+
+        if snapshot_symbols:
+            await self.send_snapshot(snapshot_symbols)
+
+    async def unsubscribe(self, symbols, channels):
+        groups = {
+            symbol_group(symbol, channel)
+            for symbol in symbols if symbol != '*'
+            for channel in channels
+        }
+
+        for group in groups & self.subscriptions:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.subscriptions -= groups
+
+        if '*' in symbols and self.subscribed_all:
+            await self.set_all_subscription(False)
+
+        self.implicit_all = False
+
+        await self.send_subscriptions()
+
+    async def set_all_subscription(self, subscribed):
+        if subscribed:
+            await self.channel_layer.group_add(ALL_GROUP, self.channel_name)
+        else:
+            await self.channel_layer.group_discard(ALL_GROUP, self.channel_name)
+
+        self.subscribed_all = subscribed
+
+    async def send_subscriptions(self):
+        await self.send(text_data=json.dumps({
+            'type': 'subscriptions',
+            'all': self.subscribed_all,
+            'groups': sorted(self.subscriptions),
+        }))
+
+    async def send_snapshot(self, symbols=None):
+        try:
+            messages = await load_snapshots(symbols)
+        except Exception as e:
+            logger.warning(f"Could not load trade snapshots: {str(e)}")
+            return
+
+        if messages:
+            await self.send(text_data=json.dumps({
+                'type': 'snapshot',
+                'messages': messages,
+            }))
+
+    async def send_error(self, message):
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': message,
+        }))
+
     async def binance_message(self, event):
-        await self.send(text_data=json.dumps(event)) 
\ No newline at end of file
+        fields = event.get('fields')
+        trace = event.get('trace')
+        self.messages_sent.inc()
+
+        if trace is not None:
+            sent_ms = time.time() * 1000
+            DELIVER_LATENCY.observe((sent_ms - trace['b']) / 1000)
+
+            if 'E' in trace:
+                END_TO_END_LATENCY.observe((sent_ms - trace['E']) / 1000)
+
+        if fields is not None and self.wire_format == WIRE_MSGPACK and 'packed' in event:
+            await self.send(bytes_data=event['packed'])
+            return
+
+        if fields is not None and self.struct_encoder is not None:
+            await self.send(bytes_data=self.struct_encoder.encode(fields))
+            return
+
+        text = event.get('text')
+
+        if text is None:
+            text = json.dumps(event)
+        elif event.get('forward_trace'):
+            payload = json.loads(text)
+            payload['message']['trace']['s'] = sent_ms
+            text = encode_text(payload)
+
+        await self.send(text_data=text)
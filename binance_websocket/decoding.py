@@ -0,0 +1,215 @@
+import datetime
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class DecodeError(ValueError):
+    """The frame is not valid JSON."""
+
+
+class TradeFormatError(ValueError):
+    """The frame is valid JSON but not a trade event."""
+
+
+def _from_epoch_ms(value):
+    return datetime.datetime.fromtimestamp(value / 1000.0, tz=datetime.timezone.utc)
+
+
+class TradeRecord:
+    """
+    Compact parsed trade.
+
+    Prices and quantities are kept as the exchange's decimal strings and
+    timestamps as epoch milliseconds; ``Decimal`` and ``datetime`` values are
+    only built when the matching property is read. Item access (``trade['price']``)
+    is supported so records can be used wherever a parsed trade dict was.
+    """
+
+    __slots__ = (
+        'ticker_symbol', 'price_text', 'volume_text', 'trade_id',
+        'trade_time_ms', 'event_time_ms', 'is_market_maker', 'stream',
+        'received_ns', 'parsed_ns',
+    )
+
+    def __init__(self, ticker_symbol, price_text, volume_text, trade_id,
+                 trade_time_ms, event_time_ms, is_market_maker, stream=None):
+        self.ticker_symbol = ticker_symbol
+        self.price_text = price_text
+        self.volume_text = volume_text
+        self.trade_id = trade_id
+        self.trade_time_ms = trade_time_ms
+        self.event_time_ms = event_time_ms
+        self.is_market_maker = is_market_maker
+        self.stream = stream
+        # Wall-clock stamps (epoch nanoseconds) set by the client for
+        # latency tracing.
+        self.received_ns = None
+        self.parsed_ns = None
+
+    @classmethod
+    def from_message(cls, message_data, stream=None):
+        try:
+            return cls(
+                message_data['s'],
+                message_data['p'],
+                message_data['q'],
+                message_data['t'],
+                message_data['T'],
+                message_data['E'],
+                message_data['m'],
+                stream,
+            )
+        except (KeyError, TypeError) as e:
+            raise TradeFormatError(f"Missing trade field: {str(e)}")
+
+    @property
+    def price(self):
+        return Decimal(self.price_text)
+
+    @property
+    def volume(self):
+        return Decimal(self.volume_text)
+
+    @property
+    def trade_time(self):
+        return _from_epoch_ms(self.trade_time_ms)
+
+    @property
+    def event_time(self):
+        return _from_epoch_ms(self.event_time_ms)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"<TradeRecord {self.ticker_symbol} #{self.trade_id} @ {self.price_text}>"
+
+
+class JsonDecoder:
+    name = 'json'
+
+    def loads(self, message):
+        try:
+            return json.loads(message)
+        except ValueError as e:
+            raise DecodeError(str(e))
+
+    def decode_trade(self, message):
+        message_data = self.loads(message)
+        stream = None
+
+        if isinstance(message_data, dict) and 'stream' in message_data and 'data' in message_data:
+            stream = message_data['stream']
+            message_data = message_data['data']
+
+        return TradeRecord.from_message(message_data, stream)
+
+
+class OrjsonDecoder(JsonDecoder):
+    name = 'orjson'
+
+    def loads(self, message):
+        try:
+            return orjson.loads(message)
+        except orjson.JSONDecodeError as e:
+            raise DecodeError(str(e))
+
+
+if msgspec is not None:
+    class _RawTrade(msgspec.Struct):
+        s: str
+        p: str
+        q: str
+        t: int
+        T: int
+        E: int
+        m: bool
+
+    class _CombinedTrade(msgspec.Struct):
+        stream: str
+        data: _RawTrade
+
+
+class MsgspecDecoder(JsonDecoder):
+    """
+    Decodes trade frames straight into typed structs, so no intermediate
+    dict is built for the frame or for the combined-stream wrapper.
+    """
+
+    name = 'msgspec'
+
+    def __init__(self):
+        self.json_decoder = msgspec.json.Decoder()
+        self.trade_decoder = msgspec.json.Decoder(_RawTrade)
+        self.combined_decoder = msgspec.json.Decoder(_CombinedTrade)
+
+    def loads(self, message):
+        try:
+            return self.json_decoder.decode(message)
+        except msgspec.DecodeError as e:
+            raise DecodeError(str(e))
+
+    def decode_trade(self, message):
+        prefix = message[:10]
+        combined = prefix.startswith(b'{"stream"' if isinstance(prefix, bytes) else '{"stream"')
+
+        try:
+            if combined:
+                frame = self.combined_decoder.decode(message)
+                raw, stream = frame.data, frame.stream
+            else:
+                raw, stream = self.trade_decoder.decode(message), None
+        except msgspec.ValidationError as e:
+            raise TradeFormatError(str(e))
+        except msgspec.DecodeError as e:
+            raise DecodeError(str(e))
+
+        return TradeRecord(raw.s, raw.p, raw.q, raw.t, raw.T, raw.E, raw.m, stream)
+
+
+DECODERS = {
+    'msgspec': (MsgspecDecoder, msgspec),
+    'orjson': (OrjsonDecoder, orjson),
+    'json': (JsonDecoder, json),
+}
+
+DECODER_CHOICES = ('auto',) + tuple(DECODERS)
+
+
+def available_decoders():
+    return [name for name, (decoder_class, module) in DECODERS.items() if module is not None]
+
+
+def get_decoder(name='auto'):
+    """
+    Return a decoder for the named backend. ``auto`` picks the fastest
+    installed backend and falls back to the standard library.
+    """
+    if name == 'auto':
+        name = available_decoders()[0]
+
+    if name not in DECODERS:
+        raise ValueError(f"Unknown JSON backend: {name}")
+
+    decoder_class, module = DECODERS[name]
+
+    if module is None:
+        raise ValueError(f"JSON backend '{name}' is not installed")
+
+    return decoder_class()
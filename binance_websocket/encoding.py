@@ -0,0 +1,237 @@
+import json
+import struct
+
+from binance_websocket.fixedpoint import parse_fixed, to_decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# WebSocket subprotocols a browser can ask for; JSON text is the default.
+WIRE_JSON = 'binance.json'
+WIRE_MSGPACK = 'binance.msgpack'
+WIRE_STRUCT = 'binance.struct'
+
+FRAME_TRADE = 1
+FRAME_CONFLATED = 2
+
+_TRADE_TIME = struct.Struct('<q')
+
+
+def supported_wire_formats():
+    formats = [WIRE_JSON, WIRE_STRUCT]
+
+    if msgpack is not None:
+        formats.insert(1, WIRE_MSGPACK)
+
+    return formats
+
+
+def negotiate_wire_format(requested):
+    """
+    Pick the first subprotocol the browser offered that we support. Returns
+    ``None`` when none match, in which case the connection speaks JSON.
+    """
+    supported = supported_wire_formats()
+
+    for subprotocol in requested or ():
+        if subprotocol in supported:
+            return subprotocol
+
+    return None
+
+
+def encode_text(payload):
+    """
+    Serialize a client-facing payload to JSON text once, so every consumer
+    can forward the same string instead of encoding the event again.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+
+    return json.dumps(payload, separators=(',', ':'))
+
+
+def broadcast_event(message, fields=None, trace=None, forward_trace=False):
+    """
+    Build the channel-layer event for a trade message. Browsers receive
+    ``text`` unchanged; the event's own ``type`` only routes it to
+    ``BinanceConsumer.binance_message``.
+
+    ``fields`` is the compact form used by binary subprotocols: ``s`` symbol,
+    ``p`` price, ``q`` volume, ``T`` trade time in epoch milliseconds and, for
+    conflated windows, ``n`` trade count, ``h`` high and ``l`` low. It is
+    packed once here for MessagePack clients.
+
+    ``trace`` holds a trade's timing stamps, from which consumers record the
+    delivery latency; with ``forward_trace`` JSON clients get them too, as
+    the message's ``trace`` field.
+    """
+    if trace is not None and forward_trace:
+        message = dict(message, trace=trace)
+
+    event = {
+        "type": "binance_message",
+        "text": encode_text({"type": "binance_message", "message": message}),
+    }
+
+    if trace is not None:
+        event["trace"] = trace
+
+        if forward_trace:
+            event["forward_trace"] = True
+
+    if fields is not None:
+        event["fields"] = fields
+
+        if msgpack is not None:
+            event["packed"] = msgpack.packb(fields)
+
+    return event
+
+
+def _format_units(units, scale):
+    return format(to_decimal(units, scale), 'f')
+
+
+def _decimal_places(text):
+    return len(text.partition('.')[2])
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value // 2 if not value & 1 else -(value + 1) // 2
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+
+        if not byte & 0x80:
+            return value, offset
+
+        shift += 7
+
+
+class DeltaStructEncoder:
+    """
+    Encodes trade fields as compact binary frames for one connection.
+
+    Frame layout (little-endian)::
+
+        u8      kind (1 = trade, 2 = conflated window)
+        u8      symbol length, then the ASCII symbol
+        i64     trade time, epoch milliseconds
+        u8      price scale (decimal places)
+        varint  zigzag(price units - previous price units for the symbol)
+        u8      volume scale
+        varint  volume units
+        -- conflated windows only --
+        varint  trade count
+        varint  high units - price units
+        varint  price units - low units
+
+    The previous price for a symbol counts as zero when it was sent with a
+    different scale, which is also the case for the first frame of a symbol.
+    """
+
+    def __init__(self):
+        self.last_prices = {}
+
+    def encode(self, fields):
+        symbol = fields['s']
+        price_text = fields['p']
+        conflated = 'n' in fields
+
+        price_scale = _decimal_places(price_text)
+        if conflated:
+            price_scale = max(price_scale, _decimal_places(fields['h']), _decimal_places(fields['l']))
+
+        price_units = parse_fixed(price_text, price_scale)
+        last_scale, last_units = self.last_prices.get(symbol, (None, 0))
+        delta = price_units - (last_units if last_scale == price_scale else 0)
+        self.last_prices[symbol] = (price_scale, price_units)
+
+        volume_scale = _decimal_places(fields['q'])
+        symbol_bytes = symbol.encode('ascii')
+
+        buffer = bytearray()
+        buffer.append(FRAME_CONFLATED if conflated else FRAME_TRADE)
+        buffer.append(len(symbol_bytes))
+        buffer += symbol_bytes
+        buffer += _TRADE_TIME.pack(fields['T'])
+        buffer.append(price_scale)
+        _write_varint(buffer, _zigzag(delta))
+        buffer.append(volume_scale)
+        _write_varint(buffer, parse_fixed(fields['q'], volume_scale))
+
+        if conflated:
+            _write_varint(buffer, fields['n'])
+            _write_varint(buffer, parse_fixed(fields['h'], price_scale) - price_units)
+            _write_varint(buffer, price_units - parse_fixed(fields['l'], price_scale))
+
+        return bytes(buffer)
+
+
+class DeltaStructDecoder:
+    """
+    Reference decoder for ``DeltaStructEncoder`` frames, mirroring what a
+    browser client keeps per connection.
+    """
+
+    def __init__(self):
+        self.last_prices = {}
+
+    def decode(self, data):
+        kind = data[0]
+        symbol_length = data[1]
+        offset = 2 + symbol_length
+        symbol = data[2:offset].decode('ascii')
+        trade_time_ms = _TRADE_TIME.unpack_from(data, offset)[0]
+        offset += _TRADE_TIME.size
+
+        price_scale = data[offset]
+        delta, offset = _read_varint(data, offset + 1)
+        last_scale, last_units = self.last_prices.get(symbol, (None, 0))
+        price_units = _unzigzag(delta) + (last_units if last_scale == price_scale else 0)
+        self.last_prices[symbol] = (price_scale, price_units)
+
+        volume_scale = data[offset]
+        volume_units, offset = _read_varint(data, offset + 1)
+
+        fields = {
+            's': symbol,
+            'p': _format_units(price_units, price_scale),
+            'q': _format_units(volume_units, volume_scale),
+            'T': trade_time_ms,
+        }
+
+        if kind == FRAME_CONFLATED:
+            fields['n'], offset = _read_varint(data, offset)
+            high_offset, offset = _read_varint(data, offset)
+            low_offset, offset = _read_varint(data, offset)
+            fields['h'] = _format_units(price_units + high_offset, price_scale)
+            fields['l'] = _format_units(price_units - low_offset, price_scale)
+
+        return fields
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from binance_websocket.logsampling import ErrorRateLimiter
+from binance_websocket.metrics import LOOP_LAG_SECONDS
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger('binance_websocket_client')
+
+LOOP_AUTO = 'auto'
+LOOP_ASYNCIO = 'asyncio'
+LOOP_UVLOOP = 'uvloop'
+LOOP_CHOICES = (LOOP_AUTO, LOOP_ASYNCIO, LOOP_UVLOOP)
+
+# How often the lag monitor wakes up; each wake-up is one lag sample.
+LAG_CHECK_INTERVAL = 0.25
+
+DEFAULT_LAG_WARNING = 0.1
+
+# Lag warnings are logged at most this often, with the count of the ones
+# suppressed in between.
+LAG_WARNING_INTERVAL = 10.0
+
+
+def available_loops():
+    loops = [LOOP_ASYNCIO]
+
+    if uvloop is not None:
+        loops.insert(0, LOOP_UVLOOP)
+
+    return loops
+
+
+def resolve_loop(name=LOOP_AUTO):
+    """
+    Return the loop implementation ``name`` stands for. ``auto`` picks
+    uvloop when it is installed and falls back to asyncio's own loop.
+    """
+    if name == LOOP_AUTO:
+        name = available_loops()[0]
+
+    if name not in LOOP_CHOICES:
+        raise ValueError(f"Unknown event loop: {name}")
+
+    if name == LOOP_UVLOOP and uvloop is None:
+        raise ValueError("Event loop 'uvloop' is not installed")
+
+    return name
+
+
+def loop_factory(name=LOOP_AUTO):
+    """
+    Return a function creating a new event loop of the named implementation.
+    """
+    if resolve_loop(name) == LOOP_UVLOOP:
+        return uvloop.new_event_loop
+
+    return asyncio.new_event_loop
+
+
+def loop_name(loop):
+    return LOOP_UVLOOP if uvloop is not None and isinstance(loop, uvloop.Loop) else LOOP_ASYNCIO
+
+
+async def _with_executor(main, executor_workers):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(executor_workers, thread_name_prefix='binance-executor')
+    )
+    return await main
+
+
+def run(main, loop=LOOP_AUTO, executor_workers=None):
+    """
+    ``asyncio.run`` on the chosen loop implementation. ``executor_workers``
+    sizes the default executor that database writes run in; asyncio's
+    default is ``min(32, cpu_count + 4)`` threads.
+    """
+    factory = loop_factory(loop)
+
+    if executor_workers:
+        main = _with_executor(main, executor_workers)
+
+    if hasattr(asyncio, 'Runner'):
+        with asyncio.Runner(loop_factory=factory) as runner:
+            return runner.run(main)
+
+    # Python 3.10 has no Runner; the policy is the only way to pick the loop.
+    if factory is not asyncio.new_event_loop:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    return asyncio.run(main)
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: how much later than scheduled the loop gets
+    round to a sleep that should have woken ``interval`` seconds on. Lag
+    means a callback held the loop, for example decoding a large frame or
+    building Decimals in a tight loop, and socket reads waited behind it.
+
+    Every sample goes to the ``binance_loop_lag_seconds`` histogram; samples
+    of ``warn_after`` seconds or more are logged, rate-limited.
+    """
+
+    def __init__(self, interval=LAG_CHECK_INTERVAL, warn_after=DEFAULT_LAG_WARNING,
+                 warning_interval=LAG_WARNING_INTERVAL):
+        self.interval = interval
+        self.warn_after = warn_after
+        self.warnings = ErrorRateLimiter(logger, warning_interval)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.lagged = 0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        logger.info(f"Event loop: {loop_name(loop)}")
+
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - expected)
+
+    def record(self, lag):
+        lag = max(lag, 0.0)
+        LOOP_LAG_SECONDS.observe(lag)
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+
+        if self.warn_after and lag >= self.warn_after:
+            self.lagged += 1
+            self.warnings.warning(
+                'loop_lag',
+                "Event loop lagged %.0fms behind schedule; blocking work on the loop is delaying socket reads",
+                lag * 1000,
+            )
@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+# Binance quotes prices and quantities with at most 8 decimal places.
+DEFAULT_SCALE = 8
+
+INT64_MAX = 2 ** 63 - 1
+
+
+def parse_fixed(text, scale):
+    """
+    Parse a decimal string such as ``"11850.15000000"`` straight into an
+    integer number of ``10 ** -scale`` units, without building a Decimal.
+    """
+    negative = text.startswith('-')
+    if negative:
+        text = text[1:]
+
+    whole, _, fraction = text.partition('.')
+
+    if len(fraction) > scale:
+        if fraction[scale:].strip('0'):
+            raise ValueError(f"{text} has more than {scale} decimal places")
+        fraction = fraction[:scale]
+
+    units = int((whole or '0') + fraction.ljust(scale, '0'))
+
+    if units > INT64_MAX:
+        raise OverflowError(f"{text} does not fit in 64 bits at scale {scale}")
+
+    return -units if negative else units
+
+
+def to_decimal(units, scale):
+    return Decimal(units).scaleb(-scale)
+
+
+def format_fixed(units, scale):
+    return str(to_decimal(units, scale))
+
+
+class FixedPointScales:
+    """
+    Per-symbol decimal scales used to turn prices and quantities into
+    integers. Symbols without an override use the default scales.
+    """
+
+    def __init__(self, price_scale=DEFAULT_SCALE, volume_scale=DEFAULT_SCALE, overrides=None):
+        self.price_scale = price_scale
+        self.volume_scale = volume_scale
+        self.overrides = dict(overrides or {})
+        # Symbols that had a trade too precise for their scale.
+        self.fallback_symbols = set()
+
+    @classmethod
+    def parse(cls, spec, price_scale=DEFAULT_SCALE, volume_scale=DEFAULT_SCALE):
+        """
+        Build scales from ``"BTCUSDT=2:5,ETHUSDT=2:4"``, where each entry is
+        ``SYMBOL=price_scale:volume_scale``.
+        """
+        overrides = {}
+
+        for entry in (spec or '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+
+            try:
+                symbol, scales = entry.split('=', 1)
+                symbol_price_scale, symbol_volume_scale = scales.split(':', 1)
+                overrides[symbol.strip().upper()] = (int(symbol_price_scale), int(symbol_volume_scale))
+            except ValueError:
+                raise ValueError(f"Invalid symbol scale '{entry}', expected SYMBOL=price_scale:volume_scale")
+
+        return cls(price_scale, volume_scale, overrides)
+
+    def for_symbol(self, symbol):
+        return self.overrides.get(symbol, (self.price_scale, self.volume_scale))
+
+    def set_symbol(self, symbol, price_scale, volume_scale):
+        self.overrides[symbol] = (price_scale, volume_scale)
+
+    def encode(self, symbol, price_text, volume_text):
+        price_scale, volume_scale = self.for_symbol(symbol)
+        return parse_fixed(price_text, price_scale), parse_fixed(volume_text, volume_scale)
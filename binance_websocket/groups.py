@@ -0,0 +1,48 @@
+import re
+
+# Every trade for every symbol; what consumers join until they subscribe.
+ALL_GROUP = "binance_data"
+
+DEFAULT_CHANNEL = "trade"
+
+BROADCAST_ALL = 'all'
+BROADCAST_SYMBOL = 'symbol'
+BROADCAST_BOTH = 'both'
+
+BROADCAST_MODES = (BROADCAST_ALL, BROADCAST_SYMBOL, BROADCAST_BOTH)
+
+# One group_send per trade. ``both`` doubles that and is only meant for
+# clients that have not moved to subscriptions yet.
+DEFAULT_BROADCAST_MODE = BROADCAST_SYMBOL
+
+# Channels group names may only contain ASCII letters, digits, hyphens,
+# underscores and periods.
+_INVALID_GROUP_CHARS = re.compile(r'[^a-zA-Z0-9_.-]')
+
+
+def symbol_group(ticker_symbol, channel=DEFAULT_CHANNEL):
+    channel = _INVALID_GROUP_CHARS.sub('_', channel)
+    ticker_symbol = _INVALID_GROUP_CHARS.sub('_', ticker_symbol.upper())
+    return f"binance.{channel}.{ticker_symbol}"
+
+
+def broadcast_groups(ticker_symbol, channel=DEFAULT_CHANNEL, mode=BROADCAST_SYMBOL):
+    groups = []
+
+    if mode in (BROADCAST_ALL, BROADCAST_BOTH):
+        groups.append(ALL_GROUP)
+
+    if mode in (BROADCAST_SYMBOL, BROADCAST_BOTH):
+        groups.append(symbol_group(ticker_symbol, channel))
+
+    return groups
+
+
+def stream_channel(stream, default=DEFAULT_CHANNEL):
+    """
+    Return the channel part of a ``symbol@channel`` stream name.
+    """
+    if not stream or '@' not in stream:
+        return default
+
+    return stream.split('@', 1)[1]
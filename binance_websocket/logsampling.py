@@ -0,0 +1,161 @@
+import logging
+import time
+
+# Raw frames quoted in error logs are cut to this many characters.
+MAX_LOGGED_FRAME_CHARS = 200
+
+
+def truncate_frame(message, limit=MAX_LOGGED_FRAME_CHARS):
+    if isinstance(message, bytes):
+        message = message.decode('utf-8', errors='replace')
+
+    if len(message) <= limit:
+        return message
+
+    return f"{message[:limit]}... ({len(message)} chars)"
+
+
+class LogSampler:
+    """
+    Lets one in every ``every`` calls through. ``every=1`` logs everything
+    and ``every=0`` logs nothing.
+    """
+
+    def __init__(self, every=1):
+        self.every = every
+        self.count = 0
+
+    def should_log(self):
+        if not self.every:
+            return False
+
+        self.count += 1
+
+        if self.count >= self.every:
+            self.count = 0
+            return True
+
+        return False
+
+
+class ErrorRateLimiter:
+    """
+    Logs at most one message per key every ``interval`` seconds. Messages that
+    are suppressed are counted and the count is appended to the next message
+    for that key. Arguments are only formatted when a message is emitted.
+    """
+
+    def __init__(self, logger, interval=0):
+        self.logger = logger
+        self.interval = interval
+        self.last_logged = {}
+        self.suppressed = {}
+
+    def log(self, level, key, msg, *args):
+        if self.interval:
+            now = time.monotonic()
+            last = self.last_logged.get(key)
+
+            if last is not None and now - last < self.interval:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return
+
+            self.last_logged[key] = now
+            suppressed = self.suppressed.pop(key, 0)
+
+            if suppressed:
+                msg = f"{msg} ({suppressed} similar messages suppressed)"
+
+        self.logger.log(level, msg, *args)
+
+    def error(self, key, msg, *args):
+        self.log(logging.ERROR, key, msg, *args)
+
+    def warning(self, key, msg, *args):
+        self.log(logging.WARNING, key, msg, *args)
+
+    def flush(self):
+        for key, suppressed in sorted(self.suppressed.items()):
+            self.logger.error(f"{suppressed} similar '{key}' messages suppressed")
+
+        self.suppressed = {}
+
+
+class ThroughputStats:
+    """
+    Per-symbol message, byte and parse-failure counters, reset every time a
+    summary is taken.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.monotonic()
+        self.symbols = {}
+        self.failures = 0
+        self.failed_bytes = 0
+
+    def record(self, symbol, size):
+        counts = self.symbols.get(symbol)
+
+        if counts is None:
+            self.symbols[symbol] = [1, size]
+        else:
+            counts[0] += 1
+            counts[1] += size
+
+    def record_failure(self, size):
+        self.failures += 1
+        self.failed_bytes += size
+
+    def add_summary(self, summary):
+        """
+        Fold in the counts of a summary taken elsewhere, e.g. by a worker
+        process, so several collectors can be reported as one.
+        """
+        for symbol, counts in summary['symbols'].items():
+            totals = self.symbols.get(symbol)
+
+            if totals is None:
+                self.symbols[symbol] = [counts['messages'], counts['bytes']]
+            else:
+                totals[0] += counts['messages']
+                totals[1] += counts['bytes']
+
+        self.failures += summary['parse_failures']
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        symbols = {
+            symbol: {
+                'messages': messages,
+                'bytes': size,
+                'messages_per_second': messages / elapsed,
+                'bytes_per_second': size / elapsed,
+            }
+            for symbol, (messages, size) in self.symbols.items()
+        }
+        summary = {
+            'elapsed': elapsed,
+            'symbols': symbols,
+            'messages': sum(counts['messages'] for counts in symbols.values()),
+            'parse_failures': self.failures,
+        }
+        self.reset()
+        return summary
+
+
+def format_throughput_summary(summary):
+    lines = [
+        f"Throughput over {summary['elapsed']:.1f}s: {summary['messages']} messages, "
+        f"{summary['parse_failures']} parse failures"
+    ]
+
+    for symbol, counts in sorted(summary['symbols'].items()):
+        lines.append(
+            f"  {symbol}: {counts['messages_per_second']:.1f} msgs/s, "
+            f"{counts['bytes_per_second']:.0f} bytes/s"
+        )
+
+    return '\n'.join(lines)
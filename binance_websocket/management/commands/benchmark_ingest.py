@@ -0,0 +1,221 @@
+import json
+import logging
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+
+from binance_websocket.benchmarks import (
+    DEFAULT_SYMBOLS,
+    SCENARIO_NAMES,
+    build_report,
+    compare_reports,
+    encode_frames,
+    generate_trades,
+    load_frames,
+    run_benchmarks,
+)
+from binance_websocket.eventloop import LOOP_AUTO, LOOP_CHOICES, loop_factory
+from binance_websocket.eventloop import run as run_loop
+from binance_websocket.writers import BatchWriter
+
+
+class Command(BaseCommand):
+    help = 'Measure offline ingest throughput, latency and allocations per message'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios',
+            default=','.join(SCENARIO_NAMES),
+            help=f"Comma separated scenarios to run ({', '.join(SCENARIO_NAMES)})"
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=100000,
+            help='Number of generated trade frames'
+        )
+        parser.add_argument(
+            '--symbols',
+            default=','.join(DEFAULT_SYMBOLS),
+            help='Comma separated symbols for generated frames'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for generated frames'
+        )
+        parser.add_argument(
+            '--combined',
+            action='store_true',
+            help='Wrap generated frames as combined-stream frames'
+        )
+        parser.add_argument(
+            '--frames-file',
+            default=None,
+            help='Replay raw frames from a file, one per line, instead of generating them'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=1000,
+            help='Frames run through each scenario before timing'
+        )
+        parser.add_argument(
+            '--memory-sample',
+            type=int,
+            default=2000,
+            help='Frames run under tracemalloc to measure allocations (0 disables)'
+        )
+        parser.add_argument(
+            '--json-backend',
+            default='auto',
+            help='JSON decoder used by the client scenarios'
+        )
+        parser.add_argument(
+            '--loop',
+            choices=LOOP_CHOICES,
+            default=LOOP_AUTO,
+            help='Event loop implementation to benchmark on'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Batch size used by the process scenario'
+        )
+        parser.add_argument(
+            '--candles',
+            default=None,
+            help='Build candles for these intervals in the process scenario'
+        )
+        parser.add_argument(
+            '--conflate-ms',
+            type=int,
+            default=None,
+            help='Conflate broadcasts in the process scenario'
+        )
+        parser.add_argument(
+            '--database',
+            action='store_true',
+            help='Write batches to the configured database instead of discarding them'
+        )
+        parser.add_argument(
+            '--channel-layer',
+            action='store_true',
+            help='Publish to the configured channel layer instead of discarding messages'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Write the results as JSON to this file'
+        )
+        parser.add_argument(
+            '--compare',
+            default=None,
+            help='Compare against a previous results file and fail on regressions'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.1,
+            help='Allowed relative drop in msgs/s or rise in p99 latency before a regression is reported'
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIO_NAMES)
+
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        if options['frames_file']:
+            frames = load_frames(options['frames_file'], options['messages'])
+            frames_info = {'source': options['frames_file'], 'count': len(frames)}
+        else:
+            symbols = [symbol.strip().upper() for symbol in options['symbols'].split(',') if symbol.strip()]
+            frames = encode_frames(generate_trades(options['messages'], symbols, options['seed']), options['combined'])
+            frames_info = {
+                'source': 'generated',
+                'count': len(frames),
+                'symbols': symbols,
+                'seed': options['seed'],
+                'combined': options['combined'],
+            }
+
+        if not frames:
+            raise CommandError('No frames to benchmark')
+
+        try:
+            loop_factory(options['loop'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        writer = BatchWriter() if options['database'] else None
+        benchmark_options = {
+            'json_backend': options['json_backend'],
+            'loop': options['loop'],
+            'batch_size': options['batch_size'],
+            'candles': options['candles'],
+            'conflate_ms': options['conflate_ms'],
+            'writer': writer,
+            'channel_layer': get_channel_layer() if options['channel_layer'] else None,
+        }
+
+        # Per-batch and per-connection log lines would dominate the timings.
+        client_logger = logging.getLogger('binance_websocket_client')
+        level = client_logger.level
+        client_logger.setLevel(logging.WARNING)
+
+        try:
+            results = run_loop(run_benchmarks(
+                frames, scenarios, benchmark_options, options['warmup'], options['memory_sample'],
+            ), options['loop'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            client_logger.setLevel(level)
+            if writer:
+                writer.close()
+
+        report = build_report(results, frames_info, benchmark_options)
+        self.write_results(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            regressions = compare_reports(baseline, report, options['tolerance'])
+
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"{regression['scenario']} {regression['metric']}: {regression['baseline']:.2f} -> "
+                    f"{regression['current']:.2f} ({regression['change']:+.1%})"
+                ))
+
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def write_results(self, report):
+        self.stdout.write(
+            f"{report['frames']['count']} frames, {report['decoder']} decoder, {report['loop']} loop, {report['python']}"
+        )
+
+        for name, result in report['results'].items():
+            latency = result['latency_us']
+            line = (
+                f"{name:<12} {result['messages_per_second']:>12,.0f} msgs/s  "
+                f"p50 {latency['p50']:.2f}us  p99 {latency['p99']:.2f}us  p99.9 {latency['p99.9']:.2f}us"
+            )
+
+            if 'memory' in result:
+                line += f"  {result['memory']['peak_bytes_per_message']:.0f} B/msg peak"
+
+            self.stdout.write(line)
@@ -1,15 +1,71 @@
-import json
 import asyncio
 import websockets
 import logging
 import time
-import datetime
-from decimal import Decimal
-from django.core.management.base import BaseCommand
+import functools
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from binance_websocket.models import PriceUpdate
+from binance_websocket.capture import DEFAULT_SEGMENT_BYTES, DEFAULT_SEGMENT_SECONDS, CaptureWriter
+from binance_websocket.candles import CandleBuilder, parse_intervals
+from binance_websocket.conflation import Conflator
+from binance_websocket.decoding import DECODER_CHOICES, DecodeError, TradeFormatError, TradeRecord, get_decoder
+from binance_websocket.encoding import broadcast_event
+from binance_websocket.eventloop import DEFAULT_LAG_WARNING, LOOP_AUTO, LOOP_CHOICES, LoopLagMonitor, loop_factory
+from binance_websocket.eventloop import run as run_loop
+from binance_websocket.groups import BROADCAST_MODES, DEFAULT_BROADCAST_MODE, broadcast_groups, stream_channel, symbol_group
+from binance_websocket.fixedpoint import DEFAULT_SCALE, FixedPointScales
+from binance_websocket.logsampling import (
+    ErrorRateLimiter,
+    LogSampler,
+    ThroughputStats,
+    format_throughput_summary,
+    truncate_frame,
+)
+from binance_websocket.metrics import (
+    BATCH_FLUSH_SECONDS,
+    BATCH_FLUSH_SIZE,
+    CHANNEL_LAYER_ERRORS,
+    CONNECTS,
+    DATABASE_ERRORS,
+    DEFAULT_METRICS_ADDRESS,
+    FRAME_BYTES_RECEIVED,
+    FRAMES_RECEIVED,
+    GROUP_SEND_SECONDS,
+    PARSE_ERRORS,
+    RECONNECTS,
+    STAGE_LATENCY_SECONDS,
+    TRADES_PARSED,
+    start_metrics_server,
+)
+from binance_websocket.orderbook import (
+    DEFAULT_BOOK_DEPTH,
+    DEFAULT_SNAPSHOT_LIMIT,
+    OrderBookManager,
+    RestSnapshotFetcher,
+    is_depth_frame,
+    is_diff_depth_stream,
+)
+from binance_websocket.rotation import (
+    DEFAULT_ROTATE_AFTER,
+    DEFAULT_ROTATION_OVERLAP,
+    ROTATION_CHECK_INTERVAL,
+    TradeDeduplicator,
+    frames_until,
+)
+from binance_websocket.snapshots import SNAPSHOT_FLUSH_INTERVAL, SnapshotWriter, is_process_local, snapshot_cache
+from binance_websocket.supervisor import DEFAULT_STALL_TIMEOUT, Supervisor, assign_streams
+from binance_websocket.pipeline import OVERFLOW_BLOCK, OVERFLOW_POLICIES, StageQueue, format_queue_stats
+from binance_websocket.writers import BatchWriter, insert_candles, insert_trades
+from binance_websocket.streams import (
+    MAX_STREAMS_PER_CONNECTION,
+    build_stream_url,
+    load_stream_file,
+    parse_stream_list,
+    shard_streams,
+    unwrap_combined_message,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,24 +73,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger('binance_websocket_client')
 
+# How often open candles are checked for closing and bar updates published.
+CANDLE_TICK = 1.0
+
+TRADE_SEND_SECONDS = GROUP_SEND_SECONDS.labels('trade')
+DEPTH_SEND_SECONDS = GROUP_SEND_SECONDS.labels('depth')
+KLINE_SEND_SECONDS = GROUP_SEND_SECONDS.labels('kline')
+
+EXCHANGE_LATENCY = STAGE_LATENCY_SECONDS.labels('exchange')
+PARSE_LATENCY = STAGE_LATENCY_SECONDS.labels('parse')
+PUBLISH_LATENCY = STAGE_LATENCY_SECONDS.labels('publish')
+
 class BinanceWebSocketClient:
-    def __init__(self, symbol="btcusdt", channel="trade", batch_size=None):
+    def __init__(self, symbol="btcusdt", channel="trade", batch_size=None, streams=None,
+                 flush_interval=5.0, copy_threshold=None, writer=None,
+                 queue_size=None, overflow=OVERFLOW_BLOCK, spill_dir=None, report_interval=None,
+                 json_backend='auto', fixed_point=None,
+                 trade_log_every=1, error_log_interval=0, stats_interval=None,
+                 conflate_window=None, raw_symbols=None, broadcast_mode=DEFAULT_BROADCAST_MODE,
+                 candle_intervals=None, snapshots=None,
+                 book_depth=DEFAULT_BOOK_DEPTH, book_publish_interval=0.25, snapshot_fetcher=None,
+                 stats_reporter=None, rotate_after=DEFAULT_ROTATE_AFTER,
+                 rotation_overlap=DEFAULT_ROTATION_OVERLAP, stale_after=None, capture=None,
+                 trace=False):
         self.symbol = symbol.lower()
         self.channel = channel
-        self.ws_url = f"wss://stream.binance.com:9443/ws/{self.symbol}@{self.channel}"
+        self.streams = list(streams) if streams else [f"{self.symbol}@{self.channel}"]
+        self.ws_url = build_stream_url(self.streams)
         self.connection = None
+        self.connected_at = None
+        self.frames_received = 0
+        self.standby = None
+        self.standby_reader = None
+        self.standby_stop = None
+        self.rotate_after = rotate_after
+        self.rotation_overlap = rotation_overlap
+        self.stale_after = stale_after
+        self.dedupe = TradeDeduplicator()
+        self.capture = capture
+        self.trace = trace
+        self.received_ns = None
+        # Set by the replayer: event times are historical, so latencies
+        # measured from them are meaningless.
+        self.replaying = False
         self.reconnect_delay = 1
         self.max_reconnect_delay = 60
         self.running = False
         self.batch_size = batch_size
         self.message_buffer = []
+        self.buffer_started_at = None
+        self.flush_interval = flush_interval
+        self.fixed_point = fixed_point
+        self.registered_symbols = set()
+        self.owns_writer = writer is None and bool(batch_size)
+        self.writer = writer or (BatchWriter(copy_threshold=copy_threshold, scales=fixed_point) if batch_size else None)
         self.channel_layer = get_channel_layer()
+        self.decoder = get_decoder(json_backend)
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.pipeline_tasks = []
+        self.pipeline_running = False
+        self.trade_log_sampler = LogSampler(trade_log_every)
+        self.error_log = ErrorRateLimiter(logger, error_log_interval)
+        self.stats_interval = stats_interval
+        self.throughput = ThroughputStats() if stats_interval else None
+        self.stats_reporter = stats_reporter
+        self.conflator = Conflator(conflate_window, raw_symbols) if conflate_window else None
+        self.broadcast_mode = broadcast_mode
+        self.candles = CandleBuilder(candle_intervals) if candle_intervals else None
+        self.snapshots = snapshots
+        self.book_depth = book_depth
+        self.book_publish_interval = book_publish_interval
+        self.order_books = None
+        
+        if any(is_diff_depth_stream(stream) for stream in self.streams):
+            self.order_books = OrderBookManager(snapshot_fetcher)
+        
+        if queue_size:
+            self.receive_queue = StageQueue('receive', queue_size, overflow, spill_dir)
+            self.persist_queue = StageQueue('persist', queue_size, overflow, spill_dir)
+            self.broadcast_queue = StageQueue('broadcast', queue_size, overflow, spill_dir)
     
     async def connect(self):
         try:
             self.connection = await websockets.connect(self.ws_url)
+            self.connected_at = time.monotonic()
             self.reconnect_delay = 1  
-            logger.info(f"Connected to Binance WebSocket: {self.ws_url}")
+            CONNECTS.inc()
+            if len(self.streams) == 1:
+                logger.info(f"Connected to Binance WebSocket: {self.ws_url}")
+            else:
+                logger.info(f"Connected to Binance combined stream with {len(self.streams)} streams")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to Binance WebSocket: {str(e)}")
@@ -42,6 +171,7 @@ class BinanceWebSocketClient:
     
     async def reconnect(self):
         logger.info(f"Attempting to reconnect in {self.reconnect_delay} seconds...")
+        RECONNECTS.inc()
         await asyncio.sleep(self.reconnect_delay)
         
         self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
@@ -50,123 +180,661 @@ class BinanceWebSocketClient:
     
     def parse_trade_message(self, message_data):
         try:
-            
-            return {
-                'ticker_symbol': message_data['s'],
-                'price': Decimal(message_data['p']),
-                'volume': Decimal(message_data['q']),
-                'trade_id': message_data['t'],
-                'trade_time': datetime.datetime.fromtimestamp(message_data['T'] / 1000.0, tz=datetime.timezone.utc),
-                'event_time': datetime.datetime.fromtimestamp(message_data['E'] / 1000.0, tz=datetime.timezone.utc),
-                'is_market_maker': message_data['m'],
-                'raw_data': message_data,
-            }
+            return TradeRecord.from_message(message_data)
         except Exception as e:
-            logger.error(f"Error parsing message: {str(e)}")
+            self.error_log.error('parse', "Error parsing message: %s", e)
             return None
     
+    def decode_message(self, message):
+        try:
+            return self.decoder.decode_trade(message)
+        except TradeFormatError as e:
+            self.error_log.error('parse', "Error parsing message: %s", e)
+            return None
+    
+    def process_depth(self, message):
+        event = unwrap_combined_message(self.decoder.loads(message))
+        
+        if not isinstance(event, dict) or event.get('e') != 'depthUpdate':
+            raise TradeFormatError("Not a depth update")
+        
+        if self.throughput is not None:
+            self.throughput.record(event['s'], len(message))
+        
+        self.order_books.handle(event)
+    
     async def process_message(self, message):
         try:
-            message_data = json.loads(message)
-            parsed_data = self.parse_trade_message(message_data)
+            if self.order_books is not None and is_depth_frame(message):
+                self.process_depth(message)
+                return
+            
+            parsed_data = self.decode_message(message)
+            
+            if parsed_data and self.dedupe.is_duplicate(parsed_data['ticker_symbol'], parsed_data['trade_id']):
+                return
+            
+            if parsed_data and self.received_ns is not None:
+                self.stamp(parsed_data)
+            
+            if self.throughput is not None:
+                if parsed_data:
+                    self.throughput.record(parsed_data['ticker_symbol'], len(message))
+                else:
+                    self.throughput.record_failure(len(message))
             
             if parsed_data:
-                logger.info(f"Trade: {parsed_data['ticker_symbol']} @ {parsed_data['price']} ({parsed_data['volume']})")
+                TRADES_PARSED.labels(parsed_data['ticker_symbol']).inc()
                 
-                if not self.batch_size:
-                    await self.save_to_database(parsed_data)
-                else:
-                    self.message_buffer.append(parsed_data)
-                    
-                    if len(self.message_buffer) >= self.batch_size:
-                        await self.process_batch()
+                if self.trade_log_sampler.should_log():
+                    logger.info(f"Trade: {parsed_data['ticker_symbol']} @ {parsed_data['price']} ({parsed_data['volume']})")
+                
+                if self.candles is not None:
+                    self.candles.add(parsed_data)
                 
-                await self.send_to_channel_layer(parsed_data)
+                if self.pipeline_running:
+                    await self.persist_queue.put(parsed_data)
+                    await self.broadcast_queue.put(parsed_data)
+                else:
+                    await self.persist(parsed_data)
+                    await self.publish(parsed_data)
+            else:
+                PARSE_ERRORS.inc()
                 
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON: {message}")
+        except DecodeError:
+            PARSE_ERRORS.inc()
+            if self.throughput is not None:
+                self.throughput.record_failure(len(message))
+            self.error_log.error('json', "Failed to parse JSON: %s", truncate_frame(message))
         except Exception as e:
-            logger.error(f"Error processing message: {str(e)}")
+            self.error_log.error('process', "Error processing message: %s", e)
+    
+    async def persist(self, parsed_data):
+        if not self.batch_size:
+            await self.save_to_database(parsed_data)
+            return
+        
+        if not self.message_buffer:
+            self.buffer_started_at = time.monotonic()
+        self.message_buffer.append(parsed_data)
+        
+        if len(self.message_buffer) >= self.batch_size:
+            await self.process_batch()
     
     async def process_batch(self):
         if not self.message_buffer:
             return
+        
+        batch = self.message_buffer
+        self.message_buffer = []
+        self.buffer_started_at = None
             
-        logger.info(f"Processing batch of {len(self.message_buffer)} messages")
+        logger.info(f"Processing batch of {len(batch)} messages")
+        BATCH_FLUSH_SIZE.observe(len(batch))
+        started = time.perf_counter()
         
         try:
-            for data in self.message_buffer:
-                await self.save_to_database(data)
-                
-            self.message_buffer = []
+            await self.writer.flush(batch)
         except Exception as e:
-            logger.error(f"Error processing batch: {str(e)}")
+            DATABASE_ERRORS.labels('batch').inc()
+            self.error_log.error('batch', "Error processing batch, retrying once: %s", e)
+            
+            # Inserts skip stored trades, so rows that made it in before the
+            # error are not written twice.
+            try:
+                await self.writer.flush(batch)
+            except Exception as e:
+                DATABASE_ERRORS.labels('batch').inc()
+                self.error_log.error('batch_retry', "Dropped batch of %d trades after retrying: %s", len(batch), e)
+        
+        BATCH_FLUSH_SECONDS.observe(time.perf_counter() - started)
+    
+    async def flush_periodically(self):
+        while self.running:
+            if self.buffer_started_at is None:
+                await asyncio.sleep(self.flush_interval)
+                continue
+            
+            remaining = self.buffer_started_at + self.flush_interval - time.monotonic()
+            
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            else:
+                await self.process_batch()
     
     async def save_to_database(self, data):
         try:
-            price_update = PriceUpdate(
-                ticker_symbol=data['ticker_symbol'],
-                price=data['price'],
-                volume=data['volume'],
-            )
-            
             loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, price_update.save)
+            await loop.run_in_executor(
+                None,
+                functools.partial(
+                    insert_trades,
+                    [data],
+                    scales=self.fixed_point,
+                    registered_symbols=self.registered_symbols,
+                )
+            )
             
         except Exception as e:
-            logger.error(f"Error saving to database: {str(e)}")
+            DATABASE_ERRORS.labels('trade').inc()
+            self.error_log.error('database', "Error saving to database: %s", e)
+    
+    async def publish(self, data):
+        if self.conflator is None or self.conflator.is_raw(data['ticker_symbol']):
+            await self.send_to_channel_layer(data)
+        else:
+            self.conflator.add(data)
+    
+    async def publish_conflated(self):
+        windows = self.conflator.drain()
+        
+        if windows:
+            await asyncio.gather(*(
+                self.broadcast(
+                    window.to_message(),
+                    stream_channel(window.last.get('stream'), self.channel),
+                    window.to_fields(),
+                )
+                for window in windows
+            ))
+    
+    async def publish_conflated_periodically(self):
+        while True:
+            await asyncio.sleep(self.conflator.window)
+            await self.publish_conflated()
+    
+    def stamp(self, parsed_data):
+        """
+        Record when a trade's frame came off the socket and when it was
+        parsed, and the exchange-to-receive and receive-to-parse latencies.
+        The exchange stage compares Binance's clock with ours, so it includes
+        any clock offset, and is skipped when replaying.
+        """
+        parsed_ns = time.time_ns()
+        parsed_data.received_ns = self.received_ns
+        parsed_data.parsed_ns = parsed_ns
+        
+        if not self.replaying:
+            EXCHANGE_LATENCY.observe(self.received_ns / 1e9 - parsed_data.event_time_ms / 1e3)
+        
+        PARSE_LATENCY.observe((parsed_ns - self.received_ns) / 1e9)
+    
+    def trace_stamps(self, data):
+        """
+        Epoch-millisecond stamps of a trade on its way through: ``E`` event
+        time at Binance, ``r`` received, ``p`` parsed and ``b`` handed to the
+        channel layer. Consumers add ``s`` when sending to a browser. ``E`` is
+        left out when replaying.
+        """
+        parsed_ns = data.get('parsed_ns')
+        
+        if parsed_ns is None:
+            return None
+        
+        published_ns = time.time_ns()
+        PUBLISH_LATENCY.observe((published_ns - parsed_ns) / 1e9)
+        
+        stamps = {} if self.replaying else {'E': data['event_time_ms']}
+        stamps['r'] = data['received_ns'] / 1e6
+        stamps['p'] = parsed_ns / 1e6
+        stamps['b'] = published_ns / 1e6
+        return stamps
     
     async def send_to_channel_layer(self, data):
+        await self.broadcast(
+            {
+                "ticker_symbol": data['ticker_symbol'],
+                "price": data['price_text'],
+                "volume": data['volume_text'],
+                "trade_time": data['trade_time'].isoformat(),
+                "event_time": data['event_time'].isoformat(),
+            },
+            stream_channel(data.get('stream'), self.channel),
+            {
+                's': data['ticker_symbol'],
+                'p': data['price_text'],
+                'q': data['volume_text'],
+                'T': data['trade_time_ms'],
+            },
+            self.trace_stamps(data),
+        )
+    
+    async def broadcast(self, message, channel=None, fields=None, trace=None):
+        if self.snapshots is not None:
+            self.snapshots.update(message)
+        
+        event = broadcast_event(message, fields, trace, forward_trace=self.trace)
+        groups = broadcast_groups(message['ticker_symbol'], channel or self.channel, self.broadcast_mode)
+        started = time.perf_counter()
+        
         try:
-            await self.channel_layer.group_send(
-                "binance_data",
-                {
-                    "type": "binance_message",
-                    "message": {
-                        "ticker_symbol": data['ticker_symbol'],
-                        "price": str(data['price']),
-                        "volume": str(data['volume']),
-                        "trade_time": data['trade_time'].isoformat(),
-                    }
-                }
-            )
+            if len(groups) == 1:
+                await self.channel_layer.group_send(groups[0], event)
+            else:
+                await asyncio.gather(*(self.channel_layer.group_send(group, event) for group in groups))
         except Exception as e:
-            logger.error(f"Error sending to channel layer: {str(e)}")
+            CHANNEL_LAYER_ERRORS.inc()
+            self.error_log.error('channel_layer', "Error sending to channel layer: %s", e)
+        
+        TRADE_SEND_SECONDS.observe(time.perf_counter() - started)
     
-    async def listen(self):
-        self.running = True
+    async def flush_snapshots(self):
+        try:
+            await self.snapshots.flush()
+        except Exception as e:
+            self.error_log.error('snapshots', "Error writing snapshots: %s", e)
+    
+    async def flush_snapshots_periodically(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_FLUSH_INTERVAL)
+            await self.flush_snapshots()
+    
+    async def publish_books(self):
+        books = self.order_books.drain_dirty()
         
-        while self.running:
-            connected = await self.connect()
-            
-            if not connected:
-                connected = await self.reconnect()
-                if not connected:
-                    continue
+        if books:
+            await asyncio.gather(*(self.publish_book(book) for book in books))
+    
+    async def publish_book(self, book):
+        group = symbol_group(book.ticker_symbol, 'depth')
+        event = broadcast_event(book.to_message(self.book_depth))
+        started = time.perf_counter()
+        
+        try:
+            await self.channel_layer.group_send(group, event)
+        except Exception as e:
+            CHANNEL_LAYER_ERRORS.inc()
+            self.error_log.error('channel_layer', "Error sending to channel layer: %s", e)
+        
+        DEPTH_SEND_SECONDS.observe(time.perf_counter() - started)
+    
+    async def publish_books_periodically(self):
+        while True:
+            await asyncio.sleep(self.book_publish_interval)
+            await self.publish_books()
+    
+    async def flush_candles(self):
+        closed, updated = self.candles.drain()
+        
+        if closed:
+            await self.save_candles(closed)
+        
+        if closed or updated:
+            await asyncio.gather(*(self.publish_bar(bar) for bar in closed + updated))
+    
+    async def save_candles(self, bars):
+        try:
+            if self.writer is not None:
+                await self.writer.flush_candles(bars)
+            else:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, insert_candles, bars)
+        except Exception as e:
+            DATABASE_ERRORS.labels('candles').inc()
+            self.error_log.error('candles', "Error saving candles: %s", e)
+    
+    async def publish_bar(self, bar):
+        group = symbol_group(bar.ticker_symbol, f"kline_{bar.interval}")
+        event = broadcast_event(bar.to_message())
+        started = time.perf_counter()
+        
+        try:
+            await self.channel_layer.group_send(group, event)
+        except Exception as e:
+            CHANNEL_LAYER_ERRORS.inc()
+            self.error_log.error('channel_layer', "Error sending to channel layer: %s", e)
+        
+        KLINE_SEND_SECONDS.observe(time.perf_counter() - started)
+    
+    async def build_candles_periodically(self):
+        while True:
+            await asyncio.sleep(CANDLE_TICK)
+            self.candles.close_due(int(time.time() * 1000))
+            await self.flush_candles()
+    
+    async def run_stage(self, queue, handler):
+        while True:
+            item = await queue.get()
             
             try:
-                async for message in self.connection:
-                    await self.process_message(message)
-            
-            except websockets.ConnectionClosed:
-                logger.warning("Connection closed, attempting to reconnect...")
+                await handler(item)
             except Exception as e:
-                logger.error(f"Error in WebSocket connection: {str(e)}")
+                self.error_log.error(queue.name, "Error in %s stage: %s", queue.name, e)
+    
+    def queue_stats(self):
+        if not self.queue_size:
+            return {}
+        
+        return {
+            queue.name: queue.stats()
+            for queue in (self.receive_queue, self.persist_queue, self.broadcast_queue)
+        }
+    
+    async def report_queue_depths(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            logger.info(f"Queue depths: {format_queue_stats(self.queue_stats())}")
+    
+    async def report_throughput(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            summary = self.throughput.summary()
+            
+            if self.stats_reporter is not None:
+                self.stats_reporter(summary)
+            else:
+                logger.info(format_throughput_summary(summary))
+            self.error_log.flush()
+    
+    def start_pipeline(self):
+        self.pipeline_tasks = [
+            asyncio.create_task(self.run_stage(self.receive_queue, self.process_received)),
+            asyncio.create_task(self.run_stage(self.persist_queue, self.persist)),
+            asyncio.create_task(self.run_stage(self.broadcast_queue, self.publish)),
+        ]
+        
+        if self.report_interval:
+            self.pipeline_tasks.append(asyncio.create_task(self.report_queue_depths()))
+        
+        self.pipeline_running = True
+    
+    def cancel_pipeline(self):
+        self.pipeline_running = False
+        
+        for task in self.pipeline_tasks:
+            task.cancel()
+        
+        self.pipeline_tasks = []
+    
+    async def drain_pipeline(self):
+        for parsed_data in self.persist_queue.drain_nowait():
+            await self.persist(parsed_data)
+        
+        for parsed_data in self.broadcast_queue.drain_nowait():
+            await self.publish(parsed_data)
+        
+        for item in self.receive_queue.drain_nowait():
+            await self.process_received(item)
+        
+        for queue in (self.receive_queue, self.persist_queue, self.broadcast_queue):
+            queue.close()
+    
+    async def enqueue_message(self, message):
+        # The receive stamp travels with the frame so queueing time is
+        # counted in the parse stage.
+        await self.receive_queue.put((self.received_ns, message))
+    
+    async def process_received(self, item):
+        self.received_ns, message = item
+        await self.process_message(message)
+    
+    async def receive_messages(self, connection=None, stop=None):
+        connection = connection or self.connection
+        handle = self.enqueue_message if self.pipeline_running else self.process_message
+        capture = self.capture
+        messages = connection if stop is None else frames_until(connection, stop)
+        
+        async for message in messages:
+            self.received_ns = time.time_ns()
+            self.frames_received += 1
+            FRAMES_RECEIVED.inc()
+            FRAME_BYTES_RECEIVED.inc(len(message))
+            
+            if capture is not None:
+                capture.write(message)
+            
+            await handle(message)
+    
+    async def open_standby(self, reason):
+        logger.info(f"Opening standby connection ({reason})")
+        
+        try:
+            standby = await websockets.connect(self.ws_url)
+        except Exception as e:
+            logger.error(f"Failed to open standby connection: {str(e)}")
+            return False
+        
+        self.dedupe.start_overlap()
+        self.standby = standby
+        self.standby_stop = asyncio.Event()
+        self.standby_reader = asyncio.create_task(self.receive_messages(standby, self.standby_stop))
+        return True
+    
+    async def promote_standby(self):
+        """
+        Make the standby the primary connection and close the old one. The
+        receive loop drains whatever the old connection still has buffered
+        and then carries on with the standby, whose unread frames wait in its
+        own buffer, so nothing is lost in the handover.
+        
+        The standby reader is stopped between frames rather than cancelled: a
+        trade it is halfway through handling has already been recorded by the
+        deduplicator, so cancelling it there would drop it from both
+        connections.
+        """
+        standby, reader, stop = self.standby, self.standby_reader, self.standby_stop
+        self.standby = self.standby_reader = self.standby_stop = None
+        
+        stop.set()
+        
+        try:
+            await reader
+        except Exception as e:
+            logger.error(f"Error in standby connection: {str(e)}")
+        
+        if standby.closed:
+            logger.warning("Standby connection closed before it could be promoted")
+            return False
+        
+        old = self.connection
+        self.connection = standby
+        self.connected_at = time.monotonic()
+        
+        if old is not None:
+            await old.close()
+        
+        logger.info("Rotated to standby connection")
+        return True
+    
+    async def rotate(self, reason):
+        if not await self.open_standby(reason):
+            return
+        
+        await asyncio.sleep(self.rotation_overlap)
+        
+        # The receive loop promotes the standby itself if the old connection
+        # dropped during the overlap.
+        if self.standby is not None:
+            await self.promote_standby()
+    
+    async def watch_connection(self):
+        """
+        Rotate onto a fresh connection ahead of Binance's 24 hour limit, and
+        as soon as the current one goes quiet for ``stale_after`` seconds.
+        """
+        seen_frames = self.frames_received
+        quiet_since = time.monotonic()
+        
+        while True:
+            await asyncio.sleep(ROTATION_CHECK_INTERVAL)
+            now = time.monotonic()
+            
+            if self.frames_received != seen_frames:
+                seen_frames = self.frames_received
+                quiet_since = now
             
-            if self.running:
+            if self.connection is None or self.standby is not None:
+                continue
+            
+            if self.rotate_after and now - self.connected_at >= self.rotate_after:
+                await self.rotate(f"connection is {now - self.connected_at:.0f}s old")
+                quiet_since = time.monotonic()
+            elif self.stale_after and now - quiet_since >= self.stale_after:
+                await self.rotate(f"no frames for {now - quiet_since:.0f}s")
+                quiet_since = time.monotonic()
+    
+    async def close_standby(self):
+        if self.standby_reader is not None:
+            self.standby_reader.cancel()
+        
+        if self.standby is not None:
+            await self.standby.close()
+        
+        self.standby = self.standby_reader = self.standby_stop = None
+        self.dedupe.end_overlap()
+    
+    def start_background_tasks(self):
+        """
+        Start the periodic flushing and publishing tasks that run alongside
+        frame processing; the caller cancels them when it is done.
+        """
+        background_tasks = []
+        
+        if self.batch_size and self.flush_interval:
+            background_tasks.append(asyncio.create_task(self.flush_periodically()))
+        
+        if self.throughput is not None:
+            background_tasks.append(asyncio.create_task(self.report_throughput()))
+        
+        if self.conflator is not None:
+            background_tasks.append(asyncio.create_task(self.publish_conflated_periodically()))
+        
+        if self.candles is not None:
+            background_tasks.append(asyncio.create_task(self.build_candles_periodically()))
+        
+        if self.snapshots is not None:
+            background_tasks.append(asyncio.create_task(self.flush_snapshots_periodically()))
+        
+        if self.order_books is not None:
+            background_tasks.append(asyncio.create_task(self.publish_books_periodically()))
+        
+        return background_tasks
+    
+    async def listen(self):
+        self.running = True
+        background_tasks = self.start_background_tasks()
+        
+        if self.capture is not None:
+            self.capture.start()
+        
+        if self.rotate_after or self.stale_after:
+            background_tasks.append(asyncio.create_task(self.watch_connection()))
+        
+        if self.queue_size:
+            self.start_pipeline()
+        
+        try:
+            while self.running:
+                if self.connection is None:
+                    connected = await self.connect()
+                    
+                    if not connected:
+                        connected = await self.reconnect()
+                        if not connected:
+                            continue
+                
+                connection = self.connection
+                
+                try:
+                    await self.receive_messages(connection)
+                
+                except websockets.ConnectionClosed:
+                    logger.warning("Connection closed, attempting to reconnect...")
+                except Exception as e:
+                    logger.error(f"Error in WebSocket connection: {str(e)}")
+                
+                if not self.running:
+                    break
+                
+                if self.connection is not connection or (self.standby is not None and await self.promote_standby()):
+                    # Rotated: the old connection is drained. Frames it
+                    # delivered can still be buffered on the new one, and
+                    # the last trade ids keep dropping them.
+                    self.dedupe.end_overlap()
+                    continue
+                
+                self.connection = None
+                
+                # Trades are missed until the new connection is up.
+                if self.candles is not None:
+                    self.candles.close_open()
+                
                 await self.reconnect()
+        finally:
+            for task in background_tasks:
+                task.cancel()
+            
+            self.cancel_pipeline()
     
     async def stop(self):
         self.running = False
+        self.cancel_pipeline()
+        
+        if self.queue_size:
+            await self.drain_pipeline()
         
         if self.batch_size and self.message_buffer:
             await self.process_batch()
         
+        if self.conflator is not None:
+            await self.publish_conflated()
+        
+        if self.candles is not None:
+            self.candles.close_due(int(time.time() * 1000))
+            self.candles.close_open()
+            await self.flush_candles()
+        
+        if self.snapshots is not None:
+            await self.flush_snapshots()
+        
+        if self.order_books is not None:
+            self.order_books.close()
+        
+        if self.owns_writer:
+            self.writer.close()
+        
+        await self.close_standby()
+        
         if self.connection:
             await self.connection.close()
             logger.info("WebSocket connection closed")
 
 
+async def run_clients(clients, lag_monitor=None):
+    if lag_monitor is not None:
+        lag_monitor.start()
+    
+    try:
+        await asyncio.gather(*(client.listen() for client in clients))
+    finally:
+        if lag_monitor is not None:
+            lag_monitor.stop()
+
+
+async def stop_clients(clients):
+    await asyncio.gather(*(client.stop() for client in clients))
+
+
+def resolve_streams(options):
+    if options['channels']:
+        channels = [channel.strip() for channel in options['channels'].split(',') if channel.strip()]
+    else:
+        channels = [options['channel']]
+
+    entries = options['symbols'].split(',') if options['symbols'] else []
+    streams = parse_stream_list(entries, channels)
+
+    if options['symbols_file']:
+        for stream in load_stream_file(options['symbols_file'], channels):
+            if stream not in streams:
+                streams.append(stream)
+
+    if not streams:
+        streams = parse_stream_list([options['symbol']], channels)
+
+    return streams
+
+
 class Command(BaseCommand):
     help = 'Run the Binance WebSocket client to collect trade data'
 
@@ -187,31 +855,398 @@ class Command(BaseCommand):
             default=None,
             help='Number of messages to batch before saving to the database'
         )
+        parser.add_argument(
+            '--symbols',
+            default=None,
+            help='Comma separated symbols or symbol@channel streams (e.g., btcusdt,ethusdt@aggTrade)'
+        )
+        parser.add_argument(
+            '--channels',
+            default=None,
+            help='Comma separated channels applied to bare symbols in --symbols/--symbols-file (defaults to --channel)'
+        )
+        parser.add_argument(
+            '--symbols-file',
+            default=None,
+            help='File with one symbol or symbol@channel stream per line'
+        )
+        parser.add_argument(
+            '--max-streams-per-connection',
+            type=int,
+            default=MAX_STREAMS_PER_CONNECTION,
+            help='Maximum number of streams subscribed on a single combined stream connection'
+        )
+        parser.add_argument(
+            '--flush-interval',
+            type=float,
+            default=5.0,
+            help='Maximum number of seconds a batched trade waits in memory before being flushed'
+        )
+        parser.add_argument(
+            '--copy-threshold',
+            type=int,
+            default=None,
+            help='Use PostgreSQL COPY instead of a multi-row INSERT for batches of at least this size'
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=None,
+            help='Run receive, persist and broadcast as separate stages joined by queues of this size'
+        )
+        parser.add_argument(
+            '--overflow',
+            choices=OVERFLOW_POLICIES,
+            default=OVERFLOW_BLOCK,
+            help='What a stage does when the next queue is full (block, drop-oldest or spill)'
+        )
+        parser.add_argument(
+            '--spill-dir',
+            default=None,
+            help='Directory for spill files when --overflow=spill (defaults to the system temp dir)'
+        )
+        parser.add_argument(
+            '--report-interval',
+            type=float,
+            default=None,
+            help='Log per-stage queue depths every N seconds'
+        )
+        parser.add_argument(
+            '--json-backend',
+            choices=DECODER_CHOICES,
+            default='auto',
+            help='JSON decoder for incoming frames (auto picks the fastest installed backend)'
+        )
+        parser.add_argument(
+            '--fixed-point',
+            action='store_true',
+            help='Store prices and volumes as scaled 64-bit integers instead of decimals'
+        )
+        parser.add_argument(
+            '--price-scale',
+            type=int,
+            default=DEFAULT_SCALE,
+            help='Default number of decimal places kept in fixed-point prices'
+        )
+        parser.add_argument(
+            '--volume-scale',
+            type=int,
+            default=DEFAULT_SCALE,
+            help='Default number of decimal places kept in fixed-point volumes'
+        )
+        parser.add_argument(
+            '--symbol-scales',
+            default=None,
+            help='Per-symbol fixed-point scales as SYMBOL=price_scale:volume_scale (e.g., BTCUSDT=2:5,ETHUSDT=2:4)'
+        )
+        parser.add_argument(
+            '--trade-log-every',
+            type=int,
+            default=1,
+            help='Log one in every N trades (0 disables per-trade logging)'
+        )
+        parser.add_argument(
+            '--error-log-interval',
+            type=float,
+            default=0,
+            help='Log each kind of repeated error at most once every N seconds, counting the suppressed ones'
+        )
+        parser.add_argument(
+            '--stats-interval',
+            type=float,
+            default=None,
+            help='Log per-symbol msgs/s, bytes/s and parse failures every N seconds'
+        )
+        parser.add_argument(
+            '--conflate-ms',
+            type=int,
+            default=None,
+            help='Publish one conflated update per symbol every N milliseconds instead of every trade'
+        )
+        parser.add_argument(
+            '--raw-symbols',
+            default=None,
+            help='Comma separated symbols that keep trade-by-trade publishing when conflation is enabled'
+        )
+        parser.add_argument(
+            '--broadcast-groups',
+            choices=BROADCAST_MODES,
+            default=DEFAULT_BROADCAST_MODE,
+            help='Publish to the per-symbol groups (default), the all-symbols group, or both while clients migrate'
+        )
+        parser.add_argument(
+            '--candles',
+            default=None,
+            help='Comma separated candle intervals to build from trades (e.g., 1s,1m,5m,1h)'
+        )
+        parser.add_argument(
+            '--snapshots',
+            action='store_true',
+            help='Keep the last trade per symbol in the shared cache for newly connected browsers'
+        )
+        parser.add_argument(
+            '--book-depth',
+            type=int,
+            default=DEFAULT_BOOK_DEPTH,
+            help='Number of price levels per side published for depth streams'
+        )
+        parser.add_argument(
+            '--book-publish-ms',
+            type=int,
+            default=250,
+            help='Publish changed order books at most once every N milliseconds'
+        )
+        parser.add_argument(
+            '--depth-snapshot-limit',
+            type=int,
+            default=DEFAULT_SNAPSHOT_LIMIT,
+            help='Number of levels requested in REST depth snapshots'
+        )
+        parser.add_argument(
+            '--rotate-after',
+            type=float,
+            default=DEFAULT_ROTATE_AFTER,
+            help='Rotate onto a fresh connection after N seconds, overlapping old and new (0 disables)'
+        )
+        parser.add_argument(
+            '--rotation-overlap',
+            type=float,
+            default=DEFAULT_ROTATION_OVERLAP,
+            help='Seconds both connections deliver frames during a rotation'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=None,
+            help='Rotate onto a fresh connection when no frame arrives for N seconds'
+        )
+        parser.add_argument(
+            '--capture-dir',
+            default=None,
+            help='Archive every raw frame with its receive time to compressed segment files in this directory'
+        )
+        parser.add_argument(
+            '--capture-segment-mb',
+            type=float,
+            default=DEFAULT_SEGMENT_BYTES / (1024 * 1024),
+            help='Start a new capture segment once the current one reaches N megabytes'
+        )
+        parser.add_argument(
+            '--capture-segment-minutes',
+            type=float,
+            default=DEFAULT_SEGMENT_SECONDS / 60,
+            help='Start a new capture segment after N minutes'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Split the streams across N worker processes, restarted by a supervisor if they die or stall'
+        )
+        parser.add_argument(
+            '--worker-stall-timeout',
+            type=float,
+            default=DEFAULT_STALL_TIMEOUT,
+            help='Restart a worker that has not sent a heartbeat for N seconds'
+        )
+        parser.add_argument(
+            '--loop',
+            choices=LOOP_CHOICES,
+            default=LOOP_AUTO,
+            help='Event loop implementation (auto picks uvloop when installed)'
+        )
+        parser.add_argument(
+            '--executor-workers',
+            type=int,
+            default=None,
+            help='Threads in the default executor used for database writes (defaults to asyncio\'s)'
+        )
+        parser.add_argument(
+            '--loop-lag-warn-ms',
+            type=float,
+            default=DEFAULT_LAG_WARNING * 1000,
+            help='Warn when the event loop runs this many milliseconds behind schedule (0 disables the warning)'
+        )
+        parser.add_argument(
+            '--trace',
+            action='store_true',
+            help='Include receive, parse and publish timestamps in trade messages sent to browsers'
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            default=None,
+            help='Serve Prometheus metrics on this port (with --workers, merged from every worker)'
+        )
+        parser.add_argument(
+            '--metrics-address',
+            default=DEFAULT_METRICS_ADDRESS,
+            help='Address the metrics endpoint listens on (default: 127.0.0.1; 0.0.0.0 for all interfaces)'
+        )
 
+    def build_clients(self, shards, options, writer, fixed_point, stats_reporter=None, capture=None):
+        snapshots = SnapshotWriter() if options['snapshots'] else None
+        fetcher = RestSnapshotFetcher(limit=options['depth_snapshot_limit'])
+        
+        return [
+            BinanceWebSocketClient(
+                symbol=options['symbol'],
+                channel=options['channel'],
+                batch_size=options['batch_size'],
+                streams=shard,
+                flush_interval=options['flush_interval'],
+                writer=writer,
+                queue_size=options['queue_size'],
+                overflow=options['overflow'],
+                spill_dir=options['spill_dir'],
+                report_interval=options['report_interval'],
+                json_backend=options['json_backend'],
+                fixed_point=fixed_point,
+                trade_log_every=options['trade_log_every'],
+                error_log_interval=options['error_log_interval'],
+                stats_interval=options['stats_interval'],
+                conflate_window=options['conflate_ms'] / 1000.0 if options['conflate_ms'] else None,
+                raw_symbols=options['raw_symbols'].split(',') if options['raw_symbols'] else None,
+                broadcast_mode=options['broadcast_groups'],
+                candle_intervals=parse_intervals(options['candles']) if options['candles'] else None,
+                snapshots=snapshots,
+                book_depth=options['book_depth'],
+                book_publish_interval=options['book_publish_ms'] / 1000.0,
+                snapshot_fetcher=fetcher,
+                stats_reporter=stats_reporter,
+                rotate_after=options['rotate_after'],
+                rotation_overlap=options['rotation_overlap'],
+                stale_after=options['stale_after'],
+                capture=capture,
+                trace=options['trace'],
+            )
+            for shard in shards
+        ]
+
+    def check_snapshot_cache(self, options):
+        if options['snapshots'] and is_process_local(snapshot_cache()):
+            raise CommandError(
+                '--snapshots needs a cache shared with the ASGI processes (e.g. Redis); '
+                'the configured cache only lives in this process'
+            )
+    
     def handle(self, *args, **options):
-        symbol = options['symbol']
-        channel = options['channel']
+        streams = resolve_streams(options)
+        self.check_snapshot_cache(options)
+        
+        if options['workers'] > 1:
+            self.run_workers(streams, options)
+        else:
+            self.run_streams(streams, options)
+    
+    def run_workers(self, streams, options):
+        assignments = assign_streams(streams, options['workers'])
+        
+        try:
+            if options['fixed_point']:
+                FixedPointScales.parse(options['symbol_scales'])
+            if options['candles']:
+                parse_intervals(options['candles'])
+            loop_factory(options['loop'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Starting {len(assignments)} worker processes for {len(streams)} streams'
+        ))
+        
+        worker_options = {
+            key: value for key, value in options.items()
+            if value is None or isinstance(value, (str, int, float, bool))
+        }
+        # Workers send their metrics to the supervisor, which serves them all.
+        worker_options['metrics_port'] = None
+        supervisor = Supervisor(
+            assignments,
+            worker_options,
+            stall_timeout=options['worker_stall_timeout'],
+            stats_interval=options['stats_interval'],
+        )
+        
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'], supervisor.collect_metrics, options['metrics_address'])
+        
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrupted by user, stopping workers...'))
+        
+        self.stdout.write(self.style.SUCCESS('Binance WebSocket client stopped'))
+    
+    def run_streams(self, streams, options, stats_reporter=None):
         batch_size = options['batch_size']
+        shards = shard_streams(streams, options['max_streams_per_connection'])
+        
+        try:
+            loop_factory(options['loop'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        if len(streams) == 1:
+            self.stdout.write(self.style.SUCCESS(f'Starting Binance WebSocket client for {streams[0]}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Starting Binance WebSocket client for {len(streams)} streams over {len(shards)} connection(s)'
+            ))
+        
+        fixed_point = None
         
-        self.stdout.write(self.style.SUCCESS(f'Starting Binance WebSocket client for {symbol}@{channel}'))
+        if options['fixed_point']:
+            try:
+                fixed_point = FixedPointScales.parse(
+                    options['symbol_scales'],
+                    price_scale=options['price_scale'],
+                    volume_scale=options['volume_scale'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write('Storing prices and volumes as fixed-point integers')
+        
+        writer = None
         
         if batch_size:
             self.stdout.write(f'Batching enabled with batch size: {batch_size}')
+            writer = BatchWriter(copy_threshold=options['copy_threshold'], scales=fixed_point)
         else:
             self.stdout.write('Processing trades immediately (no batching)')
         
-        client = BinanceWebSocketClient(
-            symbol=symbol,
-            channel=channel,
-            batch_size=batch_size
-        )
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'], address=options['metrics_address'])
+        
+        capture = None
+        
+        if options['capture_dir']:
+            self.stdout.write(f"Capturing raw frames to {options['capture_dir']}")
+            capture = CaptureWriter(
+                options['capture_dir'],
+                segment_bytes=int(options['capture_segment_mb'] * 1024 * 1024),
+                segment_seconds=options['capture_segment_minutes'] * 60,
+            )
+        
+        try:
+            clients = self.build_clients(shards, options, writer, fixed_point, stats_reporter, capture)
+        except ValueError as e:
+            if writer:
+                writer.close()
+            raise CommandError(str(e))
         
         try:
-            asyncio.run(client.listen())
+            lag_monitor = LoopLagMonitor(warn_after=options['loop_lag_warn_ms'] / 1000.0)
+            run_loop(run_clients(clients, lag_monitor), options['loop'], options['executor_workers'])
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING('Interrupted by user, shutting down...'))
-            asyncio.run(client.stop())
+            run_loop(stop_clients(clients), options['loop'], options['executor_workers'])
         except Exception as e:
             self.stderr.write(self.style.ERROR(f'Error: {str(e)}'))
+        finally:
+            if writer:
+                writer.close()
+            if capture:
+                capture.close()
         
         self.stdout.write(self.style.SUCCESS('Binance WebSocket client stopped')) 
\ No newline at end of file
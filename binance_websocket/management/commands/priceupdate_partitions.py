@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from binance_websocket.partitions import (
+    INTERVAL_DAY,
+    INTERVALS,
+    create_hot_indexes,
+    create_partition,
+    drop_partition,
+    index_exists,
+    is_partitioned,
+    list_partitions,
+    make_cold,
+    plan_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Pre-create upcoming PriceUpdate partitions, re-index cold ones and drop expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            choices=INTERVALS,
+            default=INTERVAL_DAY,
+            help='Length of newly created partitions'
+        )
+        parser.add_argument(
+            '--premake',
+            type=int,
+            default=7,
+            help='Number of upcoming periods to create partitions for'
+        )
+        parser.add_argument(
+            '--hot-days',
+            type=int,
+            default=2,
+            help='Days after a partition ends before its B-tree index is swapped for a BRIN index'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Detach and drop partitions that ended more than N days ago (optional)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print what would be done without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('PriceUpdate partitioning requires PostgreSQL')
+
+        dry_run = options['dry_run']
+        now = timezone.now()
+        quote_name = connection.ops.quote_name
+
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError('PriceUpdate is not partitioned yet; run migrate first')
+
+            partitions = list_partitions(cursor)
+
+            for start, end in plan_partitions(partitions, now, options['interval'], options['premake']):
+                self.stdout.write(f'Creating partition for {start:%Y-%m-%d} to {end:%Y-%m-%d}')
+                if not dry_run:
+                    with transaction.atomic():
+                        create_partition(cursor, quote_name, start, end)
+
+            if options['retention_days'] is not None:
+                expire_before = now - timedelta(days=options['retention_days'])
+                expired = [partition for partition in partitions if partition.end <= expire_before]
+
+                for partition in expired:
+                    self.stdout.write(f'Dropping {partition.name}')
+                    if not dry_run:
+                        with transaction.atomic():
+                            drop_partition(cursor, quote_name, partition)
+
+                partitions = [partition for partition in partitions if partition not in expired]
+
+            cold_before = now - timedelta(days=options['hot_days'])
+
+            for partition in partitions:
+                if partition.end > cold_before:
+                    if not dry_run:
+                        create_hot_indexes(cursor, quote_name, partition.name)
+                elif not index_exists(cursor, partition.name + '_time_brin'):
+                    self.stdout.write(f'Switching {partition.name} to a BRIN index')
+                    if not dry_run:
+                        with transaction.atomic():
+                            make_cold(cursor, quote_name, partition)
+
+        self.stdout.write(self.style.SUCCESS('PriceUpdate partitions are up to date'))
@@ -0,0 +1,181 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from binance_websocket.benchmarks import DEFAULT_SYMBOLS
+from binance_websocket.candles import parse_intervals
+from binance_websocket.decoding import DECODER_CHOICES
+from binance_websocket.eventloop import LOOP_AUTO, LOOP_CHOICES, loop_factory
+from binance_websocket.eventloop import run as run_loop
+from binance_websocket.groups import BROADCAST_MODES, DEFAULT_BROADCAST_MODE
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.queries import parse_time
+from binance_websocket.replay import Replayer, iter_frames, synthetic_frames
+from binance_websocket.streams import parse_stream_list
+from binance_websocket.writers import BatchWriter
+
+
+def epoch_ns(moment):
+    return None if moment is None else int(moment.timestamp() * 1000) * 1000000
+
+
+class Command(BaseCommand):
+    help = 'Replay captured or generated frames through the client into the database and channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help='Capture directories, capture segments or NDJSON files of raw frames'
+        )
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=1.0,
+            help='Replay speed: 1 keeps the recorded timing, N is N times faster, 0 is as fast as possible'
+        )
+        parser.add_argument(
+            '--start',
+            default=None,
+            help='Only replay frames from this time (ISO 8601 or epoch milliseconds)'
+        )
+        parser.add_argument(
+            '--end',
+            default=None,
+            help='Only replay frames before this time (ISO 8601 or epoch milliseconds)'
+        )
+        parser.add_argument(
+            '--symbols',
+            default=None,
+            help='Comma separated symbols to replay (defaults to all)'
+        )
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=None,
+            help='Replay N generated trade frames instead of reading files'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for generated frames'
+        )
+        parser.add_argument(
+            '--streams',
+            default=None,
+            help='Comma separated streams the frames came from; needed to replay @depth frames into order books'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Write trades in batches of this size'
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=None,
+            help='Run the staged receive/persist/broadcast pipeline with queues of this size'
+        )
+        parser.add_argument(
+            '--json-backend',
+            choices=DECODER_CHOICES,
+            default='auto',
+            help='JSON decoder for incoming frames'
+        )
+        parser.add_argument(
+            '--loop',
+            choices=LOOP_CHOICES,
+            default=LOOP_AUTO,
+            help='Event loop implementation (auto picks uvloop when installed)'
+        )
+        parser.add_argument(
+            '--conflate-ms',
+            type=int,
+            default=None,
+            help='Conflate broadcasts per symbol over this window'
+        )
+        parser.add_argument(
+            '--broadcast-groups',
+            choices=BROADCAST_MODES,
+            default=DEFAULT_BROADCAST_MODE,
+            help='Publish to the per-symbol groups (default), the all-symbols group, or both while clients migrate'
+        )
+        parser.add_argument(
+            '--candles',
+            default=None,
+            help='Build candles for these intervals'
+        )
+
+    def handle(self, *args, **options):
+        if not options['paths'] and not options['synthetic']:
+            raise CommandError('Give capture paths to replay or --synthetic N')
+
+        if options['speed'] < 0:
+            raise CommandError('--speed must not be negative')
+
+        symbols = None
+
+        if options['symbols']:
+            symbols = [symbol.strip().upper() for symbol in options['symbols'].split(',') if symbol.strip()]
+
+        try:
+            start_ns = epoch_ns(parse_time(options['start'], 'start'))
+            end_ns = epoch_ns(parse_time(options['end'], 'end'))
+            candle_intervals = parse_intervals(options['candles']) if options['candles'] else None
+            loop_factory(options['loop'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['synthetic']:
+            frames = synthetic_frames(options['synthetic'], symbols or DEFAULT_SYMBOLS, options['seed'])
+            source = f"{options['synthetic']} generated frames"
+        else:
+            frames = iter_frames(options['paths'], start_ns, end_ns, symbols)
+            source = ', '.join(options['paths'])
+
+        streams = None
+
+        if options['streams']:
+            streams = parse_stream_list(options['streams'].split(','), ['trade'])
+
+        batch_size = options['batch_size']
+        writer = BatchWriter() if batch_size else None
+        client = BinanceWebSocketClient(
+            batch_size=batch_size,
+            streams=streams,
+            writer=writer,
+            queue_size=options['queue_size'],
+            json_backend=options['json_backend'],
+            conflate_window=options['conflate_ms'] / 1000.0 if options['conflate_ms'] else None,
+            broadcast_mode=options['broadcast_groups'],
+            candle_intervals=candle_intervals,
+            rotate_after=None,
+        )
+        replayer = Replayer(client, options['speed'])
+
+        speed = 'as fast as possible' if not options['speed'] else f"at {options['speed']:g}x"
+        self.stdout.write(self.style.SUCCESS(f'Replaying {source} {speed}'))
+
+        # Logging every trade would dominate a fast replay.
+        client_logger = logging.getLogger('binance_websocket_client')
+        level = client_logger.level
+
+        if not options['speed']:
+            client_logger.setLevel(logging.WARNING)
+
+        try:
+            run_loop(replayer.run(frames), options['loop'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrupted by user'))
+        finally:
+            client_logger.setLevel(level)
+            if writer:
+                writer.close()
+
+        summary = replayer.summary()
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {summary['frames']} frames in {summary['seconds']:.2f}s "
+            f"({summary['frames_per_second']:,.0f} frames/s, max lag {summary['max_lag_seconds'] * 1000:.1f}ms)"
+        ))
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from binance_websocket.candles import interval_ms
+from binance_websocket.rollups import ROLLUP_INTERVALS, Rollup
+
+
+class Command(BaseCommand):
+    help = 'Incrementally roll raw trades up into candle summary rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervals',
+            default=','.join(ROLLUP_INTERVALS),
+            help='Comma separated rollup intervals, shortest first; each is built from the previous one'
+        )
+        parser.add_argument(
+            '--symbols',
+            default=None,
+            help='Comma separated symbols to roll up (defaults to every symbol with new rows)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Maximum raw rows read per symbol per transaction'
+        )
+        parser.add_argument(
+            '--settle-seconds',
+            type=float,
+            default=5.0,
+            help='Leave rows ingested in the last N seconds for the next run'
+        )
+        parser.add_argument(
+            '--since',
+            default=None,
+            help='Ingest time new watermarks start from (ISO 8601, defaults to the beginning)'
+        )
+        parser.add_argument(
+            '--loop',
+            type=float,
+            default=None,
+            help='Keep running, starting a new pass every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        intervals = [interval.strip() for interval in options['intervals'].split(',') if interval.strip()]
+
+        try:
+            lengths = [interval_ms(interval) for interval in intervals]
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not intervals or any(longer % shorter for shorter, longer in zip(lengths, lengths[1:])):
+            raise CommandError('Each rollup interval must be a multiple of the one before it')
+
+        since = None
+
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None or since.tzinfo is None:
+                raise CommandError('--since must be an ISO 8601 time with a UTC offset')
+
+        rollup = Rollup(
+            intervals=intervals,
+            chunk_size=options['chunk_size'],
+            settle=timedelta(seconds=options['settle_seconds']),
+            symbols=options['symbols'].split(',') if options['symbols'] else None,
+            since=since,
+        )
+
+        if options['loop'] is None:
+            count = rollup.run()
+            self.stdout.write(self.style.SUCCESS(f'Rolled up {count} rows'))
+            return
+
+        try:
+            while True:
+                started = time.monotonic()
+                rollup.run()
+                time.sleep(max(0.0, options['loop'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrupted by user, stopping rollups'))
@@ -0,0 +1,332 @@
+import bisect
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('binance_websocket_client')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+SIZE_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CounterValue:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def sample(self):
+        return self.value
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket plus +Inf; kept per bucket, not cumulative,
+        # so an observation touches a single slot.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def sample(self):
+        return list(self.counts), self.sum
+
+
+class Metric:
+    """
+    A metric family. Recording is plain attribute arithmetic with no locks:
+    the ingest client and consumers record from one event loop thread, and a
+    scrape that races a recording sees a value at most one update old.
+
+    Labelled metrics hand out one value object per label combination;
+    callers on a hot path look it up once with ``labels()`` and keep it.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.default = None if self.labelnames else self.labels()
+
+        if registry is not None:
+            registry.register(self)
+
+    def new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *labelvalues):
+        value = self.values.get(labelvalues)
+
+        if value is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames)}")
+            value = self.values[labelvalues] = self.new_value()
+
+        return value
+
+    def collect(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'help': self.documentation,
+            'labelnames': self.labelnames,
+            'samples': {labelvalues: value.sample() for labelvalues, value in list(self.values.items())},
+        }
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def new_value(self):
+        return CounterValue()
+
+    def inc(self, amount=1):
+        self.default.value += amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def new_value(self):
+        return GaugeValue()
+
+    def inc(self, amount=1):
+        self.default.value += amount
+
+    def dec(self, amount=1):
+        self.default.value -= amount
+
+    def set(self, value):
+        self.default.value = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def new_value(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.default.observe(value)
+
+    def collect(self):
+        family = super().collect()
+        family['buckets'] = self.buckets
+        return family
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def collect(self):
+        """
+        Return every family as plain, picklable data, so worker processes
+        can ship their metrics to the supervisor.
+        """
+        return [metric.collect() for metric in list(self.metrics.values())]
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+
+    if not pairs:
+        return ''
+
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def add_label(families, name, value):
+    """
+    Return ``families`` with a constant label added to every sample, e.g.
+    the worker a set of metrics came from.
+    """
+    return [
+        dict(
+            family,
+            labelnames=(name,) + tuple(family['labelnames']),
+            samples={(value,) + tuple(labelvalues): sample for labelvalues, sample in family['samples'].items()},
+        )
+        for family in families
+    ]
+
+
+def merge_families(*collections):
+    """
+    Combine collected metrics from several sources; samples of families
+    with the same name end up under one HELP/TYPE header.
+    """
+    merged = {}
+
+    for families in collections:
+        for family in families:
+            existing = merged.get(family['name'])
+
+            if existing is None:
+                merged[family['name']] = dict(family, samples=dict(family['samples']))
+            else:
+                existing['samples'].update(family['samples'])
+
+    return list(merged.values())
+
+
+def render(families):
+    """
+    Format collected metrics in the Prometheus text exposition format.
+    """
+    lines = []
+
+    for family in families:
+        name = family['name']
+        labelnames = family['labelnames']
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+
+        for labelvalues, sample in sorted(family['samples'].items()):
+            if family['kind'] != 'histogram':
+                lines.append(f"{name}{format_labels(labelnames, labelvalues)} {format_value(sample)}")
+                continue
+
+            counts, total = sample
+            cumulative = 0
+
+            for bound, count in zip(tuple(family['buckets']) + (math.inf,), counts):
+                cumulative += count
+                le = (('le', format_value(float(bound))),)
+                lines.append(f"{name}_bucket{format_labels(labelnames, labelvalues, le)} {cumulative}")
+
+            lines.append(f"{name}_sum{format_labels(labelnames, labelvalues)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(labelnames, labelvalues)} {cumulative}")
+
+    return '\n'.join(lines) + '\n'
+
+
+# Metrics are not public: only local scrapers unless another address is
+# asked for.
+DEFAULT_METRICS_ADDRESS = '127.0.0.1'
+
+
+def start_metrics_server(port, collect=None, address=DEFAULT_METRICS_ADDRESS):
+    """
+    Serve ``/metrics`` from a daemon thread, for processes that are not
+    behind the Django app. ``collect`` returns the families to expose and
+    defaults to the process registry.
+    """
+    collect = collect or REGISTRY.collect
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+
+            body = render(collect()).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='binance-metrics', daemon=True).start()
+    logger.info(f"Serving metrics on http://{address or '0.0.0.0'}:{server.server_port}/metrics")
+    return server
+
+
+REGISTRY = Registry()
+
+# Ingest
+FRAMES_RECEIVED = Counter(
+    'binance_frames_received_total', 'Frames received from Binance', registry=REGISTRY)
+FRAME_BYTES_RECEIVED = Counter(
+    'binance_frame_bytes_received_total', 'Bytes of frames received from Binance', registry=REGISTRY)
+TRADES_PARSED = Counter(
+    'binance_trades_parsed_total', 'Trades parsed, per symbol', ['symbol'], registry=REGISTRY)
+PARSE_ERRORS = Counter(
+    'binance_parse_errors_total', 'Frames that could not be decoded into a trade', registry=REGISTRY)
+DATABASE_ERRORS = Counter(
+    'binance_database_errors_total', 'Failed database writes', ['operation'], registry=REGISTRY)
+BATCH_FLUSH_SIZE = Histogram(
+    'binance_batch_flush_size', 'Trades per batch flush', buckets=SIZE_BUCKETS, registry=REGISTRY)
+BATCH_FLUSH_SECONDS = Histogram(
+    'binance_batch_flush_seconds', 'Time to write a batch of trades', buckets=DURATION_BUCKETS, registry=REGISTRY)
+GROUP_SEND_SECONDS = Histogram(
+    'binance_group_send_seconds', 'Time to hand a message to the channel layer', ['kind'], registry=REGISTRY)
+CHANNEL_LAYER_ERRORS = Counter(
+    'binance_channel_layer_errors_total', 'Failed channel layer sends', registry=REGISTRY)
+CONNECTS = Counter(
+    'binance_connects_total', 'Successful connections to Binance', registry=REGISTRY)
+RECONNECTS = Counter(
+    'binance_reconnects_total', 'Reconnection attempts after a connection was lost', registry=REGISTRY)
+STAGE_LATENCY_SECONDS = Histogram(
+    'binance_stage_latency_seconds', 'Latency of each stage between Binance and the browser', ['stage'],
+    buckets=STAGE_BUCKETS, registry=REGISTRY)
+LOOP_LAG_SECONDS = Histogram(
+    'binance_loop_lag_seconds', 'How late the event loop ran a scheduled wake-up', buckets=STAGE_BUCKETS,
+    registry=REGISTRY)
+WORKER_RESTARTS = Counter(
+    'binance_worker_restarts_total', 'Worker processes restarted by the supervisor', registry=REGISTRY)
+
+# Fan-out
+CONSUMER_CONNECTS = Counter(
+    'binance_consumer_connects_total', 'WebSocket consumers connected', registry=REGISTRY)
+CONSUMERS_ACTIVE = Gauge(
+    'binance_consumers_active', 'WebSocket consumers currently connected', registry=REGISTRY)
+CONSUMER_MESSAGES_SENT = Counter(
+    'binance_consumer_messages_sent_total', 'Messages sent to WebSocket consumers, per wire format', ['format'],
+    registry=REGISTRY)
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='priceupdate',
+            name='event_time',
+            field=models.DateTimeField(blank=True, help_text='Time when the exchange emitted the trade event', null=True, verbose_name='Event Time'),
+        ),
+        migrations.AddField(
+            model_name='priceupdate',
+            name='is_market_maker',
+            field=models.BooleanField(blank=True, help_text='Whether the buyer was the market maker', null=True, verbose_name='Buyer Is Market Maker'),
+        ),
+        migrations.AddField(
+            model_name='priceupdate',
+            name='trade_id',
+            field=models.BigIntegerField(blank=True, help_text='Exchange assigned trade identifier', null=True, verbose_name='Trade ID'),
+        ),
+        migrations.AddField(
+            model_name='priceupdate',
+            name='trade_time',
+            field=models.DateTimeField(blank=True, help_text='Time when the trade was executed on the exchange', null=True, verbose_name='Trade Time'),
+        ),
+        migrations.AddIndex(
+            model_name='priceupdate',
+            index=models.Index(fields=['ticker_symbol', 'trade_time'], name='binance_web_ticker__b1e2c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceupdate',
+            index=models.Index(fields=['trade_time'], name='binance_web_trade_t_b10a24_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceupdate',
+            constraint=models.UniqueConstraint(fields=('exchange', 'ticker_symbol', 'trade_id'), name='unique_exchange_symbol_trade'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0002_price_update_trade_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='priceupdate',
+            name='price_units',
+            field=models.BigIntegerField(blank=True, help_text='Price as an integer number of units at the symbol price scale', null=True, verbose_name='Price Units'),
+        ),
+        migrations.AddField(
+            model_name='priceupdate',
+            name='volume_units',
+            field=models.BigIntegerField(blank=True, help_text='Volume as an integer number of units at the symbol volume scale', null=True, verbose_name='Volume Units'),
+        ),
+        migrations.AlterField(
+            model_name='priceupdate',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=10, help_text='Current price of the trading pair (empty when stored as fixed-point units)', max_digits=30, null=True, verbose_name='Price'),
+        ),
+        migrations.CreateModel(
+            name='SymbolScale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker_symbol', models.CharField(help_text='Trading pair (e.g., BTCUSDT)', max_length=20, verbose_name='Ticker Symbol')),
+                ('exchange', models.CharField(default='Binance', help_text='Source exchange for this symbol', max_length=50, verbose_name='Exchange')),
+                ('price_scale', models.PositiveSmallIntegerField(default=8, help_text='Number of decimal places encoded in price units', verbose_name='Price Scale')),
+                ('volume_scale', models.PositiveSmallIntegerField(default=8, help_text='Number of decimal places encoded in volume units', verbose_name='Volume Scale')),
+            ],
+            options={
+                'verbose_name': 'Symbol Scale',
+                'verbose_name_plural': 'Symbol Scales',
+                'constraints': [models.UniqueConstraint(fields=('exchange', 'ticker_symbol'), name='unique_exchange_symbol_scale')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0003_fixed_point_units'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Candle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker_symbol', models.CharField(help_text='Trading pair (e.g., BTCUSDT)', max_length=20, verbose_name='Ticker Symbol')),
+                ('exchange', models.CharField(default='Binance', help_text='Source exchange for this candle', max_length=50, verbose_name='Exchange')),
+                ('interval', models.CharField(help_text='Bar length (e.g., 1s, 1m, 5m, 1h)', max_length=8, verbose_name='Interval')),
+                ('open_time', models.DateTimeField(help_text='Start of the bar', verbose_name='Open Time')),
+                ('open', models.DecimalField(decimal_places=10, max_digits=30, verbose_name='Open')),
+                ('high', models.DecimalField(decimal_places=10, max_digits=30, verbose_name='High')),
+                ('low', models.DecimalField(decimal_places=10, max_digits=30, verbose_name='Low')),
+                ('close', models.DecimalField(decimal_places=10, max_digits=30, verbose_name='Close')),
+                ('volume', models.DecimalField(decimal_places=10, help_text='Traded volume in the base asset during the bar', max_digits=30, verbose_name='Volume')),
+                ('trade_count', models.PositiveIntegerField(default=0, help_text='Number of trades in the bar (zero for bars carried over a gap)', verbose_name='Trade Count')),
+            ],
+            options={
+                'verbose_name': 'Candle',
+                'verbose_name_plural': 'Candles',
+                'ordering': ['-open_time'],
+                'constraints': [models.UniqueConstraint(fields=('exchange', 'ticker_symbol', 'interval', 'open_time'), name='unique_exchange_symbol_interval_candle')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:56
+
+from django.db import migrations, models
+
+PRICE_UPDATE_INDEXES = {
+    'binance_web_ticker__7ec17d_idx': ('ticker_symbol', 'timestamp'),
+    'binance_web_ticker__b1e2c2_idx': ('ticker_symbol', 'trade_time'),
+    'binance_web_trade_t_b10a24_idx': ('trade_time',),
+}
+
+
+def drop_indexes_on_postgresql(apps, schema_editor):
+    """
+    On PostgreSQL the table is about to be partitioned, and each partition
+    gets its own indexes. Other backends keep these indexes.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name in PRICE_UPDATE_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+
+
+def create_indexes_on_postgresql(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    quote_name = schema_editor.quote_name
+
+    for name, columns in PRICE_UPDATE_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_name(name)} ON {quote_name('binance_websocket_priceupdate')} "
+            f"({', '.join(quote_name(column) for column in columns)})"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0004_candles'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='priceupdate',
+            name='unique_exchange_symbol_trade',
+        ),
+        migrations.AlterField(
+            model_name='priceupdate',
+            name='ticker_symbol',
+            field=models.CharField(help_text='Trading pair (e.g., BTC/USDT)', max_length=20, verbose_name='Ticker Symbol'),
+        ),
+        migrations.AlterField(
+            model_name='priceupdate',
+            name='timestamp',
+            field=models.DateTimeField(auto_now_add=True, help_text='Time when the price update was recorded', verbose_name='Timestamp'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceupdate',
+            constraint=models.UniqueConstraint(fields=('exchange', 'ticker_symbol', 'trade_id', 'trade_time'), name='unique_exchange_symbol_trade_time'),
+        ),
+        # Last, so table rebuilds on SQLite above still carry the indexes.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='priceupdate',
+                    name='binance_web_ticker__7ec17d_idx',
+                ),
+                migrations.RemoveIndex(
+                    model_name='priceupdate',
+                    name='binance_web_ticker__b1e2c2_idx',
+                ),
+                migrations.RemoveIndex(
+                    model_name='priceupdate',
+                    name='binance_web_trade_t_b10a24_idx',
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_indexes_on_postgresql, create_indexes_on_postgresql),
+            ],
+        ),
+    ]
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db import migrations
+
+from binance_websocket.partitions import create_hot_indexes, create_partition
+
+PARENT_TABLE = 'binance_websocket_priceupdate'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+SEQUENCE = f'{PARENT_TABLE}_id_seq'
+UNIQUE_CONSTRAINT = 'unique_exchange_symbol_trade_time'
+INITIAL_PARTITION_DAYS = 7
+
+
+def partition_price_updates(apps, schema_editor):
+    """
+    Turn the price update table into a table range partitioned by day on
+    ``trade_time``. The existing table is attached as the default partition,
+    so no rows are copied; a check constraint keeps it from overlapping the
+    new daily partitions, which lets PostgreSQL create later partitions
+    without scanning it. The default partition and the new ones get the
+    same B-tree indexes as partitions made later. Further partitions, cold-partition indexes and
+    retention are handled by the ``priceupdate_partitions`` command.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    quote_name = schema_editor.quote_name
+    parent = quote_name(PARENT_TABLE)
+    default = quote_name(DEFAULT_PARTITION)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(max(id), 0) + 1, max(trade_time) FROM {parent}")
+        next_id, latest_trade_time = cursor.fetchone()
+
+        now = datetime.now(timezone.utc)
+        latest = max(latest_trade_time or now, now).astimezone(timezone.utc)
+        cutoff = latest.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+        cursor.execute(f"ALTER TABLE {parent} RENAME TO {default}")
+        cursor.execute(
+            f"ALTER TABLE {default} RENAME CONSTRAINT {quote_name(UNIQUE_CONSTRAINT)} "
+            f"TO {quote_name(DEFAULT_PARTITION + '_unique_trade')}"
+        )
+        cursor.execute(f"ALTER TABLE {default} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {default} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {quote_name(SEQUENCE)}")
+        cursor.execute(f"CREATE SEQUENCE {quote_name(SEQUENCE)} START WITH {int(next_id)}")
+
+        cursor.execute(f"CREATE TABLE {parent} (LIKE {default} INCLUDING DEFAULTS) PARTITION BY RANGE (trade_time)")
+        cursor.execute(f"ALTER TABLE {parent} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f"ALTER SEQUENCE {quote_name(SEQUENCE)} OWNED BY {parent}.id")
+        cursor.execute(
+            f"ALTER TABLE {parent} ADD CONSTRAINT {quote_name(UNIQUE_CONSTRAINT)} "
+            f"UNIQUE (exchange, ticker_symbol, trade_id, trade_time)"
+        )
+
+        cursor.execute(
+            f"ALTER TABLE {default} ADD CONSTRAINT {quote_name(DEFAULT_PARTITION + '_before_partitions')} "
+            f"CHECK (trade_time IS NULL OR trade_time < %s)",
+            [cutoff],
+        )
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT")
+        cursor.execute(
+            f"CREATE INDEX {quote_name(DEFAULT_PARTITION + '_time_brin')} ON {default} USING brin (trade_time)"
+        )
+        # Rows from before trade_time was recorded only have the ingest
+        # timestamp, which the BRIN index does not cover.
+        create_hot_indexes(cursor, quote_name, DEFAULT_PARTITION)
+
+        for day in range(INITIAL_PARTITION_DAYS):
+            start = cutoff + timedelta(days=day)
+            create_partition(cursor, quote_name, start, start + timedelta(days=1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0005_price_update_partition_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_price_updates, elidable=False),
+    ]
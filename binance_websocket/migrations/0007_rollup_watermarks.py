@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0006_partition_price_updates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker_symbol', models.CharField(help_text='Trading pair (e.g., BTCUSDT)', max_length=20, verbose_name='Ticker Symbol')),
+                ('exchange', models.CharField(default='Binance', help_text='Source exchange for this symbol', max_length=50, verbose_name='Exchange')),
+                ('timestamp', models.DateTimeField(help_text='Ingest time of the last price update rolled up', verbose_name='Timestamp')),
+                ('last_id', models.BigIntegerField(default=0, help_text='ID of the last price update rolled up at that timestamp', verbose_name='Last ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Time of the last rollup run that advanced this watermark', verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+                'verbose_name_plural': 'Rollup Watermarks',
+                'constraints': [models.UniqueConstraint(fields=('exchange', 'ticker_symbol'), name='unique_exchange_symbol_watermark')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binance_websocket', '0007_rollup_watermarks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candle',
+            name='is_partial',
+            field=models.BooleanField(default=False, help_text='Built from only part of the trades in the bar, e.g. the first bar after the client started', verbose_name='Partial'),
+        ),
+    ]
@@ -1,26 +1,28 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from binance_websocket.fixedpoint import DEFAULT_SCALE, to_decimal
+
 class PriceUpdate(models.Model):
     ticker_symbol = models.CharField(
         _('Ticker Symbol'),
         max_length=20,
-        help_text=_('Trading pair (e.g., BTC/USDT)'),
-        db_index=True
+        help_text=_('Trading pair (e.g., BTC/USDT)')
     )
     
     price = models.DecimalField(
         _('Price'),
         max_digits=30,
         decimal_places=10,
-        help_text=_('Current price of the trading pair')
+        null=True,
+        blank=True,
+        help_text=_('Current price of the trading pair (empty when stored as fixed-point units)')
     )
     
     timestamp = models.DateTimeField(
         _('Timestamp'),
         auto_now_add=True,
-        help_text=_('Time when the price update was recorded'),
-        db_index=True
+        help_text=_('Time when the price update was recorded')
     )
     
     volume = models.DecimalField(
@@ -57,13 +59,238 @@ class PriceUpdate(models.Model):
         help_text=_('Source exchange for this price data')
     )
     
+    trade_id = models.BigIntegerField(
+        _('Trade ID'),
+        null=True,
+        blank=True,
+        help_text=_('Exchange assigned trade identifier')
+    )
+    
+    trade_time = models.DateTimeField(
+        _('Trade Time'),
+        null=True,
+        blank=True,
+        help_text=_('Time when the trade was executed on the exchange')
+    )
+    
+    event_time = models.DateTimeField(
+        _('Event Time'),
+        null=True,
+        blank=True,
+        help_text=_('Time when the exchange emitted the trade event')
+    )
+    
+    is_market_maker = models.BooleanField(
+        _('Buyer Is Market Maker'),
+        null=True,
+        blank=True,
+        help_text=_('Whether the buyer was the market maker')
+    )
+    
+    price_units = models.BigIntegerField(
+        _('Price Units'),
+        null=True,
+        blank=True,
+        help_text=_('Price as an integer number of units at the symbol price scale')
+    )
+    
+    volume_units = models.BigIntegerField(
+        _('Volume Units'),
+        null=True,
+        blank=True,
+        help_text=_('Volume as an integer number of units at the symbol volume scale')
+    )
+    
     class Meta:
         verbose_name = _('Price Update')
         verbose_name_plural = _('Price Updates')
         ordering = ['-timestamp']
-        indexes = [
-            models.Index(fields=['ticker_symbol', 'timestamp']),
+        # On PostgreSQL the table is range partitioned on trade_time and its
+        # indexes are managed per partition by the priceupdate_partitions
+        # command; a unique constraint on a partitioned table has to include
+        # the partition key. Other backends keep the indexes created by the
+        # earlier migrations, outside the model state.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['exchange', 'ticker_symbol', 'trade_id', 'trade_time'],
+                name='unique_exchange_symbol_trade_time',
+            ),
+        ]
+    
+    def get_price(self):
+        if self.price is not None or self.price_units is None:
+            return self.price
+        price_scale, volume_scale = SymbolScale.lookup(self.exchange, self.ticker_symbol)
+        return to_decimal(self.price_units, price_scale)
+    
+    def get_volume(self):
+        if self.volume is not None or self.volume_units is None:
+            return self.volume
+        price_scale, volume_scale = SymbolScale.lookup(self.exchange, self.ticker_symbol)
+        return to_decimal(self.volume_units, volume_scale)
+    
+    def __str__(self):
+        return f"{self.ticker_symbol} @ {self.get_price()} ({self.timestamp.strftime('%Y-%m-%d %H:%M:%S')})"
+
+
+class SymbolScale(models.Model):
+    ticker_symbol = models.CharField(
+        _('Ticker Symbol'),
+        max_length=20,
+        help_text=_('Trading pair (e.g., BTCUSDT)')
+    )
+    
+    exchange = models.CharField(
+        _('Exchange'),
+        max_length=50,
+        default='Binance',
+        help_text=_('Source exchange for this symbol')
+    )
+    
+    price_scale = models.PositiveSmallIntegerField(
+        _('Price Scale'),
+        default=DEFAULT_SCALE,
+        help_text=_('Number of decimal places encoded in price units')
+    )
+    
+    volume_scale = models.PositiveSmallIntegerField(
+        _('Volume Scale'),
+        default=DEFAULT_SCALE,
+        help_text=_('Number of decimal places encoded in volume units')
+    )
+    
+    _cache = {}
+    
+    class Meta:
+        verbose_name = _('Symbol Scale')
+        verbose_name_plural = _('Symbol Scales')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['exchange', 'ticker_symbol'],
+                name='unique_exchange_symbol_scale',
+            ),
+        ]
+    
+    @classmethod
+    def lookup(cls, exchange, ticker_symbol):
+        key = (exchange, ticker_symbol)
+        
+        if key not in cls._cache:
+            scale = cls.objects.filter(exchange=exchange, ticker_symbol=ticker_symbol).first()
+            if scale is None:
+                return DEFAULT_SCALE, DEFAULT_SCALE
+            cls._cache[key] = (scale.price_scale, scale.volume_scale)
+        
+        return cls._cache[key]
+    
+    def __str__(self):
+        return f"{self.ticker_symbol} ({self.price_scale}/{self.volume_scale})"
+
+
+class Candle(models.Model):
+    ticker_symbol = models.CharField(
+        _('Ticker Symbol'),
+        max_length=20,
+        help_text=_('Trading pair (e.g., BTCUSDT)')
+    )
+    
+    exchange = models.CharField(
+        _('Exchange'),
+        max_length=50,
+        default='Binance',
+        help_text=_('Source exchange for this candle')
+    )
+    
+    interval = models.CharField(
+        _('Interval'),
+        max_length=8,
+        help_text=_('Bar length (e.g., 1s, 1m, 5m, 1h)')
+    )
+    
+    open_time = models.DateTimeField(
+        _('Open Time'),
+        help_text=_('Start of the bar')
+    )
+    
+    open = models.DecimalField(_('Open'), max_digits=30, decimal_places=10)
+    high = models.DecimalField(_('High'), max_digits=30, decimal_places=10)
+    low = models.DecimalField(_('Low'), max_digits=30, decimal_places=10)
+    close = models.DecimalField(_('Close'), max_digits=30, decimal_places=10)
+    
+    volume = models.DecimalField(
+        _('Volume'),
+        max_digits=30,
+        decimal_places=10,
+        help_text=_('Traded volume in the base asset during the bar')
+    )
+    
+    trade_count = models.PositiveIntegerField(
+        _('Trade Count'),
+        default=0,
+        help_text=_('Number of trades in the bar (zero for bars carried over a gap)')
+    )
+    
+    is_partial = models.BooleanField(
+        _('Partial'),
+        default=False,
+        help_text=_('Built from only part of the trades in the bar, e.g. the first bar after the client started')
+    )
+    
+    class Meta:
+        verbose_name = _('Candle')
+        verbose_name_plural = _('Candles')
+        ordering = ['-open_time']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['exchange', 'ticker_symbol', 'interval', 'open_time'],
+                name='unique_exchange_symbol_interval_candle',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.ticker_symbol} {self.interval} {self.open_time.strftime('%Y-%m-%d %H:%M:%S')}"
+
+
+class RollupWatermark(models.Model):
+    ticker_symbol = models.CharField(
+        _('Ticker Symbol'),
+        max_length=20,
+        help_text=_('Trading pair (e.g., BTCUSDT)')
+    )
+    
+    exchange = models.CharField(
+        _('Exchange'),
+        max_length=50,
+        default='Binance',
+        help_text=_('Source exchange for this symbol')
+    )
+    
+    timestamp = models.DateTimeField(
+        _('Timestamp'),
+        help_text=_('Ingest time of the last price update rolled up')
+    )
+    
+    last_id = models.BigIntegerField(
+        _('Last ID'),
+        default=0,
+        help_text=_('ID of the last price update rolled up at that timestamp')
+    )
+    
+    updated_at = models.DateTimeField(
+        _('Updated At'),
+        auto_now=True,
+        help_text=_('Time of the last rollup run that advanced this watermark')
+    )
+    
+    class Meta:
+        verbose_name = _('Rollup Watermark')
+        verbose_name_plural = _('Rollup Watermarks')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['exchange', 'ticker_symbol'],
+                name='unique_exchange_symbol_watermark',
+            ),
         ]
     
     def __str__(self):
-        return f"{self.ticker_symbol} @ {self.price} ({self.timestamp.strftime('%Y-%m-%d %H:%M:%S')})"
+        return f"{self.ticker_symbol} rolled up to {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
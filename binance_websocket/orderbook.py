@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import re
+import urllib.parse
+import urllib.request
+
+from sortedcontainers import SortedList
+
+from binance_websocket.fixedpoint import DEFAULT_SCALE, parse_fixed
+
+logger = logging.getLogger('binance_websocket_client')
+
+BINANCE_DEPTH_URL = "https://api.binance.com/api/v3/depth"
+
+DEFAULT_BOOK_DEPTH = 10
+DEFAULT_SNAPSHOT_LIMIT = 1000
+
+# Diff streams only: ``depth`` and ``depth@100ms``. ``depth5``/``depth10``/
+# ``depth20`` are partial-book snapshot streams and are not handled here.
+DIFF_DEPTH_CHANNEL = re.compile(r'^depth(@\d+ms)?$')
+
+# Depth events buffered per symbol while a snapshot is being fetched.
+MAX_PENDING_EVENTS = 10000
+
+RESYNC_DELAY = 1.0
+
+
+def is_diff_depth_stream(stream):
+    return '@' in stream and bool(DIFF_DEPTH_CHANNEL.match(stream.split('@', 1)[1]))
+
+
+def is_depth_frame(message):
+    """
+    Cheaply tell depth diff frames from trades by looking at the start of
+    the raw frame, before anything is decoded.
+    """
+    prefix = message[:80]
+
+    if isinstance(prefix, bytes):
+        return b'"depthUpdate"' in prefix or b'@depth' in prefix
+
+    return '"depthUpdate"' in prefix or '@depth' in prefix
+
+
+class SequenceGap(Exception):
+    """A depth event does not follow on from the book's last update id."""
+
+
+class PriceLevels:
+    """
+    One side of a book. Prices are kept as fixed-point integers in a sorted
+    list (O(log n) insert and remove) next to a dict
+    of the exchange's original price and quantity strings, so changing the
+    quantity of an existing level is a single dict write.
+    """
+
+    def __init__(self, descending=False):
+        self.descending = descending
+        self.prices = SortedList()
+        self.levels = {}
+
+    def set(self, price_text, quantity_text):
+        price = parse_fixed(price_text, DEFAULT_SCALE)
+        empty = not quantity_text.strip('0.')
+
+        if empty:
+            if self.levels.pop(price, None) is not None:
+                self.prices.remove(price)
+            return
+
+        if price not in self.levels:
+            self.prices.add(price)
+
+        self.levels[price] = (price_text, quantity_text)
+
+    def clear(self):
+        self.prices.clear()
+        self.levels.clear()
+
+    def top(self, depth):
+        """
+        Return the best ``depth`` levels as ``[price, quantity]`` strings.
+        """
+        count = min(depth, len(self.prices))
+
+        if self.descending:
+            prices = (self.prices[-1 - index] for index in range(count))
+        else:
+            prices = (self.prices[index] for index in range(count))
+
+        return [list(self.levels[price]) for price in prices]
+
+    def __len__(self):
+        return len(self.levels)
+
+
+class OrderBook:
+    """
+    Local copy of one symbol's order book, built from a REST snapshot plus
+    ``depthUpdate`` diff events applied in update id order.
+    """
+
+    def __init__(self, ticker_symbol):
+        self.ticker_symbol = ticker_symbol
+        self.bids = PriceLevels(descending=True)
+        self.asks = PriceLevels()
+        self.last_update_id = None
+        self.pending = []
+        self.synced = False
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+
+    def buffer(self, event):
+        self.pending.append(event)
+
+        if len(self.pending) > MAX_PENDING_EVENTS:
+            del self.pending[0]
+
+    def apply_levels(self, bids, asks):
+        for price, quantity in bids:
+            self.bids.set(price, quantity)
+
+        for price, quantity in asks:
+            self.asks.set(price, quantity)
+
+    def load_snapshot(self, snapshot):
+        """
+        Replace the book with a REST snapshot and replay the buffered events
+        that come after it. Raises ``SequenceGap`` if the snapshot is older
+        than the first buffered event, in which case a newer snapshot is
+        needed; the buffered events are kept for the retry.
+        """
+        last_update_id = snapshot['lastUpdateId']
+        pending = [event for event in self.pending if event['u'] > last_update_id]
+
+        if pending and pending[0]['U'] > last_update_id + 1:
+            raise SequenceGap(
+                f"{self.ticker_symbol} snapshot {last_update_id} is older than buffered update {pending[0]['U']}"
+            )
+
+        self.reset()
+        self.apply_levels(snapshot['bids'], snapshot['asks'])
+        self.last_update_id = last_update_id
+
+        for index, event in enumerate(pending):
+            try:
+                self.apply(event)
+            except SequenceGap:
+                # Events were dropped from the buffer; only a snapshot taken
+                # after the gap can be used.
+                self.pending = pending[index:]
+                self.reset()
+                raise
+
+        self.pending = []
+        self.synced = True
+
+    def apply(self, event):
+        """
+        Apply a diff event. Returns ``False`` for events the book already
+        covers and raises ``SequenceGap`` when updates were missed.
+        """
+        first_id, final_id = event['U'], event['u']
+
+        if final_id <= self.last_update_id:
+            return False
+
+        if first_id > self.last_update_id + 1:
+            raise SequenceGap(
+                f"{self.ticker_symbol} expected update {self.last_update_id + 1}, got {first_id}"
+            )
+
+        self.apply_levels(event['b'], event['a'])
+        self.last_update_id = final_id
+        return True
+
+    def to_message(self, depth=DEFAULT_BOOK_DEPTH):
+        return {
+            "ticker_symbol": self.ticker_symbol,
+            "last_update_id": self.last_update_id,
+            "bids": self.bids.top(depth),
+            "asks": self.asks.top(depth),
+        }
+
+
+class RestSnapshotFetcher:
+    """
+    Fetches depth snapshots from Binance's REST API. Anything with an async
+    ``fetch(ticker_symbol)`` returning the same JSON shape can replace it.
+    """
+
+    def __init__(self, limit=DEFAULT_SNAPSHOT_LIMIT, url=BINANCE_DEPTH_URL, timeout=10):
+        self.limit = limit
+        self.url = url
+        self.timeout = timeout
+
+    def fetch_sync(self, ticker_symbol):
+        query = urllib.parse.urlencode({'symbol': ticker_symbol.upper(), 'limit': self.limit})
+
+        with urllib.request.urlopen(f"{self.url}?{query}", timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    async def fetch(self, ticker_symbol):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.fetch_sync, ticker_symbol)
+
+
+class OrderBookManager:
+    """
+    Routes depth events to per-symbol books. A book that is not in sync
+    buffers events while a background task fetches a snapshot; a sequence
+    gap throws the book away and starts that resync again. Symbols whose top
+    of book may have changed are collected for throttled publishing.
+    """
+
+    def __init__(self, fetcher=None, resync_delay=RESYNC_DELAY):
+        self.fetcher = fetcher or RestSnapshotFetcher()
+        self.resync_delay = resync_delay
+        self.books = {}
+        self.resync_tasks = {}
+        self.dirty = set()
+        self.resyncs = 0
+
+    def handle(self, event):
+        ticker_symbol = event['s']
+        book = self.books.get(ticker_symbol)
+
+        if book is None:
+            book = self.books[ticker_symbol] = OrderBook(ticker_symbol)
+
+        if not book.synced:
+            book.buffer(event)
+            self.start_resync(book)
+            return
+
+        try:
+            if book.apply(event):
+                self.dirty.add(ticker_symbol)
+        except SequenceGap as e:
+            logger.warning(f"Order book out of sync, resyncing: {str(e)}")
+            book.reset()
+            book.buffer(event)
+            self.start_resync(book)
+
+    def start_resync(self, book):
+        task = self.resync_tasks.get(book.ticker_symbol)
+
+        if task is None or task.done():
+            self.resync_tasks[book.ticker_symbol] = asyncio.create_task(self.resync(book))
+
+    async def resync(self, book):
+        while not book.synced:
+            try:
+                snapshot = await self.fetcher.fetch(book.ticker_symbol)
+                book.load_snapshot(snapshot)
+            except SequenceGap as e:
+                logger.info(f"Waiting for a newer snapshot: {str(e)}")
+            except Exception as e:
+                logger.error(f"Failed to fetch order book snapshot for {book.ticker_symbol}: {str(e)}")
+            else:
+                self.resyncs += 1
+                self.dirty.add(book.ticker_symbol)
+                logger.info(f"Order book for {book.ticker_symbol} synced at update {book.last_update_id}")
+                return
+
+            await asyncio.sleep(self.resync_delay)
+
+    def drain_dirty(self):
+        dirty = self.dirty
+        self.dirty = set()
+        return [self.books[ticker_symbol] for ticker_symbol in sorted(dirty) if self.books[ticker_symbol].synced]
+
+    def close(self):
+        for task in self.resync_tasks.values():
+            task.cancel()
+
+        self.resync_tasks = {}
@@ -0,0 +1,193 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+PARENT_TABLE = 'binance_websocket_priceupdate'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+
+INTERVAL_DAY = 'day'
+INTERVAL_MONTH = 'month'
+INTERVALS = (INTERVAL_DAY, INTERVAL_MONTH)
+
+Partition = namedtuple('Partition', ('name', 'start', 'end'))
+
+_RANGE_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def period_start(moment, interval=INTERVAL_DAY):
+    moment = moment.astimezone(timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if interval == INTERVAL_MONTH:
+        start = start.replace(day=1)
+
+    return start
+
+
+def next_period(moment, interval=INTERVAL_DAY):
+    """
+    Return the start of the period after the one containing ``moment``.
+    """
+    start = period_start(moment, interval)
+
+    if interval == INTERVAL_MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+
+    return start + timedelta(days=1)
+
+
+def partition_name(start):
+    return f"{PARENT_TABLE}_p{start:%Y%m%d}"
+
+
+def parse_bound(bound):
+    match = _RANGE_BOUND.search(bound or '')
+
+    if match is None:
+        return None
+
+    return tuple(datetime.fromisoformat(value).astimezone(timezone.utc) for value in match.groups())
+
+
+def plan_partitions(existing, now, interval=INTERVAL_DAY, premake=7):
+    """
+    Return ``(start, end)`` ranges for the partitions needed so that the next
+    ``premake`` periods after ``now`` are covered. New partitions continue from
+    the end of the last existing one, so switching between daily and monthly
+    partitions never leaves a gap or an overlap.
+    """
+    start = existing[-1].end if existing else next_period(now, interval)
+    horizon = now
+
+    for _ in range(premake + 1):
+        horizon = next_period(horizon, interval)
+
+    ranges = []
+
+    while start < horizon:
+        end = next_period(start, interval)
+        ranges.append((start, end))
+        start = end
+
+    return ranges
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+        [PARENT_TABLE],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor):
+    """
+    Return the range partitions of the price update table ordered by start;
+    the default partition is not included.
+    """
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        [PARENT_TABLE],
+    )
+
+    partitions = []
+
+    for name, bound in cursor.fetchall():
+        bounds = parse_bound(bound)
+        if bounds is not None:
+            partitions.append(Partition(name, *bounds))
+
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def index_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def create_hot_indexes(cursor, quote_name, name):
+    """
+    Create the B-tree indexes a partition keeps while it still receives
+    trades: symbol/time lookups, ingest time for finding symbols with new
+    rows, and the per-symbol watermark order incremental rollups read in.
+    """
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote_name(name + '_symbol_time')} "
+        f"ON {quote_name(name)} (ticker_symbol, trade_time)"
+    )
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote_name(name + '_timestamp')} "
+        f"ON {quote_name(name)} (timestamp)"
+    )
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote_name(name + '_symbol_watermark')} "
+        f"ON {quote_name(name)} (ticker_symbol, timestamp, id)"
+    )
+
+
+def create_partition(cursor, quote_name, start, end):
+    """
+    Create a partition for ``[start, end)`` together with its hot indexes.
+    """
+    name = partition_name(start)
+
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {quote_name(name)} PARTITION OF {quote_name(PARENT_TABLE)} "
+        f"FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    create_hot_indexes(cursor, quote_name, name)
+
+    return name
+
+
+def ensure_partitions(cursor, quote_name, latest):
+    """
+    Create the partitions missing between the end of the last one and the
+    period containing ``latest``, as long as the last one. Returns the end of
+    the last partition and the names of the ones created, or ``None`` when
+    the table is not partitioned.
+    """
+    if not is_partitioned(cursor):
+        return None
+
+    partitions = list_partitions(cursor)
+
+    if partitions:
+        last = partitions[-1]
+        interval = INTERVAL_MONTH if last.end - last.start > timedelta(days=1) else INTERVAL_DAY
+        start = last.end
+    else:
+        interval = INTERVAL_DAY
+        start = period_start(latest)
+
+    created = []
+
+    while start <= latest:
+        end = next_period(start, interval)
+        created.append(create_partition(cursor, quote_name, start, end))
+        start = end
+
+    return start, created
+
+
+def make_cold(cursor, quote_name, partition):
+    """
+    Swap the B-tree indexes of a partition that no longer receives trades for
+    a BRIN index on ``trade_time`` and ``timestamp``, which is a tiny fraction
+    of the size and works well because rows arrive in time order.
+    """
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote_name(partition.name + '_time_brin')} "
+        f"ON {quote_name(partition.name)} USING brin (trade_time, timestamp)"
+    )
+    cursor.execute(f"DROP INDEX IF EXISTS {quote_name(partition.name + '_symbol_time')}")
+    cursor.execute(f"DROP INDEX IF EXISTS {quote_name(partition.name + '_timestamp')}")
+    cursor.execute(f"DROP INDEX IF EXISTS {quote_name(partition.name + '_symbol_watermark')}")
+
+
+def drop_partition(cursor, quote_name, partition):
+    cursor.execute(f"ALTER TABLE {quote_name(PARENT_TABLE)} DETACH PARTITION {quote_name(partition.name)}")
+    cursor.execute(f"DROP TABLE {quote_name(partition.name)}")
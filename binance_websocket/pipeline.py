@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import pickle
+import tempfile
+
+logger = logging.getLogger('binance_websocket_client')
+
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP_OLDEST = 'drop-oldest'
+OVERFLOW_SPILL = 'spill'
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+
+class StageQueue:
+    """
+    Bounded queue between two pipeline stages.
+
+    What happens when the queue is full depends on ``overflow``:
+
+    - ``block``: the producer waits for room, pushing backpressure upstream.
+    - ``drop-oldest``: the oldest queued item is discarded to make room.
+    - ``spill``: items are pickled to a temporary file and read back in order
+      once the in-memory queue has been drained.
+    """
+
+    def __init__(self, name, maxsize=10000, overflow=OVERFLOW_BLOCK, spill_dir=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        self.name = name
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.spill_dir = spill_dir
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.spilled = 0
+        self.spill_pending = 0
+        self.spill_file = None
+        self.spill_read_offset = 0
+
+    def qsize(self):
+        return self.queue.qsize() + self.spill_pending
+
+    def empty(self):
+        return self.qsize() == 0
+
+    async def put(self, item):
+        if self.overflow == OVERFLOW_BLOCK:
+            await self.queue.put(item)
+        else:
+            self.put_nowait(item)
+
+    def put_nowait(self, item):
+        if self.overflow == OVERFLOW_SPILL and (self.spill_pending or self.queue.full()):
+            self.spill(item)
+            return
+
+        if self.overflow == OVERFLOW_DROP_OLDEST and self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+
+        self.queue.put_nowait(item)
+
+    async def get(self):
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+
+        if self.spill_pending:
+            return self.unspill()
+
+        return await self.queue.get()
+
+    def drain_nowait(self):
+        items = []
+
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+
+        while self.spill_pending:
+            items.append(self.unspill())
+
+        return items
+
+    def spill(self, item):
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(dir=self.spill_dir, prefix=f'binance-{self.name}-')
+
+        self.spill_file.seek(0, 2)
+        pickle.dump(item, self.spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled += 1
+        self.spill_pending += 1
+
+    def unspill(self):
+        self.spill_file.seek(self.spill_read_offset)
+        item = pickle.load(self.spill_file)
+        self.spill_read_offset = self.spill_file.tell()
+        self.spill_pending -= 1
+
+        if not self.spill_pending:
+            self.spill_file.seek(0)
+            self.spill_file.truncate()
+            self.spill_read_offset = 0
+
+        return item
+
+    def stats(self):
+        return {
+            'depth': self.qsize(),
+            'maxsize': self.maxsize,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'spill_pending': self.spill_pending,
+        }
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+            self.spill_pending = 0
+            self.spill_read_offset = 0
+
+
+def format_queue_stats(stats):
+    parts = []
+
+    for name, stage in stats.items():
+        part = f"{name}={stage['depth']}/{stage['maxsize']}"
+        if stage['dropped']:
+            part += f" dropped={stage['dropped']}"
+        if stage['spill_pending']:
+            part += f" spilled={stage['spill_pending']}"
+        parts.append(part)
+
+    return ', '.join(parts)
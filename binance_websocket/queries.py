@@ -0,0 +1,270 @@
+import csv
+import hashlib
+import io
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from binance_websocket.candles import interval_ms
+from binance_websocket.fixedpoint import to_decimal
+from binance_websocket.models import Candle, PriceUpdate
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+# Rows are streamed from a server-side cursor this many at a time.
+EXPORT_CHUNK_SIZE = 2000
+
+# A range that ended at least this long ago is treated as closed: no more
+# trades are expected for it, so its responses can be cached.
+CLOSED_RANGE_LAG = timedelta(minutes=1)
+
+TRADE_FIELDS = ('trade_id', 'trade_time', 'price', 'volume', 'is_market_maker')
+
+VALID_SYMBOL = re.compile(r'^[A-Za-z0-9_]{1,20}$')
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_symbol(value):
+    if not VALID_SYMBOL.match(value):
+        raise QueryError("Invalid symbol")
+
+    return value.upper()
+
+
+def parse_time(value, name):
+    """
+    Parse an ISO 8601 time or epoch milliseconds; times without an offset
+    are taken as UTC.
+    """
+    if value is None or value == '':
+        return None
+
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+
+    if moment is None:
+        raise QueryError(f"{name} must be an ISO 8601 time or epoch milliseconds")
+
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+
+    return moment
+
+
+def parse_interval(value):
+    try:
+        interval_ms(value)
+    except ValueError as e:
+        raise QueryError(str(e))
+
+    return value
+
+
+def parse_limit(value):
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+
+    if not value.isdigit() or not 0 < int(value) <= MAX_PAGE_SIZE:
+        raise QueryError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    return int(value)
+
+
+def parse_range(params):
+    start = parse_time(params.get('start'), 'start')
+    end = parse_time(params.get('end'), 'end')
+
+    if start is not None and end is not None and start >= end:
+        raise QueryError("start must be before end")
+
+    return start, end
+
+
+def format_cursor(time_value, row_id=None):
+    time_ms = int(time_value.timestamp() * 1000)
+    return f"{time_ms}:{row_id}" if row_id is not None else str(time_ms)
+
+
+def parse_cursor(value):
+    """
+    Parse an ``after`` cursor of the form ``<epoch ms>`` or
+    ``<epoch ms>:<trade id>``.
+    """
+    if not value:
+        return None, None
+
+    time_part, _, id_part = value.partition(':')
+
+    if not time_part.isdigit() or (id_part and not id_part.isdigit()):
+        raise QueryError("after must be a cursor returned by a previous page")
+
+    moment = datetime.fromtimestamp(int(time_part) / 1000, tz=timezone.utc)
+    return moment, int(id_part) if id_part else None
+
+
+def is_closed_range(end, now=None):
+    return end is not None and end <= (now or datetime.now(timezone.utc)) - CLOSED_RANGE_LAG
+
+
+def cache_key(path, params):
+    """
+    Key a query by its path and parameters, independent of parameter order.
+    """
+    query = '&'.join(f"{key}={value}" for key, value in sorted(params.items()))
+    return 'binance_api:' + hashlib.sha256(f"{path}?{query}".encode()).hexdigest()
+
+
+def trade_queryset(ticker_symbol, start=None, end=None, exchange='Binance'):
+    queryset = PriceUpdate.objects.filter(exchange=exchange, ticker_symbol=ticker_symbol.upper())
+
+    if start is not None:
+        queryset = queryset.filter(trade_time__gte=start)
+    if end is not None:
+        queryset = queryset.filter(trade_time__lt=end)
+
+    return queryset.order_by('trade_time', 'trade_id').values_list(
+        'trade_id', 'trade_time', 'price', 'volume', 'price_units', 'volume_units', 'is_market_maker',
+    )
+
+
+def serialize_trade(row, scales):
+    """
+    Turn a ``trade_queryset`` row into a JSON-ready dict. ``scales`` is the
+    symbol's ``(price_scale, volume_scale)`` for rows stored as fixed-point.
+    """
+    trade_id, trade_time, price, volume, price_units, volume_units, is_market_maker = row
+
+    if price is None and price_units is not None:
+        price = to_decimal(price_units, scales[0])
+        volume = to_decimal(volume_units, scales[1])
+
+    return {
+        'trade_id': trade_id,
+        'trade_time': trade_time.isoformat() if trade_time else None,
+        'price': str(price) if price is not None else None,
+        'volume': str(volume) if volume is not None else None,
+        'is_market_maker': is_market_maker,
+    }
+
+
+def trade_page(ticker_symbol, start, end, after, limit, scales, exchange='Binance'):
+    """
+    Return one keyset-paginated page of trades ordered by trade time and id,
+    plus the cursor for the next page (``None`` on the last page).
+    """
+    queryset = trade_queryset(ticker_symbol, start, end, exchange)
+    after_time, after_id = after
+
+    if after_time is not None:
+        if after_id is None:
+            queryset = queryset.filter(trade_time__gt=after_time)
+        else:
+            queryset = queryset.filter(Q(trade_time__gt=after_time) | Q(trade_time=after_time, trade_id__gt=after_id))
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = format_cursor(rows[-1][1], rows[-1][0])
+
+    return [serialize_trade(row, scales) for row in rows], next_cursor
+
+
+def bar_page(ticker_symbol, interval, start, end, after, limit, exchange='Binance'):
+    queryset = Candle.objects.filter(exchange=exchange, ticker_symbol=ticker_symbol.upper(), interval=interval)
+
+    if start is not None:
+        queryset = queryset.filter(open_time__gte=start)
+    if end is not None:
+        queryset = queryset.filter(open_time__lt=end)
+    if after[0] is not None:
+        queryset = queryset.filter(open_time__gt=after[0])
+
+    rows = list(
+        queryset.order_by('open_time')
+        .values_list('open_time', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'is_partial')[:limit + 1]
+    )
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = format_cursor(rows[-1][0])
+
+    bars = [
+        {
+            'open_time': open_time.isoformat(),
+            'open': str(open_),
+            'high': str(high),
+            'low': str(low),
+            'close': str(close),
+            'volume': str(volume),
+            'trade_count': trade_count,
+            'partial': is_partial,
+        }
+        for open_time, open_, high, low, close, volume, trade_count, is_partial in rows
+    ]
+
+    return bars, next_cursor
+
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(TRADE_FIELDS)
+    return buffer.getvalue()
+
+
+def format_rows(trades, export_format):
+    """
+    Render serialized trades as one block of CSV rows or NDJSON lines.
+    """
+    if export_format == 'ndjson':
+        return ''.join(json.dumps(trade) + '\n' for trade in trades)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for trade in trades:
+        writer.writerow([
+            '' if trade[field] is None else trade[field] for field in TRADE_FIELDS
+        ])
+
+    return buffer.getvalue()
+
+
+async def stream_trades(queryset, scales, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield an export in blocks of ``chunk_size`` rows read from a server-side
+    cursor, so the result set never has to fit in memory.
+    """
+    if export_format == 'csv':
+        yield csv_header()
+
+    block = []
+
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        block.append(serialize_trade(row, scales))
+
+        if len(block) >= chunk_size:
+            yield format_rows(block, export_format)
+            block = []
+
+    if block:
+        yield format_rows(block, export_format)
@@ -0,0 +1,267 @@
+import asyncio
+import glob
+import heapq
+import itertools
+import logging
+import mmap
+import os
+import re
+import time
+import zlib
+
+from binance_websocket.benchmarks import DEFAULT_SYMBOLS, encode_frames, generate_trades
+from binance_websocket.capture import SEGMENT_SUFFIX, frame_symbol, read_index
+
+logger = logging.getLogger('binance_websocket_client')
+
+# Compressed bytes fed to the decompressor at a time when a segment has no
+# index and its gzip members have to be found by scanning.
+SCAN_CHUNK_BYTES = 1024 * 1024
+
+# At maximum speed the replay yields to the event loop this often, so the
+# client's flush and publish tasks still run.
+YIELD_EVERY = 1000
+
+EVENT_TIME_FIELD = re.compile(rb'"E":\s*(\d+)')
+
+
+def segment_writer(path):
+    """
+    Return the pid part of a segment name, ``frames-<start>-<pid>-<seq>``;
+    segments from one process follow each other in time.
+    """
+    parts = os.path.basename(path).split('-')
+    return parts[2] if len(parts) >= 4 else path
+
+
+def replay_paths(paths):
+    """
+    Expand directories into their capture segments and group files into
+    sequences that are each ordered in time: one per capturing process,
+    and one per other file.
+    """
+    sequences = {}
+
+    for path in paths:
+        if os.path.isdir(path):
+            for segment in sorted(glob.glob(os.path.join(path, f"*{SEGMENT_SUFFIX}"))):
+                sequences.setdefault(('segment', segment_writer(segment)), []).append(segment)
+        else:
+            sequences[('file', path)] = [path]
+
+    return list(sequences.values())
+
+
+def parse_line(line):
+    """
+    Split a ``<receive ns>\\t<frame>`` capture line, or take a bare frame and
+    use its event time (``E``, milliseconds) as its timestamp.
+    """
+    if line[:1].isdigit():
+        received, _, frame = line.partition(b'\t')
+        return int(received), frame
+
+    match = EVENT_TIME_FIELD.search(line)
+    return (int(match.group(1)) * 1000000 if match else None), line
+
+
+def block_matches(block, start_ns, end_ns, symbols):
+    if start_ns is not None and block['last_ns'] < start_ns:
+        return False
+    if end_ns is not None and block['first_ns'] >= end_ns:
+        return False
+    if symbols is not None and not symbols.intersection(block['symbols']):
+        return False
+    return True
+
+
+def scan_members(view, path):
+    """
+    Yield the decompressed contents of each gzip member in ``view``. A
+    truncated last member, from a capture that did not shut down cleanly,
+    yields its complete lines.
+    """
+    position = 0
+
+    while position < len(view):
+        decompressor = zlib.decompressobj(31)
+        chunks = []
+
+        try:
+            while not decompressor.eof and position < len(view):
+                chunk = view[position:position + SCAN_CHUNK_BYTES]
+                chunks.append(decompressor.decompress(chunk))
+                position += len(chunk) - len(decompressor.unused_data)
+        except zlib.error as e:
+            logger.warning(f"Stopped reading {path} at byte {position}: {str(e)}")
+            position = len(view)
+
+        data = b''.join(chunks)
+
+        if not decompressor.eof:
+            data = data[:data.rfind(b'\n') + 1]
+
+        yield data
+
+
+def read_lines(path, start_ns=None, end_ns=None, symbols=None):
+    """
+    Yield the lines of a capture segment or an NDJSON file. The file is
+    memory-mapped so only what is read gets paged in; segments with an index
+    skip blocks outside the time range or without the wanted symbols.
+    """
+    with open(path, 'rb') as frame_file:
+        if os.fstat(frame_file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(frame_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if not path.endswith(SEGMENT_SUFFIX):
+                yield from iter(mapped.readline, b'')
+                return
+
+            index = read_index(path)
+            view = memoryview(mapped)
+
+            try:
+                if index is None:
+                    blocks = scan_members(view, path)
+                else:
+                    blocks = (
+                        zlib.decompress(view[block['offset']:block['offset'] + block['length']], 31)
+                        for block in index['blocks']
+                        if block_matches(block, start_ns, end_ns, symbols)
+                    )
+
+                for block in blocks:
+                    yield from block.split(b'\n')
+            finally:
+                view.release()
+
+
+def read_frames(path, start_ns=None, end_ns=None, symbols=None):
+    """
+    Yield ``(timestamp_ns, frame)`` from a capture segment or an NDJSON file
+    of raw frames, keeping frames inside ``[start_ns, end_ns)`` whose symbol
+    is in ``symbols``.
+    """
+    for line in read_lines(path, start_ns, end_ns, symbols):
+        line = line.strip()
+
+        if not line:
+            continue
+
+        timestamp, frame = parse_line(line)
+
+        if timestamp is not None:
+            if start_ns is not None and timestamp < start_ns:
+                continue
+            if end_ns is not None and timestamp >= end_ns:
+                continue
+
+        frame = frame.decode('utf-8', 'replace')
+
+        if symbols is not None and frame_symbol(frame) not in symbols:
+            continue
+
+        yield timestamp, frame
+
+
+def synthetic_frames(count, symbols=DEFAULT_SYMBOLS, seed=0, combined=False):
+    """
+    Yield generated trade frames timestamped by their event time.
+    """
+    for trade in generate_trades(count, symbols, seed):
+        [frame] = encode_frames([trade], combined)
+        yield trade['E'] * 1000000, frame
+
+
+def iter_frames(paths, start_ns=None, end_ns=None, symbols=None):
+    """
+    Yield frames from every file in ``paths`` merged in timestamp order.
+    """
+    if symbols is not None:
+        symbols = {symbol.upper() for symbol in symbols}
+
+    sequences = [
+        itertools.chain.from_iterable(read_frames(path, start_ns, end_ns, symbols) for path in sequence)
+        for sequence in replay_paths(paths)
+    ]
+
+    if len(sequences) == 1:
+        return sequences[0]
+
+    return heapq.merge(*sequences, key=lambda item: item[0] or 0)
+
+
+class Replayer:
+    """
+    Feeds stored frames through a client's ``process_message`` as if they
+    had just arrived, with its batching, publishing and flushing tasks
+    running. ``speed`` 1 keeps the recorded gaps between frames, ``N``
+    replays N times faster and ``0`` as fast as the client can go.
+    """
+
+    def __init__(self, client, speed=1.0):
+        self.client = client
+        client.replaying = True
+        self.speed = speed
+        self.frames = 0
+        self.max_lag = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    async def handle(self, frame):
+        self.client.received_ns = time.time_ns()
+
+        if self.client.pipeline_running:
+            await self.client.enqueue_message(frame)
+        else:
+            await self.client.process_message(frame)
+
+    async def run(self, frames):
+        client = self.client
+        client.running = True
+        background_tasks = client.start_background_tasks()
+
+        if client.queue_size:
+            client.start_pipeline()
+
+        first_timestamp = None
+        self.started_at = time.monotonic()
+
+        try:
+            for timestamp, frame in frames:
+                if self.speed and timestamp is not None:
+                    if first_timestamp is None:
+                        first_timestamp = timestamp
+
+                    due = self.started_at + (timestamp - first_timestamp) / 1e9 / self.speed
+                    delay = due - time.monotonic()
+
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        self.max_lag = max(self.max_lag, -delay)
+
+                await self.handle(frame)
+                self.frames += 1
+
+                if not self.speed and self.frames % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+        finally:
+            for task in background_tasks:
+                task.cancel()
+
+            await client.stop()
+            self.finished_at = time.monotonic()
+
+        return self.frames
+
+    def summary(self):
+        elapsed = max((self.finished_at or time.monotonic()) - self.started_at, 1e-9)
+        return {
+            'frames': self.frames,
+            'seconds': elapsed,
+            'frames_per_second': self.frames / elapsed,
+            'max_lag_seconds': self.max_lag,
+        }
@@ -0,0 +1,276 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.db.models import Q
+
+from binance_websocket.candles import Bar, interval_ms
+from binance_websocket.fixedpoint import to_decimal
+from binance_websocket.models import Candle, PriceUpdate, RollupWatermark, SymbolScale
+from binance_websocket.writers import CANDLE_KEY, CANDLE_VALUES, build_candle
+
+logger = logging.getLogger('binance_websocket_client')
+
+# Each interval after the first is built from the bars of the one before it,
+# so an hour is recomputed from at most 60 minute bars.
+ROLLUP_INTERVALS = ('1m', '1h', '1d')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_ms(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def from_ms(time_ms):
+    return datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc)
+
+
+def bucket_runs(bucket_starts, length_ms):
+    """
+    Group bucket start times into contiguous ``(start, end)`` ranges so each
+    run can be recomputed with a single range query.
+    """
+    runs = []
+
+    for start in sorted(bucket_starts):
+        if runs and runs[-1][1] == start:
+            runs[-1][1] = start + length_ms
+        else:
+            runs.append([start, start + length_ms])
+
+    return [tuple(run) for run in runs]
+
+
+def build_bars(ticker_symbol, interval, trades):
+    """
+    Build bars from ``(time_ms, price, volume)`` trades sorted by time.
+    """
+    length_ms = interval_ms(interval)
+    bars = {}
+
+    for time_ms, price, volume in trades:
+        start = time_ms - time_ms % length_ms
+        bar = bars.get(start)
+
+        if bar is None:
+            bar = bars[start] = Bar(ticker_symbol, interval, start, length_ms, price)
+
+        bar.add(price, volume)
+
+    return list(bars.values())
+
+
+def merge_bars(ticker_symbol, interval, bars):
+    """
+    Merge shorter bars sorted by open time into bars of ``interval``.
+    """
+    length_ms = interval_ms(interval)
+    merged = {}
+
+    for bar in bars:
+        if not bar.trade_count:
+            continue
+
+        start = bar.open_time_ms - bar.open_time_ms % length_ms
+        target = merged.get(start)
+
+        if target is None:
+            target = merged[start] = Bar(ticker_symbol, interval, start, length_ms, bar.open)
+
+        target.merge(bar)
+
+    return list(merged.values())
+
+
+def past_watermark(rows, watermark):
+    return rows.filter(
+        Q(timestamp__gt=watermark.timestamp) | Q(timestamp=watermark.timestamp, id__gt=watermark.last_id)
+    )
+
+
+def bar_from_candle(candle):
+    bar = Bar(candle.ticker_symbol, candle.interval, to_ms(candle.open_time), interval_ms(candle.interval), candle.open)
+    bar.high = candle.high
+    bar.low = candle.low
+    bar.close = candle.close
+    bar.volume = candle.volume
+    bar.trade_count = candle.trade_count
+    return bar
+
+
+def save_bars(bars, exchange='Binance'):
+    if not bars:
+        return
+
+    Candle.objects.bulk_create(
+        [build_candle(bar, exchange) for bar in bars],
+        update_conflicts=True,
+        unique_fields=CANDLE_KEY,
+        update_fields=CANDLE_VALUES,
+    )
+
+
+class Rollup:
+    """
+    Rolls raw ``PriceUpdate`` rows up into ``Candle`` rows for each of
+    ``intervals``.
+
+    Each symbol has a ``RollupWatermark`` on ingest time and id, and each run
+    reads at most ``chunk_size`` rows past it. Only the buckets those rows
+    fall into are recomputed, from every raw row in the bucket, so trades
+    that arrive late fix up the buckets they belong to. Rows ingested in the
+    last ``settle`` are left for the next run, so writes still being
+    committed are never skipped. Candles are upserted, which makes reruns
+    and overlap with the live candle builder harmless.
+    """
+
+    def __init__(self, exchange='Binance', intervals=ROLLUP_INTERVALS, chunk_size=10000,
+                 settle=timedelta(seconds=5), symbols=None, since=None):
+        self.exchange = exchange
+        self.intervals = list(intervals)
+        self.chunk_size = chunk_size
+        self.settle = settle
+        self.symbols = [symbol.upper() for symbol in symbols] if symbols else None
+        self.since = since or EPOCH
+
+    def pending_symbols(self):
+        """
+        Return the symbols with rows past their watermark. Each symbol that
+        has a watermark is checked against its own; symbols without one are
+        looked for only among rows ingested since the oldest watermark.
+        """
+        if self.symbols is not None:
+            return self.symbols
+
+        watermarks = list(RollupWatermark.objects.filter(exchange=self.exchange))
+        rows = PriceUpdate.objects.filter(exchange=self.exchange)
+        symbols = set()
+
+        for watermark in watermarks:
+            if past_watermark(rows.filter(ticker_symbol=watermark.ticker_symbol), watermark).exists():
+                symbols.add(watermark.ticker_symbol)
+
+        oldest = min((watermark.timestamp for watermark in watermarks), default=self.since)
+        new_rows = (
+            rows.filter(timestamp__gte=oldest)
+            .exclude(ticker_symbol__in=[watermark.ticker_symbol for watermark in watermarks])
+        )
+        symbols.update(new_rows.values_list('ticker_symbol', flat=True).distinct())
+
+        return sorted(symbols)
+
+    def trades(self, ticker_symbol, start_ms, end_ms):
+        rows = (
+            PriceUpdate.objects
+            .filter(
+                exchange=self.exchange,
+                ticker_symbol=ticker_symbol,
+                trade_time__gte=from_ms(start_ms),
+                trade_time__lt=from_ms(end_ms),
+            )
+            .order_by('trade_time', 'trade_id')
+            .values_list('trade_time', 'price', 'volume', 'price_units', 'volume_units')
+        )
+        price_scale = volume_scale = None
+
+        for trade_time, price, volume, price_units, volume_units in rows.iterator():
+            if price is None:
+                if price_scale is None:
+                    price_scale, volume_scale = SymbolScale.lookup(self.exchange, ticker_symbol)
+                price = to_decimal(price_units, price_scale)
+                volume = to_decimal(volume_units, volume_scale)
+
+            yield to_ms(trade_time), price, volume
+
+    def recompute(self, ticker_symbol, bucket_starts):
+        base = self.intervals[0]
+        base_ms = interval_ms(base)
+        bars = []
+
+        for start, end in bucket_runs(bucket_starts, base_ms):
+            bars.extend(build_bars(ticker_symbol, base, self.trades(ticker_symbol, start, end)))
+
+        save_bars(bars, self.exchange)
+
+        lower = base
+
+        for interval in self.intervals[1:]:
+            length_ms = interval_ms(interval)
+            bucket_starts = {start - start % length_ms for start in bucket_starts}
+            bars = []
+
+            for start, end in bucket_runs(bucket_starts, length_ms):
+                candles = Candle.objects.filter(
+                    exchange=self.exchange,
+                    ticker_symbol=ticker_symbol,
+                    interval=lower,
+                    open_time__gte=from_ms(start),
+                    open_time__lt=from_ms(end),
+                ).order_by('open_time')
+                bars.extend(merge_bars(ticker_symbol, interval, [bar_from_candle(candle) for candle in candles]))
+
+            save_bars(bars, self.exchange)
+            lower = interval
+
+    def run_chunk(self, ticker_symbol, now):
+        """
+        Roll up the next chunk of rows for a symbol and advance its watermark.
+        Returns the number of raw rows read.
+        """
+        with transaction.atomic():
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+                exchange=self.exchange,
+                ticker_symbol=ticker_symbol,
+                defaults={'timestamp': self.since, 'last_id': 0},
+            )
+
+            rows = list(
+                past_watermark(
+                    PriceUpdate.objects.filter(
+                        exchange=self.exchange, ticker_symbol=ticker_symbol, timestamp__lt=now - self.settle,
+                    ),
+                    watermark,
+                )
+                .order_by('timestamp', 'id')
+                .values_list('id', 'timestamp', 'trade_time')[:self.chunk_size]
+            )
+
+            if not rows:
+                return 0
+
+            base_ms = interval_ms(self.intervals[0])
+            bucket_starts = set()
+
+            for _, _, trade_time in rows:
+                if trade_time is not None:
+                    time_ms = to_ms(trade_time)
+                    bucket_starts.add(time_ms - time_ms % base_ms)
+
+            self.recompute(ticker_symbol, bucket_starts)
+
+            watermark.last_id, watermark.timestamp = rows[-1][0], rows[-1][1]
+            watermark.save()
+
+        return len(rows)
+
+    def run(self, now=None):
+        """
+        Roll every pending symbol up to ``now`` minus the settle time and
+        return the number of raw rows read.
+        """
+        now = now or datetime.now(timezone.utc)
+        total = 0
+
+        for ticker_symbol in self.pending_symbols():
+            while True:
+                count = self.run_chunk(ticker_symbol, now)
+                total += count
+
+                if count:
+                    logger.info(f"Rolled up {count} rows for {ticker_symbol}")
+
+                if count < self.chunk_size:
+                    break
+
+        return total
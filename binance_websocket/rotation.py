@@ -0,0 +1,107 @@
+import asyncio
+
+from websockets import ConnectionClosedOK
+
+# Binance drops every connection after 24 hours; rotate well before that.
+DEFAULT_ROTATE_AFTER = 23 * 3600.0
+
+# How long the old and new connections both deliver frames before the old
+# one is closed.
+DEFAULT_ROTATION_OVERLAP = 5.0
+
+# How often the connection age and frame counter are checked.
+ROTATION_CHECK_INTERVAL = 1.0
+
+
+class TradeDeduplicator:
+    """
+    Drops trades delivered by both connections while a rotation overlaps
+    them.
+
+    Before the first rotation only one connection is live, so this just
+    remembers the last trade id per symbol. When an overlap starts those ids
+    become watermarks: anything at or below a symbol's watermark was
+    processed already, and ids above it are checked against the set of
+    trades seen since the overlap started, which is dropped when it ends.
+
+    The promoted connection can still hold frames the old one delivered, so
+    after an overlap the last ids stay watermarks and trades at or below
+    them keep being dropped. Trade ids only grow on one connection.
+    """
+
+    def __init__(self):
+        self.last_ids = {}
+        self.watermarks = None
+        self.seen = None
+        self.duplicates = 0
+
+    @property
+    def overlapping(self):
+        return self.seen is not None
+
+    def start_overlap(self):
+        self.watermarks = dict(self.last_ids)
+        self.seen = set()
+
+    def end_overlap(self):
+        self.watermarks = self.last_ids
+        self.seen = None
+
+    def is_duplicate(self, ticker_symbol, trade_id):
+        if self.seen is None:
+            if self.watermarks is not None and trade_id <= self.watermarks.get(ticker_symbol, -1):
+                self.duplicates += 1
+                return True
+
+            self.last_ids[ticker_symbol] = trade_id
+            return False
+
+        key = (ticker_symbol, trade_id)
+
+        if key in self.seen or trade_id <= self.watermarks.get(ticker_symbol, -1):
+            self.duplicates += 1
+            return True
+
+        self.seen.add(key)
+
+        if trade_id > self.last_ids.get(ticker_symbol, -1):
+            self.last_ids[ticker_symbol] = trade_id
+
+        return False
+
+
+async def frames_until(connection, stop):
+    """
+    Yield frames from ``connection`` until ``stop`` is set, like iterating
+    over the connection itself.
+
+    Setting ``stop`` only ever interrupts a pending ``recv()``, which
+    websockets allows without losing the frame: the frame being handled is
+    always finished and the unread ones stay buffered on the connection.
+    """
+    stopped = asyncio.ensure_future(stop.wait())
+    received = None
+
+    try:
+        while not stop.is_set():
+            received = asyncio.ensure_future(connection.recv())
+            await asyncio.wait((received, stopped), return_when=asyncio.FIRST_COMPLETED)
+
+            if not received.done():
+                received.cancel()
+                await asyncio.wait((received,))
+
+                if received.cancelled():
+                    return
+
+            try:
+                message = received.result()
+            except ConnectionClosedOK:
+                return
+
+            yield message
+    finally:
+        stopped.cancel()
+
+        if received is not None:
+            received.cancel()
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import os
 import sys
 import argparse
 import datetime
@@ -8,6 +9,11 @@ from decimal import Decimal
 
 import websockets
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Plain asyncio helpers with no Django imports.
+from binance_websocket.eventloop import LOOP_AUTO, LOOP_CHOICES, LoopLagMonitor, resolve_loop, run
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -115,14 +121,20 @@ class StandaloneBinanceClient:
             logger.info("WebSocket connection closed")
 
 
-async def main():
+def parse_args():
     parser = argparse.ArgumentParser(description='Standalone Binance WebSocket Client')
     parser.add_argument('symbol', nargs='?', default='btcusdt', help='Symbol to track (e.g., btcusdt)')
     parser.add_argument('channel', nargs='?', default='trade', help='Channel to subscribe to (e.g., trade, kline_1m)')
     parser.add_argument('limit', nargs='?', type=int, default=10, help='Number of messages to receive before exiting')
+    parser.add_argument('--loop', choices=LOOP_CHOICES, default=LOOP_AUTO,
+                        help='Event loop implementation (auto picks uvloop when installed)')
+    parser.add_argument('--lag-warn-ms', type=float, default=100,
+                        help='Warn when the event loop runs this many milliseconds late (0 disables)')
     
-    args = parser.parse_args()
-    
+    return parser.parse_args()
+
+
+async def main(args):
     print(f"Starting Standalone Binance WebSocket Client")
     print(f"Symbol: {args.symbol}")
     print(f"Channel: {args.channel}")
@@ -133,16 +145,26 @@ async def main():
         symbol=args.symbol,
         channel=args.channel
     )
+    lag_monitor = LoopLagMonitor(warn_after=args.lag_warn_ms / 1000.0)
+    lag_monitor.start()
     
     try:
         await client.listen(limit=args.limit)
     except KeyboardInterrupt:
         print("\nInterrupted by user, shutting down...")
     finally:
+        lag_monitor.stop()
         await client.stop()
     
     print("Binance WebSocket client stopped")
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    args = parse_args()
+    
+    try:
+        resolve_loop(args.loop)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    
+    run(main(args), args.loop)
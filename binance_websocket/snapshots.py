@@ -0,0 +1,104 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger('binance_websocket_client')
+
+SNAPSHOT_KEY_PREFIX = 'binance_snapshot:'
+SYMBOLS_KEY = 'binance_snapshot:symbols'
+
+# How often buffered snapshots are written to the cache.
+SNAPSHOT_FLUSH_INTERVAL = 0.5
+
+# The symbol index is re-merged this often even without new symbols, so an
+# index overwritten by another ingest process repairs itself.
+SYMBOL_INDEX_REFRESH = 60.0
+
+
+def snapshot_cache():
+    return caches[getattr(settings, 'BINANCE_SNAPSHOT_CACHE', 'default')]
+
+
+def is_process_local(cache):
+    """
+    Whether ``cache`` is private to this process, so consumers in the ASGI
+    processes would never see snapshots written to it.
+    """
+    return isinstance(cache, (LocMemCache, DummyCache))
+
+
+def snapshot_ttl():
+    return getattr(settings, 'BINANCE_SNAPSHOT_TTL', 86400)
+
+
+def snapshot_key(ticker_symbol):
+    return f"{SNAPSHOT_KEY_PREFIX}{ticker_symbol.upper()}"
+
+
+async def load_snapshots(symbols=None, cache=None):
+    """
+    Return the cached last-trade messages for ``symbols`` (every known symbol
+    by default) ordered by symbol. Two cache round trips, no database access.
+    """
+    cache = cache or snapshot_cache()
+
+    if symbols is None:
+        symbols = await cache.aget(SYMBOLS_KEY) or []
+
+    if not symbols:
+        return []
+
+    snapshots = await cache.aget_many([snapshot_key(symbol) for symbol in symbols])
+    return [snapshots[key] for key in sorted(snapshots)]
+
+
+class SnapshotWriter:
+    """
+    Keeps the last published message per symbol and writes the changed ones
+    to the shared cache in one ``set_many`` per flush, so the cache sees at
+    most one write per symbol per flush interval however fast trades arrive.
+    """
+
+    def __init__(self, cache=None, ttl=None):
+        self.cache = cache or snapshot_cache()
+        self.ttl = ttl if ttl is not None else snapshot_ttl()
+        self.pending = {}
+        self.known_symbols = set()
+        self.index_written_at = None
+
+    def update(self, message):
+        self.pending[message['ticker_symbol']] = message
+
+    async def flush(self):
+        if not self.pending:
+            return 0
+
+        pending = self.pending
+        self.pending = {}
+
+        await self.cache.aset_many(
+            {snapshot_key(symbol): message for symbol, message in pending.items()},
+            self.ttl,
+        )
+
+        new_symbols = pending.keys() - self.known_symbols
+        index_stale = (
+            self.index_written_at is None
+            or time.monotonic() - self.index_written_at >= SYMBOL_INDEX_REFRESH
+        )
+
+        if new_symbols or index_stale:
+            self.known_symbols.update(new_symbols)
+            await self.write_index()
+
+        return len(pending)
+
+    async def write_index(self):
+        stored = await self.cache.aget(SYMBOLS_KEY) or []
+        symbols = sorted(self.known_symbols.union(stored))
+        await self.cache.aset(SYMBOLS_KEY, symbols, self.ttl)
+        self.index_written_at = time.monotonic()
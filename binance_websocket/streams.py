@@ -0,0 +1,81 @@
+BINANCE_STREAM_HOST = "wss://stream.binance.com:9443"
+
+# Binance allows at most 1024 streams on a single connection.
+MAX_STREAMS_PER_CONNECTION = 1024
+
+
+def build_stream_names(symbols, channels):
+    streams = []
+
+    for symbol in symbols:
+        for channel in channels:
+            stream = f"{symbol.lower()}@{channel}"
+            if stream not in streams:
+                streams.append(stream)
+
+    return streams
+
+
+def parse_stream_list(entries, default_channels):
+    """
+    Turn a list of ``symbol`` or ``symbol@channel`` entries into stream names.
+    Bare symbols are expanded with each of the default channels.
+    """
+    streams = []
+
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+
+        if '@' in entry:
+            symbol, channel = entry.split('@', 1)
+            candidates = [f"{symbol.lower()}@{channel}"]
+        else:
+            candidates = build_stream_names([entry], default_channels)
+
+        for stream in candidates:
+            if stream not in streams:
+                streams.append(stream)
+
+    return streams
+
+
+def load_stream_file(path, default_channels):
+    """
+    Read stream entries from a file, one per line or comma separated.
+    Blank lines and ``#`` comments are ignored.
+    """
+    entries = []
+
+    with open(path) as stream_file:
+        for line in stream_file:
+            line = line.split('#', 1)[0]
+            entries.extend(line.split(','))
+
+    return parse_stream_list(entries, default_channels)
+
+
+def shard_streams(streams, max_streams=MAX_STREAMS_PER_CONNECTION):
+    if max_streams < 1:
+        raise ValueError("max_streams must be at least 1")
+
+    return [streams[i:i + max_streams] for i in range(0, len(streams), max_streams)]
+
+
+def build_stream_url(streams):
+    if len(streams) == 1:
+        return f"{BINANCE_STREAM_HOST}/ws/{streams[0]}"
+
+    return f"{BINANCE_STREAM_HOST}/stream?streams={'/'.join(streams)}"
+
+
+def unwrap_combined_message(message_data):
+    """
+    Combined stream frames arrive as ``{"stream": ..., "data": ...}``; return
+    the inner payload so it can be parsed like a single-stream frame.
+    """
+    if isinstance(message_data, dict) and 'stream' in message_data and 'data' in message_data:
+        return message_data['data']
+
+    return message_data
@@ -0,0 +1,239 @@
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+
+from binance_websocket.logsampling import ThroughputStats, format_throughput_summary
+from binance_websocket.metrics import REGISTRY, WORKER_RESTARTS, add_label, merge_families
+
+logger = logging.getLogger('binance_websocket_client')
+
+# Workers report their throughput this often; each report doubles as a
+# heartbeat, and it comes from the worker's event loop, so a blocked loop
+# stops it too.
+WORKER_HEARTBEAT_INTERVAL = 1.0
+
+DEFAULT_STALL_TIMEOUT = 30.0
+RESTART_DELAY = 1.0
+SHUTDOWN_TIMEOUT = 10.0
+POLL_INTERVAL = 0.5
+
+
+def stream_symbol(stream):
+    return stream.split('@', 1)[0]
+
+
+def assign_streams(streams, workers):
+    """
+    Split streams across at most ``workers`` lists. All streams of a symbol
+    go to the same worker, so its candles and order book live in one process,
+    and each symbol goes to the worker with the fewest streams so far.
+    """
+    groups = {}
+
+    for stream in streams:
+        groups.setdefault(stream_symbol(stream), []).append(stream)
+
+    assignments = [[] for _ in range(min(workers, len(groups)))]
+
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(assignments, key=len).extend(group)
+
+    return assignments
+
+
+def _interrupt(signum, frame):
+    # Only the first SIGTERM interrupts, so the shutdown flush it starts is
+    # not cut short by another one.
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def run_worker(worker_id, streams, options, connection):
+    """
+    Entry point of a worker process: a fresh interpreter with its own event
+    loop and database and channel layer connections, running the ingest
+    command for its share of the streams.
+    """
+    import django
+    django.setup()
+
+    from binance_websocket.management.commands.binance_websocket_client import Command
+
+    # Ctrl+C reaches the whole process group; shutdown is left to the
+    # supervisor, which sends SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    def report(summary):
+        try:
+            connection.send(dict(summary, metrics=REGISTRY.collect()))
+        except OSError:
+            pass
+
+    logger.info(f"Worker {worker_id} starting with {len(streams)} streams")
+    options = dict(options, stats_interval=WORKER_HEARTBEAT_INTERVAL)
+    Command().run_streams(streams, options, stats_reporter=report)
+
+
+class WorkerSlot:
+
+    def __init__(self, worker_id, streams):
+        self.worker_id = worker_id
+        self.streams = streams
+        self.process = None
+        self.reader = None
+        self.last_seen = None
+        self.start_after = 0.0
+        self.restarts = 0
+
+
+class Supervisor:
+    """
+    Runs one worker process per stream assignment and keeps them running.
+    A worker that exits, or whose heartbeats stop for ``stall_timeout``
+    seconds, is killed and a new process is started for its streams after
+    ``restart_delay``. Throughput reported by the workers is merged and
+    logged every ``stats_interval`` seconds; the metrics sent along with it
+    are kept per worker for ``collect_metrics``.
+    """
+
+    def __init__(self, assignments, options, target=run_worker, stall_timeout=DEFAULT_STALL_TIMEOUT,
+                 stats_interval=None, restart_delay=RESTART_DELAY, context=None):
+        self.slots = [WorkerSlot(worker_id, streams) for worker_id, streams in enumerate(assignments)]
+        self.options = options
+        self.target = target
+        self.stall_timeout = stall_timeout
+        self.stats_interval = stats_interval
+        self.restart_delay = restart_delay
+        self.context = context or multiprocessing.get_context('spawn')
+        self.throughput = ThroughputStats()
+        self.worker_metrics = {}
+        self.reported_at = time.monotonic()
+        self.running = False
+
+    def start_worker(self, slot, now):
+        reader, writer = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=self.target,
+            args=(slot.worker_id, slot.streams, self.options, writer),
+            name=f"binance-ingest-{slot.worker_id}",
+        )
+        process.start()
+        writer.close()
+
+        slot.process, slot.reader, slot.last_seen = process, reader, now
+        logger.info(f"Started worker {slot.worker_id} (pid {process.pid}) for {len(slot.streams)} streams")
+
+    def stop_worker(self, slot, timeout=SHUTDOWN_TIMEOUT, terminate=True):
+        process = slot.process
+
+        if process.exitcode is None:
+            if terminate:
+                process.terminate()
+            process.join(timeout)
+
+            if process.exitcode is None:
+                process.kill()
+                process.join()
+
+        if slot.reader is not None:
+            slot.reader.close()
+
+        slot.process = slot.reader = None
+
+    def receive(self, timeout):
+        readers = {slot.reader: slot for slot in self.slots if slot.reader is not None}
+
+        if not readers:
+            time.sleep(timeout)
+            return
+
+        for reader in wait(list(readers), timeout):
+            slot = readers[reader]
+
+            try:
+                summary = reader.recv()
+            except (EOFError, OSError):
+                reader.close()
+                slot.reader = None
+                continue
+
+            slot.last_seen = time.monotonic()
+            metrics = summary.pop('metrics', None)
+
+            if metrics is not None:
+                self.worker_metrics[slot.worker_id] = metrics
+
+            self.throughput.add_summary(summary)
+
+    def check_workers(self, now):
+        for slot in self.slots:
+            process = slot.process
+
+            if process is None:
+                if now >= slot.start_after:
+                    self.start_worker(slot, now)
+                continue
+
+            if process.exitcode is not None:
+                logger.warning(
+                    f"Worker {slot.worker_id} (pid {process.pid}) exited with code {process.exitcode}, restarting"
+                )
+            elif now - slot.last_seen > self.stall_timeout:
+                logger.warning(
+                    f"Worker {slot.worker_id} (pid {process.pid}) sent no heartbeat for "
+                    f"{now - slot.last_seen:.0f}s, restarting"
+                )
+            else:
+                continue
+
+            self.stop_worker(slot)
+            WORKER_RESTARTS.inc()
+            slot.restarts += 1
+            slot.start_after = now + self.restart_delay
+
+    def report(self, now):
+        if self.stats_interval and now - self.reported_at >= self.stats_interval:
+            logger.info(format_throughput_summary(self.throughput.summary()))
+            self.reported_at = now
+
+    def collect_metrics(self):
+        """
+        The latest metrics from each worker, labelled with its worker id,
+        and the supervisor's own as ``worker="supervisor"``. Called from the
+        metrics server thread.
+        """
+        workers = [
+            add_label(families, 'worker', str(worker_id))
+            for worker_id, families in sorted(list(self.worker_metrics.items()))
+        ]
+        return merge_families(add_label(REGISTRY.collect(), 'worker', 'supervisor'), *workers)
+
+    def run_once(self, timeout=POLL_INTERVAL):
+        self.receive(timeout)
+        now = time.monotonic()
+        self.check_workers(now)
+        self.report(now)
+
+    def run(self):
+        self.running = True
+
+        try:
+            while self.running:
+                self.run_once()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.running = False
+        slots = [slot for slot in self.slots if slot.process is not None]
+
+        # Signal every worker first so they flush their buffers in parallel.
+        for slot in slots:
+            if slot.process.exitcode is None:
+                slot.process.terminate()
+
+        for slot in slots:
+            self.stop_worker(slot, terminate=False)
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from binance_websocket.tests.utils import IN_MEMORY_CHANNEL_LAYERS
+
+from binance_websocket.benchmarks import (
+    SCENARIO_NAMES,
+    compare_reports,
+    encode_frames,
+    generate_trades,
+    run_benchmarks,
+    summarize_latencies,
+)
+from binance_websocket.decoding import get_decoder
+
+def report_for(messages_per_second, p99):
+    return {'results': {'process': {'messages_per_second': messages_per_second, 'latency_us': {'p99': p99}}}}
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestBenchmarks(SimpleTestCase):
+
+    def test_generated_frames_decode_as_trades(self):
+        trades = list(generate_trades(50, ["BTCUSDT", "XRPUSDT"], seed=3))
+        self.assertEqual(trades, list(generate_trades(50, ["BTCUSDT", "XRPUSDT"], seed=3)))
+
+        decoder = get_decoder('json')
+        records = [decoder.decode_trade(frame) for frame in encode_frames(trades, combined=True)]
+
+        self.assertEqual({record.ticker_symbol for record in records}, {"BTCUSDT", "XRPUSDT"})
+        self.assertEqual(records[0].stream, f"{records[0].ticker_symbol.lower()}@trade")
+        self.assertTrue(all(len(record.price_text.split('.')[1]) == 8 for record in records))
+
+    def test_latency_summary(self):
+        summary = summarize_latencies([1000 * value for value in range(1, 1001)])
+
+        self.assertEqual(summary['p50'], 501.0)
+        self.assertEqual(summary['p99'], 990.0)
+        self.assertEqual(summary['max'], 1000.0)
+        self.assertEqual(summary['mean'], 500.5)
+
+    async def test_run_every_scenario(self):
+        frames = encode_frames(generate_trades(200))
+        results = await run_benchmarks(frames, SCENARIO_NAMES, {'batch_size': 50}, warmup=10, memory_sample=20)
+
+        self.assertEqual(list(results), list(SCENARIO_NAMES))
+
+        for result in results.values():
+            self.assertEqual(result['messages'], 200)
+            self.assertGreater(result['messages_per_second'], 0)
+            self.assertLessEqual(result['latency_us']['p50'], result['latency_us']['max'])
+            self.assertEqual(result['memory']['sampled_messages'], 20)
+
+    def test_compare_reports(self):
+        baseline = report_for(1000.0, 10.0)
+
+        self.assertEqual(compare_reports(baseline, report_for(950.0, 10.5)), [])
+
+        regressions = compare_reports(baseline, report_for(800.0, 12.0))
+        self.assertEqual([regression['metric'] for regression in regressions], ['messages_per_second', 'p99_us'])
+        self.assertAlmostEqual(regressions[0]['change'], -0.2)
+
+    def test_command_writes_and_compares_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            out = StringIO()
+
+            call_command('benchmark_ingest', messages=100, warmup=0, memory_sample=0, scenarios='decode,parse', output=path, stdout=out)
+
+            with open(path) as results_file:
+                report = json.load(results_file)
+
+            self.assertEqual(list(report['results']), ['decode', 'parse'])
+            self.assertEqual(report['frames']['count'], 100)
+            self.assertIn('msgs/s', out.getvalue())
+
+            report['results']['decode']['messages_per_second'] *= 1000
+
+            with open(path, 'w') as results_file:
+                json.dump(report, results_file)
+
+            with self.assertRaisesRegex(CommandError, 'regression'):
+                call_command('benchmark_ingest', messages=100, warmup=0, memory_sample=0, scenarios='decode', compare=path, stdout=StringIO())
@@ -0,0 +1,183 @@
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock
+
+from binance_websocket.tests.utils import async_test, create_sample_trade
+
+from binance_websocket.candles import CandleBuilder, interval_ms, parse_intervals
+from binance_websocket.decoding import TradeRecord
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.writers import insert_candles
+
+START_MS = 1598520000000
+
+def make_trade(offset_ms, price="100.00", quantity="1.0", symbol="BTCUSDT"):
+    message = create_sample_trade(symbol=symbol, price=price, quantity=quantity)
+    message["T"] = START_MS + offset_ms
+    return TradeRecord.from_message(message)
+
+class TestIntervals(unittest.TestCase):
+
+    def test_interval_ms(self):
+        self.assertEqual(interval_ms("1s"), 1000)
+        self.assertEqual(interval_ms("5m"), 300000)
+        self.assertEqual(interval_ms("1d"), 86400000)
+
+    def test_parse_intervals(self):
+        self.assertEqual(parse_intervals("1h, 1s,1m,1s"), ["1s", "1m", "1h"])
+
+        for spec in ("1w", "m", "0s", "-1m"):
+            with self.assertRaises(ValueError):
+                parse_intervals(spec)
+
+
+class TestCandleBuilder(unittest.TestCase):
+
+    def test_bar_aggregates_trades(self):
+        builder = CandleBuilder(["1m"])
+
+        builder.add(make_trade(1000, price="100.00", quantity="1.0"))
+        builder.add(make_trade(2000, price="105.00", quantity="0.5"))
+        builder.add(make_trade(3000, price="99.00", quantity="2.0"))
+        builder.add(make_trade(4000, price="101.00", quantity="0.25"))
+
+        closed, updated = builder.drain()
+
+        self.assertEqual(closed, [])
+        bar = updated[0]
+        self.assertEqual((bar.open, bar.high, bar.low, bar.close), (Decimal("100.00"), Decimal("105.00"), Decimal("99.00"), Decimal("101.00")))
+        self.assertEqual(bar.volume, Decimal("3.75"))
+        self.assertEqual(bar.trade_count, 4)
+        self.assertEqual(bar.open_time_ms, START_MS)
+
+    def test_trade_in_next_bar_closes_previous_and_fills_gaps(self):
+        builder = CandleBuilder(["1s"])
+
+        builder.add(make_trade(100, price="100.00"))
+        builder.add(make_trade(3500, price="102.00"))
+
+        closed, updated = builder.drain()
+
+        self.assertEqual([bar.open_time_ms - START_MS for bar in closed], [0, 1000, 2000])
+        self.assertTrue(all(bar.closed for bar in closed))
+        self.assertEqual(closed[1].trade_count, 0)
+        self.assertEqual(closed[1].volume, 0)
+        self.assertEqual(closed[2].close, Decimal("100.00"))
+        self.assertEqual(updated[0].open, Decimal("102.00"))
+        self.assertEqual(updated[0].open_time_ms, START_MS + 3000)
+
+    def test_close_due_without_trades(self):
+        builder = CandleBuilder(["1s", "1m"], grace_ms=500)
+        builder.add(make_trade(100))
+        builder.drain()
+
+        builder.close_due(START_MS + 1400)
+        self.assertEqual(builder.drain()[0], [])
+
+        builder.close_due(START_MS + 2600)
+        closed, updated = builder.drain()
+
+        self.assertEqual([(bar.interval, bar.open_time_ms - START_MS) for bar in closed], [("1s", 0), ("1s", 1000)])
+        self.assertEqual(updated, [])
+
+    def test_first_bar_is_partial(self):
+        builder = CandleBuilder(["1s"])
+        builder.add(make_trade(500))
+        builder.add(make_trade(1500))
+
+        closed, updated = builder.drain()
+
+        self.assertTrue(closed[0].partial)
+        self.assertFalse(updated[0].partial)
+        self.assertTrue(closed[0].to_message()["partial"])
+
+    def test_close_open_closes_bars_as_partial(self):
+        builder = CandleBuilder(["1s"])
+        builder.add(make_trade(100))
+        builder.add(make_trade(1100))
+        builder.drain()
+
+        builder.close_open()
+        closed, updated = builder.drain()
+
+        self.assertEqual([bar.open_time_ms - START_MS for bar in closed], [1000])
+        self.assertTrue(closed[0].closed and closed[0].partial)
+        self.assertEqual(updated, [])
+
+        builder.add(make_trade(5100))
+        closed, updated = builder.drain()
+
+        self.assertEqual(closed, [])
+        self.assertEqual(updated[0].open_time_ms, START_MS + 5000)
+        self.assertTrue(updated[0].partial)
+
+    def test_late_trades_are_counted(self):
+        builder = CandleBuilder(["1s"])
+        builder.add(make_trade(2500))
+        builder.add(make_trade(100))
+
+        self.assertEqual(builder.late_trades, 1)
+
+    def test_long_gap_jumps_ahead(self):
+        builder = CandleBuilder(["1s"], max_gap_bars=10)
+        builder.add(make_trade(100))
+        builder.add(make_trade(3600 * 1000 + 100))
+
+        closed, updated = builder.drain()
+
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(updated[0].open_time_ms, START_MS + 3600 * 1000)
+
+
+class TestCandleClient(unittest.TestCase):
+
+    @async_test
+    async def test_bars_are_persisted_and_published(self):
+        client = BinanceWebSocketClient(candle_intervals=["1s"])
+        client.channel_layer = AsyncMock()
+        first = create_sample_trade(trade_id=1)
+        second = dict(create_sample_trade(trade_id=2), T=first["T"] + 1000)
+
+        with patch.object(client, 'save_to_database', new_callable=AsyncMock):
+            with patch.object(client, 'send_to_channel_layer', new_callable=AsyncMock):
+                with patch.object(client, 'save_candles', new_callable=AsyncMock) as mock_save:
+                    await client.process_message(json.dumps(first))
+                    await client.process_message(json.dumps(second))
+                    await client.flush_candles()
+
+        saved = mock_save.call_args[0][0]
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(saved[0].trade_count, 1)
+
+        groups = [call[0][0] for call in client.channel_layer.group_send.call_args_list]
+        self.assertEqual(groups, ["binance.kline_1s.BTCUSDT", "binance.kline_1s.BTCUSDT"])
+        published = [json.loads(call[0][1]['text'])['message'] for call in client.channel_layer.group_send.call_args_list]
+        self.assertEqual([message['closed'] for message in published], [True, False])
+
+
+class TestInsertCandles(unittest.TestCase):
+
+    @patch('binance_websocket.writers.close_old_connections')
+    @patch('binance_websocket.writers.Candle')
+    def test_complete_bars_are_upserted_and_partial_bars_never_overwrite(self, mock_model, mock_close):
+        builder = CandleBuilder(["1s"])
+        builder.add(make_trade(100))
+        builder.add(make_trade(1100))
+        builder.close_open()
+        builder.add(make_trade(5100))
+        builder.close_due(START_MS + 10000)
+        closed, _ = builder.drain()
+
+        insert_candles(closed)
+
+        complete_call, partial_call = mock_model.objects.bulk_create.call_args_list
+        self.assertTrue(complete_call.kwargs['update_conflicts'])
+        self.assertIn('is_partial', complete_call.kwargs['update_fields'])
+        self.assertEqual(len(complete_call.args[0]), len(closed) - 3)
+        self.assertTrue(partial_call.kwargs['ignore_conflicts'])
+        self.assertEqual(len(partial_call.args[0]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import glob
+import gzip
+import json
+import os
+import tempfile
+import zlib
+from unittest.mock import AsyncMock
+
+from django.test import SimpleTestCase
+
+from binance_websocket.tests.utils import create_sample_trade
+
+from binance_websocket.capture import SEGMENT_SUFFIX, CaptureWriter, frame_symbol, read_index, read_segment
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+
+def trade_frames(count, symbols=("BTCUSDT", "ETHUSDT")):
+    return [
+        json.dumps({"stream": f"{symbols[index % len(symbols)].lower()}@trade",
+                    "data": create_sample_trade(symbol=symbols[index % len(symbols)], trade_id=index)})
+        for index in range(count)
+    ]
+
+class TestCapture(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"*{SEGMENT_SUFFIX}")))
+
+    def test_frames_round_trip_with_index(self):
+        frames = trade_frames(100)
+        capture = CaptureWriter(self.directory, block_bytes=2000)
+        capture.start()
+
+        for frame in frames:
+            capture.write(frame)
+
+        capture.close()
+
+        [segment] = self.segments()
+        captured = list(read_segment(segment))
+        self.assertEqual([frame for _, frame in captured], frames)
+        self.assertEqual([received for received, _ in captured], sorted(received for received, _ in captured))
+
+        index = read_index(segment)
+        self.assertEqual(index['frames'], 100)
+        self.assertEqual(index['symbols']['BTCUSDT'][2], 50)
+        self.assertEqual(index['symbols']['ETHUSDT'][2], 50)
+        self.assertEqual((index['first_ns'], index['last_ns']), (captured[0][0], captured[-1][0]))
+        self.assertGreater(len(index['blocks']), 1)
+
+        with open(segment, 'rb') as segment_file:
+            data = segment_file.read()
+
+        block = index['blocks'][1]
+        lines = zlib.decompress(data[block['offset']:block['offset'] + block['length']], 31).decode().splitlines()
+        self.assertEqual(len(lines), block['frames'])
+        self.assertEqual(int(lines[0].split('\t', 1)[0]), block['first_ns'])
+
+    def test_segments_rotate_by_size(self):
+        capture = CaptureWriter(self.directory, segment_bytes=500, block_bytes=1000)
+        capture.start()
+
+        for frame in trade_frames(60):
+            capture.write(frame)
+
+        capture.close()
+
+        segments = self.segments()
+        self.assertGreater(len(segments), 1)
+        self.assertEqual(capture.segments, segments)
+        self.assertEqual(sum(read_index(segment)['frames'] for segment in segments), 60)
+
+        with gzip.open(segments[0], 'rt') as segment_file:
+            self.assertTrue(segment_file.readline().split('\t', 1)[0].isdigit())
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        capture = CaptureWriter(self.directory, queue_size=2)
+
+        for frame in trade_frames(5):
+            capture.write(frame)
+
+        self.assertEqual(capture.frames_dropped, 3)
+
+    def test_frame_symbol(self):
+        self.assertEqual(frame_symbol(trade_frames(1)[0]), "BTCUSDT")
+        self.assertIsNone(frame_symbol('{"result":null,"id":1}'))
+
+    async def test_client_captures_received_frames(self):
+        frames = trade_frames(3)
+        capture = CaptureWriter(self.directory)
+        capture.start()
+        client = BinanceWebSocketClient(capture=capture)
+        client.process_message = AsyncMock()
+
+        async def connection():
+            for frame in frames:
+                yield frame
+
+        await client.receive_messages(connection())
+        capture.close()
+
+        self.assertEqual(client.process_message.call_count, 3)
+        self.assertEqual([frame for _, frame in read_segment(self.segments()[0])], frames)
@@ -0,0 +1,68 @@
+import json
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from binance_websocket.tests.utils import async_test, create_sample_trade
+
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.conflation import Conflator
+from binance_websocket.decoding import TradeRecord
+
+def make_trade(symbol="BTCUSDT", price="100.00", quantity="1.0", trade_id=1):
+    return TradeRecord.from_message(create_sample_trade(symbol=symbol, price=price, quantity=quantity, trade_id=trade_id))
+
+class TestConflator(unittest.TestCase):
+
+    def test_window_aggregates_trades(self):
+        conflator = Conflator(0.1)
+
+        conflator.add(make_trade(price="100.00", quantity="1.0", trade_id=1))
+        conflator.add(make_trade(price="105.50", quantity="0.5", trade_id=2))
+        conflator.add(make_trade(price="99.00", quantity="2.0", trade_id=3))
+        conflator.add(make_trade(price="101.00", quantity="0.25", trade_id=4))
+        conflator.add(make_trade(symbol="ETHUSDT", price="2000.00"))
+
+        windows = {window.ticker_symbol: window.to_message() for window in conflator.drain()}
+
+        self.assertEqual(windows["BTCUSDT"]["price"], "101.00")
+        self.assertEqual(windows["BTCUSDT"]["volume"], "3.75")
+        self.assertEqual(windows["BTCUSDT"]["trade_count"], 4)
+        self.assertEqual(windows["BTCUSDT"]["high"], "105.50")
+        self.assertEqual(windows["BTCUSDT"]["low"], "99.00")
+        self.assertEqual(windows["ETHUSDT"]["trade_count"], 1)
+        self.assertEqual(len(conflator), 0)
+
+    def test_raw_symbols(self):
+        conflator = Conflator(0.1, raw_symbols=["btcusdt", " ethusdt", ""])
+
+        self.assertTrue(conflator.is_raw("BTCUSDT"))
+        self.assertTrue(conflator.is_raw("ETHUSDT"))
+        self.assertFalse(conflator.is_raw("BNBUSDT"))
+
+
+class TestConflatingClient(unittest.TestCase):
+
+    @async_test
+    async def test_burst_is_published_once_per_symbol(self):
+        client = BinanceWebSocketClient(conflate_window=0.05, raw_symbols=["ETHUSDT"])
+
+        with patch.object(client, 'save_to_database', new_callable=AsyncMock):
+            with patch.object(client, 'broadcast', new_callable=AsyncMock) as mock_broadcast:
+                for i in range(10):
+                    await client.process_message(json.dumps(create_sample_trade(trade_id=i)))
+                await client.process_message(json.dumps(create_sample_trade(symbol="ETHUSDT")))
+
+                self.assertEqual(mock_broadcast.call_count, 1)
+                self.assertEqual(mock_broadcast.call_args[0][0]["ticker_symbol"], "ETHUSDT")
+
+                await client.publish_conflated()
+
+                self.assertEqual(mock_broadcast.call_count, 2)
+                message = mock_broadcast.call_args[0][0]
+                self.assertEqual(message["ticker_symbol"], "BTCUSDT")
+                self.assertEqual(message["trade_count"], 10)
+                self.assertTrue(message["conflated"])
+
+
+if __name__ == "__main__":
+    unittest.main()
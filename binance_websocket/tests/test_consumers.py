@@ -0,0 +1,170 @@
+import json
+import unittest
+from unittest.mock import AsyncMock
+
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, override_settings
+
+from binance_websocket.tests.utils import IN_MEMORY_CHANNEL_LAYERS, WebsocketCommunicator, async_test, create_sample_trade
+
+from binance_websocket.consumers import BinanceConsumer
+from binance_websocket.decoding import TradeRecord
+from binance_websocket.encoding import WIRE_STRUCT, DeltaStructDecoder, broadcast_event
+from binance_websocket.groups import (
+    ALL_GROUP,
+    BROADCAST_ALL,
+    BROADCAST_BOTH,
+    BROADCAST_SYMBOL,
+    broadcast_groups,
+    stream_channel,
+    symbol_group,
+)
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+
+def trade_event(symbol):
+    return {
+        "type": "binance_message",
+        "message": {"ticker_symbol": symbol, "price": "1.0", "volume": "1.0", "trade_time": "2020-08-27T09:20:03+00:00"},
+    }
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestBinanceConsumer(SimpleTestCase):
+
+    async def connect(self, subprotocols=None):
+        communicator = WebsocketCommunicator(BinanceConsumer.as_asgi(), "/ws/binance/", subprotocols)
+        connected, self.accept_event = await communicator.connect()
+        self.assertTrue(connected)
+        welcome = await communicator.receive_json_from()
+        self.assertEqual(welcome['type'], 'connection_established')
+        return communicator
+
+    async def test_new_connection_receives_all_symbols(self):
+        communicator = await self.connect()
+        channel_layer = get_channel_layer()
+
+        await channel_layer.group_send(ALL_GROUP, trade_event("ETHUSDT"))
+
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['message']['ticker_symbol'], "ETHUSDT")
+        await communicator.disconnect()
+
+    async def test_subscribe_moves_to_symbol_groups(self):
+        communicator = await self.connect()
+        channel_layer = get_channel_layer()
+
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["btcusdt"]})
+        reply = await communicator.receive_json_from()
+        self.assertFalse(reply['all'])
+        self.assertEqual(reply['groups'], [symbol_group("BTCUSDT")])
+
+        await channel_layer.group_send(ALL_GROUP, trade_event("ETHUSDT"))
+        await channel_layer.group_send(symbol_group("BTCUSDT"), trade_event("BTCUSDT"))
+
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['message']['ticker_symbol'], "BTCUSDT")
+        self.assertTrue(await communicator.receive_nothing())
+
+        await communicator.send_json_to({"action": "unsubscribe", "symbols": ["BTCUSDT"]})
+        reply = await communicator.receive_json_from()
+        self.assertEqual(reply['groups'], [])
+
+        await channel_layer.group_send(symbol_group("BTCUSDT"), trade_event("BTCUSDT"))
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_wildcard_rejoins_all_symbols(self):
+        communicator = await self.connect()
+
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["BTCUSDT"], "channels": ["trade", "depth"]})
+        reply = await communicator.receive_json_from()
+        self.assertEqual(len(reply['groups']), 2)
+
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["*"]})
+        reply = await communicator.receive_json_from()
+        self.assertTrue(reply['all'])
+        self.assertEqual(len(reply['groups']), 2)
+        await communicator.disconnect()
+
+    async def test_preserialized_event_is_forwarded_unchanged(self):
+        communicator = await self.connect()
+        channel_layer = get_channel_layer()
+        event = broadcast_event({"ticker_symbol": "BTCUSDT", "price": "1.0"})
+
+        await channel_layer.group_send(ALL_GROUP, event)
+
+        self.assertEqual(await communicator.receive_from(), event['text'])
+        self.assertEqual(json.loads(event['text']), {
+            "type": "binance_message",
+            "message": {"ticker_symbol": "BTCUSDT", "price": "1.0"},
+        })
+        await communicator.disconnect()
+
+    async def test_invalid_subscription(self):
+        communicator = await self.connect()
+
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["btc usdt!"]})
+        reply = await communicator.receive_json_from()
+        self.assertEqual(reply['type'], 'error')
+        await communicator.disconnect()
+
+    async def test_struct_subprotocol_receives_binary_frames(self):
+        communicator = await self.connect(subprotocols=["v2.unknown", WIRE_STRUCT])
+        self.assertEqual(self.accept_event['subprotocol'], WIRE_STRUCT)
+        channel_layer = get_channel_layer()
+        fields = {'s': "BTCUSDT", 'p': "11850.15", 'q': "0.1", 'T': 1598520003276}
+
+        await channel_layer.group_send(ALL_GROUP, broadcast_event(trade_event("BTCUSDT")['message'], fields))
+
+        frame = await communicator.receive_bytes_from()
+        self.assertEqual(DeltaStructDecoder().decode(frame), fields)
+        await communicator.disconnect()
+
+    async def test_unknown_subprotocol_falls_back_to_json(self):
+        communicator = await self.connect(subprotocols=["v2.unknown"])
+        self.assertIsNone(self.accept_event.get('subprotocol'))
+        channel_layer = get_channel_layer()
+        fields = {'s': "BTCUSDT", 'p': "1.0", 'q': "1.0", 'T': 1598520003276}
+
+        await channel_layer.group_send(ALL_GROUP, broadcast_event(trade_event("BTCUSDT")['message'], fields))
+
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['message']['ticker_symbol'], "BTCUSDT")
+        await communicator.disconnect()
+
+    async def test_other_text_is_echoed(self):
+        communicator = await self.connect()
+
+        await communicator.send_to(text_data="hello")
+        reply = json.loads(await communicator.receive_from())
+        self.assertEqual(reply, {'type': 'echo', 'message': 'Received: hello'})
+        await communicator.disconnect()
+
+
+class TestBroadcastGroups(unittest.TestCase):
+
+    def test_symbol_group(self):
+        self.assertEqual(symbol_group("btcusdt"), "binance.trade.BTCUSDT")
+        self.assertEqual(symbol_group("BTCUSDT", "depth@100ms"), "binance.depth_100ms.BTCUSDT")
+
+    def test_broadcast_groups(self):
+        self.assertEqual(broadcast_groups("BTCUSDT"), ["binance.trade.BTCUSDT"])
+        self.assertEqual(broadcast_groups("BTCUSDT", mode=BROADCAST_ALL), [ALL_GROUP])
+        self.assertEqual(broadcast_groups("BTCUSDT", mode=BROADCAST_BOTH), [ALL_GROUP, "binance.trade.BTCUSDT"])
+
+    def test_stream_channel(self):
+        self.assertEqual(stream_channel("btcusdt@aggTrade"), "aggTrade")
+        self.assertEqual(stream_channel(None), "trade")
+
+    @async_test
+    async def test_client_publishes_to_symbol_group(self):
+        client = BinanceWebSocketClient(broadcast_mode=BROADCAST_SYMBOL)
+        client.channel_layer = AsyncMock()
+        trade = TradeRecord.from_message(create_sample_trade(symbol="ETHUSDT"), stream="ethusdt@trade")
+
+        await client.send_to_channel_layer(trade)
+
+        client.channel_layer.group_send.assert_called_once()
+        group, event = client.channel_layer.group_send.call_args[0]
+        self.assertEqual(group, "binance.trade.ETHUSDT")
+        self.assertEqual(json.loads(event['text'])['message']['ticker_symbol'], "ETHUSDT")
+        self.assertEqual(event['fields'], {'s': "ETHUSDT", 'p': "11850.15", 'q': "0.1", 'T': 1598520003276})
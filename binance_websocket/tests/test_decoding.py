@@ -0,0 +1,122 @@
+import datetime
+import json
+import pickle
+import unittest
+from decimal import Decimal
+
+from binance_websocket.tests.utils import create_sample_trade, SAMPLE_TRADE_MESSAGE
+
+from binance_websocket.decoding import (
+    DecodeError,
+    JsonDecoder,
+    TradeFormatError,
+    TradeRecord,
+    available_decoders,
+    get_decoder,
+    msgspec,
+    orjson,
+)
+
+class TestTradeRecord(unittest.TestCase):
+
+    def test_from_message(self):
+        trade = TradeRecord.from_message(SAMPLE_TRADE_MESSAGE, stream="btcusdt@trade")
+
+        self.assertEqual(trade.ticker_symbol, "BTCUSDT")
+        self.assertEqual(trade.price, Decimal("11850.15"))
+        self.assertEqual(trade.volume, Decimal("0.1"))
+        self.assertEqual(trade.trade_time, datetime.datetime(2020, 8, 27, 9, 20, 3, 276000, tzinfo=datetime.timezone.utc))
+        self.assertEqual(trade.stream, "btcusdt@trade")
+        self.assertFalse(hasattr(trade, '__dict__'))
+
+    def test_item_access(self):
+        trade = TradeRecord.from_message(SAMPLE_TRADE_MESSAGE)
+
+        self.assertEqual(trade['trade_id'], 12345)
+        self.assertEqual(trade['price'], Decimal("11850.15"))
+        self.assertIsNone(trade.get('raw_data'))
+
+        with self.assertRaises(KeyError):
+            trade['raw_data']
+
+    def test_missing_field(self):
+        with self.assertRaises(TradeFormatError):
+            TradeRecord.from_message({"e": "depthUpdate", "s": "BTCUSDT"})
+
+    def test_pickle_round_trip(self):
+        trade = TradeRecord.from_message(SAMPLE_TRADE_MESSAGE)
+
+        restored = pickle.loads(pickle.dumps(trade))
+
+        self.assertEqual(restored.price_text, trade.price_text)
+        self.assertEqual(restored.trade_time_ms, trade.trade_time_ms)
+
+
+class DecoderTestMixin:
+
+    backend = None
+
+    def setUp(self):
+        self.decoder = get_decoder(self.backend)
+
+    def test_decode_trade(self):
+        trade = self.decoder.decode_trade(json.dumps(create_sample_trade(trade_id=7)))
+
+        self.assertEqual(trade.trade_id, 7)
+        self.assertEqual(trade.price_text, "11850.15")
+        self.assertIsNone(trade.stream)
+
+    def test_decode_combined_trade(self):
+        frame = json.dumps({"stream": "ethusdt@trade", "data": create_sample_trade(symbol="ETHUSDT")})
+
+        trade = self.decoder.decode_trade(frame)
+
+        self.assertEqual(trade.ticker_symbol, "ETHUSDT")
+        self.assertEqual(trade.stream, "ethusdt@trade")
+
+    def test_decode_bytes(self):
+        trade = self.decoder.decode_trade(json.dumps(SAMPLE_TRADE_MESSAGE).encode())
+
+        self.assertEqual(trade.ticker_symbol, "BTCUSDT")
+
+    def test_invalid_json(self):
+        with self.assertRaises(DecodeError):
+            self.decoder.decode_trade("{not json")
+
+    def test_non_trade_frame(self):
+        with self.assertRaises(TradeFormatError):
+            self.decoder.decode_trade(json.dumps({"result": None, "id": 1}))
+
+
+class TestJsonDecoder(DecoderTestMixin, unittest.TestCase):
+    backend = 'json'
+
+
+@unittest.skipUnless(orjson, "orjson is not installed")
+class TestOrjsonDecoder(DecoderTestMixin, unittest.TestCase):
+    backend = 'orjson'
+
+
+@unittest.skipUnless(msgspec, "msgspec is not installed")
+class TestMsgspecDecoder(DecoderTestMixin, unittest.TestCase):
+    backend = 'msgspec'
+
+
+class TestGetDecoder(unittest.TestCase):
+
+    def test_auto_picks_installed_backend(self):
+        decoder = get_decoder('auto')
+
+        self.assertEqual(decoder.name, available_decoders()[0])
+
+    def test_stdlib_is_always_available(self):
+        self.assertIn('json', available_decoders())
+        self.assertIsInstance(get_decoder('json'), JsonDecoder)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_decoder('simdjson')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from binance_websocket.encoding import (
+    WIRE_JSON,
+    WIRE_MSGPACK,
+    WIRE_STRUCT,
+    DeltaStructDecoder,
+    DeltaStructEncoder,
+    broadcast_event,
+    msgpack,
+    negotiate_wire_format,
+)
+
+class TestDeltaStructEncoding(unittest.TestCase):
+
+    def test_round_trip(self):
+        encoder = DeltaStructEncoder()
+        decoder = DeltaStructDecoder()
+        trades = [
+            {'s': "BTCUSDT", 'p': "11850.15000000", 'q': "0.10000000", 'T': 1598520003276},
+            {'s': "BTCUSDT", 'p': "11849.99000000", 'q': "1.50000000", 'T': 1598520003277},
+            {'s': "ETHUSDT", 'p': "390.1", 'q': "0.00000001", 'T': 1598520003278},
+            {'s': "BTCUSDT", 'p': "11851", 'q': "2", 'T': 1598520003279},
+        ]
+
+        for trade in trades:
+            self.assertEqual(decoder.decode(encoder.encode(trade)), trade)
+
+    def test_price_is_delta_encoded(self):
+        encoder = DeltaStructEncoder()
+        first = encoder.encode({'s': "BTCUSDT", 'p': "11850.15000000", 'q': "0.1", 'T': 1598520003276})
+        second = encoder.encode({'s': "BTCUSDT", 'p': "11850.16000000", 'q': "0.1", 'T': 1598520003277})
+
+        self.assertLess(len(second), len(first))
+        self.assertLess(len(second), 25)
+
+    def test_conflated_window(self):
+        window = {
+            's': "BTCUSDT", 'p': "101.00", 'q': "3.75", 'T': 1598520003276,
+            'n': 4, 'h': "105.5", 'l': "99.00",
+        }
+
+        decoded = DeltaStructDecoder().decode(DeltaStructEncoder().encode(window))
+
+        self.assertEqual(decoded, {**window, 'h': "105.50"})
+
+
+class TestWireFormats(unittest.TestCase):
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate_wire_format([WIRE_STRUCT, WIRE_JSON]), WIRE_STRUCT)
+        self.assertEqual(negotiate_wire_format(["chat", WIRE_JSON]), WIRE_JSON)
+        self.assertIsNone(negotiate_wire_format(["chat"]))
+        self.assertIsNone(negotiate_wire_format(None))
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_payload_is_packed_once(self):
+        fields = {'s': "BTCUSDT", 'p': "1.0", 'q': "2.0", 'T': 1598520003276}
+        event = broadcast_event({"ticker_symbol": "BTCUSDT"}, fields)
+
+        self.assertEqual(msgpack.unpackb(event['packed']), fields)
+        self.assertEqual(negotiate_wire_format([WIRE_MSGPACK]), WIRE_MSGPACK)
+
+    def test_event_without_fields(self):
+        self.assertNotIn('fields', broadcast_event({"ticker_symbol": "BTCUSDT"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from binance_websocket import eventloop
+from binance_websocket.eventloop import LoopLagMonitor, loop_factory, resolve_loop, run
+from binance_websocket.metrics import LOOP_LAG_SECONDS
+
+def lag_observations():
+    return sum(LOOP_LAG_SECONDS.default.counts)
+
+class TestLoopSelection(SimpleTestCase):
+
+    def test_auto_falls_back_to_asyncio_without_uvloop(self):
+        with mock.patch.object(eventloop, 'uvloop', None):
+            self.assertEqual(resolve_loop('auto'), 'asyncio')
+            self.assertIs(loop_factory('auto'), asyncio.new_event_loop)
+
+    def test_auto_prefers_uvloop(self):
+        fake_uvloop = mock.Mock()
+
+        with mock.patch.object(eventloop, 'uvloop', fake_uvloop):
+            self.assertEqual(resolve_loop('auto'), 'uvloop')
+            self.assertIs(loop_factory('auto'), fake_uvloop.new_event_loop)
+
+    def test_missing_uvloop_is_rejected(self):
+        with mock.patch.object(eventloop, 'uvloop', None):
+            with self.assertRaisesMessage(ValueError, 'not installed'):
+                loop_factory('uvloop')
+
+    def test_unknown_loop_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown event loop'):
+            loop_factory('trio')
+
+    def test_run_returns_result(self):
+        async def main():
+            return asyncio.get_running_loop()
+
+        loop = run(main(), 'asyncio')
+        self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        self.assertTrue(loop.is_closed())
+
+    def test_run_sizes_default_executor(self):
+        async def main():
+            return await asyncio.get_running_loop().run_in_executor(None, lambda: threading.current_thread().name)
+
+        self.assertTrue(run(main(), 'asyncio', executor_workers=2).startswith('binance-executor'))
+
+class TestLoopLagMonitor(SimpleTestCase):
+
+    def test_record_observes_every_sample(self):
+        monitor = LoopLagMonitor(warn_after=0.1)
+        before = lag_observations()
+
+        monitor.record(0.01)
+        monitor.record(-0.001)
+
+        self.assertEqual(lag_observations(), before + 2)
+        self.assertEqual(monitor.samples, 2)
+        self.assertEqual(monitor.max_lag, 0.01)
+        self.assertEqual(monitor.lagged, 0)
+
+    def test_warnings_are_rate_limited(self):
+        monitor = LoopLagMonitor(warn_after=0.1, warning_interval=60)
+
+        with self.assertLogs('binance_websocket_client', level='WARNING') as logs:
+            monitor.record(0.2)
+            monitor.record(0.3)
+            monitor.record(0.05)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('200ms', logs.output[0])
+        self.assertEqual(monitor.lagged, 2)
+
+    def test_zero_threshold_disables_warnings(self):
+        monitor = LoopLagMonitor(warn_after=0)
+
+        with self.assertNoLogs('binance_websocket_client', level='WARNING'):
+            monitor.record(1.0)
+
+    async def test_detects_blocking_callback(self):
+        monitor = LoopLagMonitor(interval=0.01, warn_after=0)
+        monitor.start()
+        await asyncio.sleep(0.02)
+
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        monitor.stop()
+
+        self.assertGreaterEqual(monitor.max_lag, 0.05)
+        self.assertIsNone(monitor.task)
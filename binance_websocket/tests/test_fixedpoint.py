@@ -0,0 +1,124 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+from binance_websocket.tests.utils import create_sample_trade
+
+from binance_websocket.decoding import TradeRecord
+from binance_websocket.fixedpoint import FixedPointScales, format_fixed, parse_fixed, to_decimal
+from binance_websocket.models import SymbolScale
+from binance_websocket.writers import BatchWriter, build_price_update, price_columns
+
+class TestFixedPointParsing(unittest.TestCase):
+
+    def test_parse_fixed(self):
+        self.assertEqual(parse_fixed("11850.15000000", 8), 1185015000000)
+        self.assertEqual(parse_fixed("11850.15", 2), 1185015)
+        self.assertEqual(parse_fixed("0.00001234", 8), 1234)
+        self.assertEqual(parse_fixed("42", 3), 42000)
+        self.assertEqual(parse_fixed(".5", 1), 5)
+        self.assertEqual(parse_fixed("-1.25", 2), -125)
+
+    def test_parse_fixed_rejects_lost_precision(self):
+        self.assertEqual(parse_fixed("1.2300", 2), 123)
+
+        with self.assertRaises(ValueError):
+            parse_fixed("1.234", 2)
+
+    def test_parse_fixed_overflow(self):
+        with self.assertRaises(OverflowError):
+            parse_fixed("99999999999999.0", 8)
+
+    def test_round_trip(self):
+        units = parse_fixed("11850.15", 8)
+
+        self.assertEqual(to_decimal(units, 8), Decimal("11850.15"))
+        self.assertEqual(format_fixed(1185015, 2), "11850.15")
+
+
+class TestFixedPointScales(unittest.TestCase):
+
+    def test_parse_overrides(self):
+        scales = FixedPointScales.parse("BTCUSDT=2:5, ethusdt=2:4", price_scale=8, volume_scale=8)
+
+        self.assertEqual(scales.for_symbol("BTCUSDT"), (2, 5))
+        self.assertEqual(scales.for_symbol("ETHUSDT"), (2, 4))
+        self.assertEqual(scales.for_symbol("BNBUSDT"), (8, 8))
+
+    def test_parse_invalid(self):
+        with self.assertRaises(ValueError):
+            FixedPointScales.parse("BTCUSDT=2")
+
+    def test_encode(self):
+        scales = FixedPointScales(overrides={"BTCUSDT": (2, 5)})
+
+        self.assertEqual(scales.encode("BTCUSDT", "11850.15", "0.1"), (1185015, 10000))
+
+
+class TestFixedPointStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.trade = TradeRecord.from_message(create_sample_trade())
+        self.scales = FixedPointScales(overrides={"BTCUSDT": (2, 5)})
+
+    def test_price_columns(self):
+        self.assertEqual(price_columns(self.trade), (Decimal("11850.15"), Decimal("0.1"), None, None))
+        self.assertEqual(price_columns(self.trade, self.scales), (None, None, 1185015, 10000))
+
+    def test_build_price_update(self):
+        row = build_price_update(self.trade, scales=self.scales)
+
+        self.assertIsNone(row.price)
+        self.assertEqual(row.price_units, 1185015)
+        self.assertEqual(row.volume_units, 10000)
+
+    def test_get_price_uses_symbol_scale(self):
+        row = build_price_update(self.trade, scales=self.scales)
+
+        with patch.dict(SymbolScale._cache, {("Binance", "BTCUSDT"): (2, 5)}):
+            self.assertEqual(row.get_price(), Decimal("11850.15"))
+            self.assertEqual(row.get_volume(), Decimal("0.1"))
+
+    def test_trade_finer_than_its_scale_falls_back_to_decimals(self):
+        batch = [
+            TradeRecord.from_message(create_sample_trade(trade_id=1)),
+            TradeRecord.from_message(create_sample_trade(trade_id=2, price="11850.155")),
+            TradeRecord.from_message(create_sample_trade(trade_id=3, symbol="ETHUSDT")),
+        ]
+        writer = BatchWriter(scales=self.scales)
+
+        try:
+            with self.assertLogs('binance_websocket_client', level='WARNING') as logs:
+                rows = writer.build_rows(batch)
+                writer.build_rows(batch)
+        finally:
+            writer.close()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual([row.price_units for row in rows], [1185015, None, 1185015000000])
+        self.assertEqual(rows[1].price, Decimal("11850.155"))
+        self.assertEqual(rows[1].get_price(), Decimal("11850.155"))
+
+    @patch('binance_websocket.writers.register_symbol_scales')
+    @patch('binance_websocket.writers.close_old_connections')
+    @patch('binance_websocket.writers.transaction')
+    @patch('binance_websocket.writers.connection')
+    def test_copy_writes_units(self, mock_connection, mock_transaction, mock_close, mock_register):
+        mock_connection.vendor = 'postgresql'
+        mock_connection.ops.quote_name.side_effect = lambda name: f'"{name}"'
+        cursor = MagicMock()
+        mock_connection.cursor.return_value.__enter__.return_value = cursor
+        writer = BatchWriter(copy_threshold=1, scales=self.scales)
+
+        try:
+            writer.write([self.trade])
+        finally:
+            writer.close()
+
+        mock_register.assert_called_once_with(["BTCUSDT"], self.scales, "Binance")
+        buffer = cursor.copy_expert.call_args[0][1]
+        self.assertTrue(buffer.getvalue().startswith("BTCUSDT,,,1185015,10000,"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import logging
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from binance_websocket.tests.utils import async_test, create_sample_trade
+
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.logsampling import (
+    ErrorRateLimiter,
+    LogSampler,
+    ThroughputStats,
+    format_throughput_summary,
+    truncate_frame,
+)
+
+class TestLogSampler(unittest.TestCase):
+
+    def test_sampling(self):
+        sampler = LogSampler(every=3)
+
+        self.assertEqual([sampler.should_log() for _ in range(6)], [False, False, True, False, False, True])
+
+    def test_log_everything_or_nothing(self):
+        self.assertTrue(all(LogSampler(every=1).should_log() for _ in range(5)))
+        self.assertFalse(any(LogSampler(every=0).should_log() for _ in range(5)))
+
+
+class TestErrorRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = MagicMock()
+
+    def test_suppresses_repeats_within_interval(self):
+        limiter = ErrorRateLimiter(self.logger, interval=60)
+
+        for i in range(5):
+            limiter.error('json', "Failed to parse JSON: %s", i)
+        limiter.error('database', "Error saving to database: %s", 'boom')
+
+        self.assertEqual(self.logger.log.call_count, 2)
+        self.assertEqual(limiter.suppressed, {'json': 4})
+
+    def test_reports_suppressed_count(self):
+        limiter = ErrorRateLimiter(self.logger, interval=60)
+
+        limiter.error('json', "first")
+        limiter.error('json', "second")
+        limiter.last_logged['json'] -= 120
+        limiter.error('json', "third")
+
+        self.assertEqual(self.logger.log.call_args[0], (logging.ERROR, "third (1 similar messages suppressed)"))
+
+    def test_flush(self):
+        limiter = ErrorRateLimiter(self.logger, interval=60)
+
+        limiter.error('json', "first")
+        limiter.error('json', "second")
+        limiter.flush()
+
+        self.logger.error.assert_called_once_with("1 similar 'json' messages suppressed")
+        self.assertEqual(limiter.suppressed, {})
+
+    def test_no_interval_logs_everything(self):
+        limiter = ErrorRateLimiter(self.logger)
+
+        for i in range(3):
+            limiter.error('json', "message %s", i)
+
+        self.assertEqual(self.logger.log.call_count, 3)
+
+
+class TestThroughputStats(unittest.TestCase):
+
+    def test_summary(self):
+        stats = ThroughputStats()
+        stats.record("BTCUSDT", 100)
+        stats.record("BTCUSDT", 120)
+        stats.record("ETHUSDT", 90)
+        stats.record_failure(30)
+
+        summary = stats.summary()
+
+        self.assertEqual(summary['messages'], 3)
+        self.assertEqual(summary['parse_failures'], 1)
+        self.assertEqual(summary['symbols']["BTCUSDT"]['bytes'], 220)
+        self.assertIn("BTCUSDT:", format_throughput_summary(summary))
+        self.assertEqual(stats.summary()['messages'], 0)
+
+    def test_truncate_frame(self):
+        self.assertEqual(truncate_frame("short"), "short")
+        self.assertEqual(truncate_frame("x" * 300, limit=10), "xxxxxxxxxx... (300 chars)")
+        self.assertEqual(truncate_frame(b"bytes"), "bytes")
+
+
+class TestClientLogging(unittest.TestCase):
+
+    @async_test
+    async def test_trade_logs_are_sampled(self):
+        client = BinanceWebSocketClient(trade_log_every=2, stats_interval=10)
+
+        with patch.object(client, 'save_to_database', new_callable=AsyncMock):
+            with patch.object(client, 'send_to_channel_layer', new_callable=AsyncMock):
+                with self.assertLogs('binance_websocket_client', level='INFO') as logs:
+                    for i in range(4):
+                        await client.process_message(json.dumps(create_sample_trade(trade_id=i)))
+                    await client.process_message("{not json")
+
+        trade_lines = [line for line in logs.output if 'Trade:' in line]
+        self.assertEqual(len(trade_lines), 2)
+
+        summary = client.throughput.summary()
+        self.assertEqual(summary['symbols']["BTCUSDT"]['messages'], 4)
+        self.assertEqual(summary['parse_failures'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import urllib.request
+from unittest.mock import AsyncMock, Mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from binance_websocket.tests.utils import create_sample_trade
+
+from binance_websocket import views
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.metrics import (
+    CONTENT_TYPE,
+    PARSE_ERRORS,
+    TRADES_PARSED,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    add_label,
+    merge_families,
+    render,
+    start_metrics_server,
+)
+
+class TestMetrics(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_render(self):
+        frames = Counter('frames_total', 'Frames received', registry=self.registry)
+        parsed = Counter('parsed_total', 'Parsed trades', ['symbol'], registry=self.registry)
+        active = Gauge('active', 'Active consumers', registry=self.registry)
+
+        frames.inc()
+        frames.inc(2)
+        parsed.labels("BTCUSDT").inc()
+        parsed.labels('a"b').inc(4)
+        active.inc(3)
+        active.dec()
+
+        self.assertEqual(render(self.registry.collect()), (
+            "# HELP frames_total Frames received\n"
+            "# TYPE frames_total counter\n"
+            "frames_total 3\n"
+            "# HELP parsed_total Parsed trades\n"
+            "# TYPE parsed_total counter\n"
+            "parsed_total{symbol=\"BTCUSDT\"} 1\n"
+            "parsed_total{symbol=\"a\\\"b\"} 4\n"
+            "# HELP active Active consumers\n"
+            "# TYPE active gauge\n"
+            "active 2\n"
+        ))
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram('send_seconds', 'Send latency', buckets=(0.1, 1.0), registry=self.registry)
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        lines = render(self.registry.collect()).splitlines()
+        self.assertEqual(lines[2:], [
+            'send_seconds_bucket{le="0.1"} 2',
+            'send_seconds_bucket{le="1"} 3',
+            'send_seconds_bucket{le="+Inf"} 4',
+            'send_seconds_sum 3.65',
+            'send_seconds_count 4',
+        ])
+
+    def test_labels_must_match(self):
+        parsed = Counter('parsed_total', 'Parsed trades', ['symbol'])
+
+        with self.assertRaises(ValueError):
+            parsed.labels("BTCUSDT", "extra")
+
+        with self.assertRaises(ValueError):
+            self.registry.register(parsed)
+            self.registry.register(parsed)
+
+    def test_merge_adds_labels_per_source(self):
+        first, second = Registry(), Registry()
+        Counter('parsed_total', 'Parsed', ['symbol'], registry=first).labels("BTCUSDT").inc(2)
+        Counter('parsed_total', 'Parsed', ['symbol'], registry=second).labels("BTCUSDT").inc(5)
+
+        text = render(merge_families(
+            add_label(first.collect(), 'worker', '0'),
+            add_label(second.collect(), 'worker', '1'),
+        ))
+
+        self.assertEqual(text.count('# TYPE parsed_total counter'), 1)
+        self.assertIn('parsed_total{worker="0",symbol="BTCUSDT"} 2', text)
+        self.assertIn('parsed_total{worker="1",symbol="BTCUSDT"} 5', text)
+
+    def test_metrics_server(self):
+        Counter('frames_total', 'Frames received', registry=self.registry).inc()
+        server = start_metrics_server(0, self.registry.collect, '127.0.0.1')
+
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+                self.assertIn('frames_total 1', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_metrics_server_listens_on_loopback_by_default(self):
+        server = start_metrics_server(0, self.registry.collect)
+
+        try:
+            self.assertEqual(server.server_address[0], '127.0.0.1')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_metrics_view(self):
+        response = views.metrics(RequestFactory().get('/binance/metrics/'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        self.assertIn('# TYPE binance_consumers_active gauge', response.content.decode())
+
+    def test_metrics_view_is_limited_to_allowed_ips_and_staff(self):
+        request = RequestFactory().get('/binance/metrics/', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(views.metrics(request).status_code, 403)
+
+        request.user = Mock(is_active=True, is_staff=False)
+        self.assertEqual(views.metrics(request).status_code, 403)
+
+        request.user = Mock(is_active=True, is_staff=True)
+        self.assertEqual(views.metrics(request).status_code, 200)
+
+        with override_settings(BINANCE_METRICS_ALLOWED_IPS=['203.0.113.7']):
+            self.assertEqual(views.metrics(RequestFactory().get('/binance/metrics/', REMOTE_ADDR='203.0.113.7')).status_code, 200)
+
+    async def test_client_records_parsed_trades_and_errors(self):
+        client = BinanceWebSocketClient()
+        client.save_to_database = AsyncMock()
+        client.channel_layer = AsyncMock()
+        parsed = TRADES_PARSED.labels("METRICUSDT")
+        parsed_before, errors_before = parsed.value, PARSE_ERRORS.default.value
+
+        await client.process_message(json.dumps(create_sample_trade(symbol="METRICUSDT")))
+        await client.process_message('{"not json')
+
+        self.assertEqual(parsed.value - parsed_before, 1)
+        self.assertEqual(PARSE_ERRORS.default.value - errors_before, 1)
@@ -1,3 +1,4 @@
+import datetime
 from django.test import TestCase
 from decimal import Decimal
 from binance_websocket.models import PriceUpdate
@@ -34,4 +35,26 @@ class PriceUpdateModelTest(TestCase):
         
         self.assertEqual(btc_updates.count(), 1)
         self.assertEqual(eth_updates.count(), 1)
-        self.assertEqual(PriceUpdate.objects.count(), 2) 
\ No newline at end of file
+        self.assertEqual(PriceUpdate.objects.count(), 2)
+
+    def test_duplicate_trades_are_ignored(self):
+        trade_time = datetime.datetime(2020, 8, 27, 9, 20, 3, tzinfo=datetime.timezone.utc)
+        rows = [
+            PriceUpdate(
+                ticker_symbol='BTCUSDT',
+                price=Decimal('11850.15'),
+                volume=Decimal('0.1'),
+                trade_id=12345,
+                trade_time=trade_time,
+            )
+            for _ in range(2)
+        ]
+        
+        PriceUpdate.objects.bulk_create(rows[:1], ignore_conflicts=True)
+        PriceUpdate.objects.bulk_create(rows[1:], ignore_conflicts=True)
+        
+        self.assertEqual(PriceUpdate.objects.filter(ticker_symbol='BTCUSDT', trade_id=12345).count(), 1)
+        self.assertEqual(
+            PriceUpdate.objects.filter(trade_time__gte=trade_time).count(),
+            1
+        )
@@ -0,0 +1,193 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+from django.test import SimpleTestCase
+
+from binance_websocket.groups import symbol_group
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.orderbook import (
+    OrderBook,
+    OrderBookManager,
+    PriceLevels,
+    SequenceGap,
+    is_depth_frame,
+    is_diff_depth_stream,
+)
+
+def depth_event(first_id, final_id, bids=(), asks=(), symbol="BTCUSDT"):
+    return {"e": "depthUpdate", "E": 1598520003000, "s": symbol, "U": first_id, "u": final_id,
+            "b": [list(level) for level in bids], "a": [list(level) for level in asks]}
+
+def snapshot(last_update_id, bids=(), asks=()):
+    return {"lastUpdateId": last_update_id, "bids": [list(level) for level in bids], "asks": [list(level) for level in asks]}
+
+class StubFetcher:
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.calls = 0
+
+    async def fetch(self, ticker_symbol):
+        self.calls += 1
+        return self.snapshots.pop(0)
+
+class TestPriceLevels(SimpleTestCase):
+
+    def test_levels_are_sorted_best_first(self):
+        bids, asks = PriceLevels(descending=True), PriceLevels()
+
+        for price in ("100.5", "101.0", "99.25"):
+            bids.set(price, "1.0")
+            asks.set(price, "2.0")
+
+        self.assertEqual(bids.top(2), [["101.0", "1.0"], ["100.5", "1.0"]])
+        self.assertEqual(asks.top(5), [["99.25", "2.0"], ["100.5", "2.0"], ["101.0", "2.0"]])
+
+    def test_zero_quantity_removes_level(self):
+        levels = PriceLevels()
+        levels.set("100.0", "1.0")
+        levels.set("100.0", "3.5")
+        levels.set("101.0", "1.0")
+
+        self.assertEqual(levels.top(1), [["100.0", "3.5"]])
+
+        levels.set("100.0", "0.00000000")
+        levels.set("102.0", "0.00000000")
+
+        self.assertEqual(len(levels), 1)
+        self.assertEqual(levels.top(5), [["101.0", "1.0"]])
+
+class TestOrderBook(SimpleTestCase):
+
+    def test_snapshot_replays_buffered_events(self):
+        book = OrderBook("BTCUSDT")
+        book.buffer(depth_event(90, 100, bids=[("99.0", "5.0")]))
+        book.buffer(depth_event(101, 105, bids=[("100.0", "2.0")], asks=[("101.0", "0")]))
+        book.buffer(depth_event(106, 110, asks=[("102.0", "1.0")]))
+
+        book.load_snapshot(snapshot(102, bids=[("100.0", "1.0")], asks=[("101.0", "1.0")]))
+
+        self.assertTrue(book.synced)
+        self.assertEqual(book.last_update_id, 110)
+        self.assertEqual(book.pending, [])
+        self.assertEqual(book.to_message(), {
+            "ticker_symbol": "BTCUSDT",
+            "last_update_id": 110,
+            "bids": [["100.0", "2.0"]],
+            "asks": [["102.0", "1.0"]],
+        })
+
+    def test_snapshot_older_than_buffer_is_rejected(self):
+        book = OrderBook("BTCUSDT")
+        book.buffer(depth_event(110, 115))
+
+        with self.assertRaises(SequenceGap):
+            book.load_snapshot(snapshot(100))
+
+        self.assertFalse(book.synced)
+        self.assertEqual(len(book.pending), 1)
+
+    def test_stale_events_are_ignored_and_gaps_raise(self):
+        book = OrderBook("BTCUSDT")
+        book.load_snapshot(snapshot(100, bids=[("100.0", "1.0")]))
+
+        self.assertFalse(book.apply(depth_event(95, 100, bids=[("100.0", "9.0")])))
+        self.assertTrue(book.apply(depth_event(99, 103, bids=[("100.0", "2.0")])))
+
+        with self.assertRaises(SequenceGap):
+            book.apply(depth_event(105, 106))
+
+        self.assertEqual(book.bids.top(1), [["100.0", "2.0"]])
+
+class TestOrderBookManager(SimpleTestCase):
+
+    async def test_resync_after_gap(self):
+        fetcher = StubFetcher(
+            snapshot(100, bids=[("100.0", "1.0")]),
+            snapshot(200, bids=[("100.0", "7.0")]),
+        )
+        manager = OrderBookManager(fetcher, resync_delay=0)
+
+        manager.handle(depth_event(99, 101, bids=[("100.0", "2.0")]))
+        await manager.resync_tasks["BTCUSDT"]
+
+        [book] = manager.drain_dirty()
+        self.assertEqual(book.bids.top(1), [["100.0", "2.0"]])
+
+        manager.handle(depth_event(150, 201))
+        self.assertFalse(book.synced)
+        self.assertEqual(manager.drain_dirty(), [])
+
+        manager.handle(depth_event(202, 202, asks=[("101.0", "1.0")]))
+        await manager.resync_tasks["BTCUSDT"]
+
+        self.assertTrue(book.synced)
+        self.assertEqual(book.last_update_id, 202)
+        self.assertEqual(book.bids.top(1), [["100.0", "7.0"]])
+        self.assertEqual(book.asks.top(1), [["101.0", "1.0"]])
+        self.assertEqual((fetcher.calls, manager.resyncs), (2, 2))
+
+    async def test_resync_retries_until_snapshot_is_new_enough(self):
+        fetcher = StubFetcher(snapshot(10), snapshot(60))
+        manager = OrderBookManager(fetcher, resync_delay=0)
+
+        manager.handle(depth_event(50, 55))
+        await manager.resync_tasks["BTCUSDT"]
+
+        self.assertTrue(manager.books["BTCUSDT"].synced)
+        self.assertEqual(fetcher.calls, 2)
+
+    async def test_close_cancels_resyncs(self):
+        fetcher = AsyncMock()
+        fetcher.fetch.side_effect = lambda ticker_symbol: asyncio.sleep(10)
+        manager = OrderBookManager(fetcher)
+
+        manager.handle(depth_event(1, 2))
+        task = manager.resync_tasks["BTCUSDT"]
+        manager.close()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+class TestDepthRouting(SimpleTestCase):
+
+    def test_stream_detection(self):
+        self.assertTrue(is_diff_depth_stream("btcusdt@depth"))
+        self.assertTrue(is_diff_depth_stream("btcusdt@depth@100ms"))
+        self.assertFalse(is_diff_depth_stream("btcusdt@depth20"))
+        self.assertFalse(is_diff_depth_stream("btcusdt@trade"))
+
+        self.assertTrue(is_depth_frame(json.dumps(depth_event(1, 2))))
+        self.assertTrue(is_depth_frame(b'{"stream":"btcusdt@depth@100ms","data":{}}'))
+        self.assertFalse(is_depth_frame('{"e":"trade","s":"BTCUSDT"}'))
+
+    def test_client_only_builds_books_for_depth_streams(self):
+        self.assertIsNone(BinanceWebSocketClient().order_books)
+        self.assertIsNotNone(BinanceWebSocketClient(streams=["btcusdt@trade", "btcusdt@depth@100ms"]).order_books)
+
+    async def test_client_publishes_books(self):
+        fetcher = StubFetcher(snapshot(100, bids=[("100.0", "1.0"), ("99.0", "1.0")], asks=[("101.0", "1.0")]))
+        client = BinanceWebSocketClient(streams=["btcusdt@trade", "btcusdt@depth"], book_depth=1, snapshot_fetcher=fetcher)
+        client.channel_layer = AsyncMock()
+        client.save_to_database = AsyncMock()
+
+        frame = {"stream": "btcusdt@depth", "data": depth_event(100, 101, bids=[("100.0", "3.0")])}
+        await client.process_message(json.dumps(frame))
+        await client.order_books.resync_tasks["BTCUSDT"]
+
+        client.save_to_database.assert_not_called()
+
+        await client.publish_books()
+        group, message = client.channel_layer.group_send.call_args.args
+        self.assertEqual(group, symbol_group("BTCUSDT", "depth"))
+        self.assertEqual(json.loads(message['text'])['message'], {
+            "ticker_symbol": "BTCUSDT",
+            "last_update_id": 101,
+            "bids": [["100.0", "3.0"]],
+            "asks": [["101.0", "1.0"]],
+        })
+
+        client.channel_layer.group_send.reset_mock()
+        await client.publish_books()
+        client.channel_layer.group_send.assert_not_called()
@@ -0,0 +1,103 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from binance_websocket.partitions import (
+    INTERVAL_MONTH,
+    Partition,
+    ensure_partitions,
+    next_period,
+    parse_bound,
+    partition_name,
+    plan_partitions,
+)
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+class TestPartitionPlanning(unittest.TestCase):
+
+    def test_next_period(self):
+        self.assertEqual(next_period(utc(2026, 10, 17, 13, 5)), utc(2026, 10, 18))
+        self.assertEqual(next_period(utc(2026, 12, 31, 23), INTERVAL_MONTH), utc(2027, 1, 1))
+        self.assertEqual(next_period(utc(2026, 1, 31), INTERVAL_MONTH), utc(2026, 2, 1))
+
+    def test_plan_continues_after_last_partition(self):
+        existing = [Partition(partition_name(utc(2026, 10, 18)), utc(2026, 10, 18), utc(2026, 10, 19))]
+
+        ranges = plan_partitions(existing, utc(2026, 10, 17, 12), premake=3)
+
+        self.assertEqual(ranges, [
+            (utc(2026, 10, 19), utc(2026, 10, 20)),
+            (utc(2026, 10, 20), utc(2026, 10, 21)),
+        ])
+
+    def test_switch_to_monthly_partitions(self):
+        existing = [Partition(partition_name(utc(2026, 10, 24)), utc(2026, 10, 24), utc(2026, 10, 25))]
+
+        ranges = plan_partitions(existing, utc(2026, 10, 17), INTERVAL_MONTH, premake=1)
+
+        self.assertEqual(ranges, [
+            (utc(2026, 10, 25), utc(2026, 11, 1)),
+            (utc(2026, 11, 1), utc(2026, 12, 1)),
+        ])
+
+    def test_parse_bound(self):
+        bound = "FOR VALUES FROM ('2026-10-17 00:00:00+00') TO ('2026-10-18 00:00:00+00')"
+
+        self.assertEqual(parse_bound(bound), (utc(2026, 10, 17), utc(2026, 10, 18)))
+        self.assertIsNone(parse_bound("DEFAULT"))
+        self.assertEqual(partition_name(utc(2026, 10, 17)), "binance_websocket_priceupdate_p20261017")
+
+
+def bound(start, end):
+    return f"FOR VALUES FROM ('{start:%Y-%m-%d %H:%M:%S}+00') TO ('{end:%Y-%m-%d %H:%M:%S}+00')"
+
+def partition_cursor(partitions, partitioned=True):
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (1,) if partitioned else None
+    cursor.fetchall.return_value = [(name, bound(start, end)) for name, start, end in partitions]
+    return cursor
+
+def created_tables(cursor):
+    return [call.args[1] for call in cursor.execute.call_args_list if call.args[0].startswith('CREATE TABLE')]
+
+class TestEnsurePartitions(unittest.TestCase):
+
+    def quote_name(self, name):
+        return f'"{name}"'
+
+    def test_creates_partitions_up_to_latest_trade(self):
+        cursor = partition_cursor([("p20261017", utc(2026, 10, 17), utc(2026, 10, 18))])
+
+        end, created = ensure_partitions(cursor, self.quote_name, utc(2026, 10, 19, 8))
+
+        self.assertEqual(end, utc(2026, 10, 20))
+        self.assertEqual(created, [partition_name(utc(2026, 10, 18)), partition_name(utc(2026, 10, 19))])
+        self.assertEqual(created_tables(cursor), [
+            [utc(2026, 10, 18), utc(2026, 10, 19)],
+            [utc(2026, 10, 19), utc(2026, 10, 20)],
+        ])
+        indexes = [call.args[0] for call in cursor.execute.call_args_list if call.args[0].startswith('CREATE INDEX')]
+        self.assertTrue(any('_p20261019_timestamp' in sql for sql in indexes))
+
+    def test_covered_trades_create_nothing(self):
+        cursor = partition_cursor([("p20261017", utc(2026, 10, 17), utc(2026, 10, 18))])
+
+        self.assertEqual(ensure_partitions(cursor, self.quote_name, utc(2026, 10, 17, 23)), (utc(2026, 10, 18), []))
+        self.assertEqual(created_tables(cursor), [])
+
+    def test_keeps_monthly_partitions_monthly(self):
+        cursor = partition_cursor([("p20261001", utc(2026, 10, 1), utc(2026, 11, 1))])
+
+        end, created = ensure_partitions(cursor, self.quote_name, utc(2026, 11, 3))
+
+        self.assertEqual(end, utc(2026, 12, 1))
+        self.assertEqual(created_tables(cursor), [[utc(2026, 11, 1), utc(2026, 12, 1)]])
+
+    def test_unpartitioned_table(self):
+        self.assertIsNone(ensure_partitions(partition_cursor([], partitioned=False), self.quote_name, utc(2026, 10, 17)))
+
+
+if __name__ == "__main__":
+    unittest.main()
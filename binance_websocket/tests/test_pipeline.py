@@ -0,0 +1,132 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from binance_websocket.tests.utils import async_test, create_sample_trade
+
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.pipeline import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_SPILL,
+    StageQueue,
+    format_queue_stats,
+)
+
+class TestStageQueue(unittest.TestCase):
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            StageQueue('receive', 10, 'discard')
+
+    @async_test
+    async def test_block_policy_waits_for_room(self):
+        queue = StageQueue('receive', 1, OVERFLOW_BLOCK)
+        await queue.put(1)
+
+        put_task = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0)
+        self.assertFalse(put_task.done())
+
+        self.assertEqual(await queue.get(), 1)
+        await put_task
+        self.assertEqual(await queue.get(), 2)
+
+    @async_test
+    async def test_drop_oldest_policy(self):
+        queue = StageQueue('receive', 2, OVERFLOW_DROP_OLDEST)
+
+        for item in range(5):
+            await queue.put(item)
+
+        self.assertEqual(queue.drain_nowait(), [3, 4])
+        self.assertEqual(queue.stats()['dropped'], 3)
+
+    @async_test
+    async def test_spill_policy_keeps_order(self):
+        queue = StageQueue('persist', 2, OVERFLOW_SPILL)
+
+        for item in range(4):
+            await queue.put({'trade_id': item})
+
+        self.assertEqual(queue.qsize(), 4)
+        self.assertEqual(queue.stats()['spill_pending'], 2)
+
+        self.assertEqual((await queue.get())['trade_id'], 0)
+        await queue.put({'trade_id': 4})
+
+        received = [(await queue.get())['trade_id'] for _ in range(4)]
+        self.assertEqual(received, [1, 2, 3, 4])
+        self.assertEqual(queue.stats()['spilled'], 3)
+        self.assertTrue(queue.empty())
+        queue.close()
+
+    def test_format_queue_stats(self):
+        queue = StageQueue('receive', 10, OVERFLOW_DROP_OLDEST)
+        queue.dropped = 2
+
+        self.assertEqual(format_queue_stats({'receive': queue.stats()}), "receive=0/10 dropped=2")
+
+
+class TestPipelineClient(unittest.TestCase):
+
+    @async_test
+    async def test_stages_process_frames(self):
+        client = BinanceWebSocketClient(queue_size=10)
+
+        with patch.object(client, 'save_to_database', new_callable=AsyncMock) as mock_save:
+            with patch.object(client, 'send_to_channel_layer', new_callable=AsyncMock) as mock_channel:
+                client.start_pipeline()
+                await client.enqueue_message(json.dumps(create_sample_trade()))
+
+                for _ in range(10):
+                    await asyncio.sleep(0)
+
+                client.cancel_pipeline()
+
+                mock_save.assert_called_once()
+                mock_channel.assert_called_once()
+                self.assertEqual(client.queue_stats()['receive']['depth'], 0)
+
+    @async_test
+    async def test_slow_persistence_does_not_block_receive(self):
+        client = BinanceWebSocketClient(queue_size=2, overflow=OVERFLOW_DROP_OLDEST)
+        release = asyncio.Event()
+
+        async def slow_save(data):
+            await release.wait()
+
+        with patch.object(client, 'save_to_database', side_effect=slow_save):
+            with patch.object(client, 'send_to_channel_layer', new_callable=AsyncMock):
+                client.start_pipeline()
+
+                for i in range(20):
+                    await asyncio.wait_for(
+                        client.enqueue_message(json.dumps(create_sample_trade(trade_id=i))),
+                        timeout=0.1
+                    )
+                    await asyncio.sleep(0)
+
+                self.assertGreater(client.queue_stats()['persist']['dropped'], 0)
+
+                release.set()
+                client.cancel_pipeline()
+
+    @async_test
+    async def test_stop_drains_pending_items(self):
+        client = BinanceWebSocketClient(queue_size=10)
+
+        with patch.object(client, 'save_to_database', new_callable=AsyncMock) as mock_save:
+            with patch.object(client, 'send_to_channel_layer', new_callable=AsyncMock) as mock_channel:
+                await client.enqueue_message(json.dumps(create_sample_trade(trade_id=1)))
+                await client.persist_queue.put(client.parse_trade_message(create_sample_trade(trade_id=2)))
+
+                await client.stop()
+
+                self.assertEqual(mock_save.call_count, 2)
+                self.assertEqual(mock_channel.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
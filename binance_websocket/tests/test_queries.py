@@ -0,0 +1,133 @@
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from binance_websocket.tests.utils import async_test
+
+from binance_websocket import views
+from binance_websocket.queries import (
+    QueryError,
+    cache_key,
+    format_rows,
+    is_closed_range,
+    parse_cursor,
+    parse_time,
+    serialize_trade,
+    stream_trades,
+)
+
+TRADE_TIME = datetime(2020, 8, 27, 9, 20, 3, 276000, tzinfo=timezone.utc)
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+class FakeQuerySet:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def aiterator(self, chunk_size=None):
+        for row in self.rows:
+            yield row
+
+def trade_row(trade_id=1, price=Decimal("11850.15"), volume=Decimal("0.1"), price_units=None, volume_units=None):
+    return (trade_id, TRADE_TIME, price, volume, price_units, volume_units, True)
+
+class TestQueryHelpers(SimpleTestCase):
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time("1598520003276", "start"), TRADE_TIME)
+        self.assertEqual(parse_time("2020-08-27T09:20:03.276", "start"), TRADE_TIME)
+        self.assertIsNone(parse_time(None, "start"))
+
+        with self.assertRaises(QueryError):
+            parse_time("yesterday", "start")
+
+    def test_cursor(self):
+        self.assertEqual(parse_cursor("1598520003276:42"), (TRADE_TIME, 42))
+        self.assertEqual(parse_cursor("1598520003276"), (TRADE_TIME, None))
+        self.assertEqual(parse_cursor(None), (None, None))
+
+        with self.assertRaises(QueryError):
+            parse_cursor("abc:1")
+
+    def test_cache_key_ignores_parameter_order(self):
+        self.assertEqual(
+            cache_key("/binance/api/trades/BTCUSDT/", {"start": "1", "end": "2"}),
+            cache_key("/binance/api/trades/BTCUSDT/", {"end": "2", "start": "1"}),
+        )
+
+    def test_closed_range(self):
+        now = datetime.now(timezone.utc)
+
+        self.assertTrue(is_closed_range(now - timedelta(hours=1), now))
+        self.assertFalse(is_closed_range(now, now))
+        self.assertFalse(is_closed_range(None, now))
+
+    def test_fixed_point_rows(self):
+        trade = serialize_trade(trade_row(price=None, volume=None, price_units=1185015, volume_units=1000), (2, 4))
+
+        self.assertEqual(trade['price'], "11850.15")
+        self.assertEqual(trade['volume'], "0.1000")
+
+    def test_format_rows(self):
+        trades = [serialize_trade(trade_row(), (8, 8))]
+
+        self.assertEqual(format_rows(trades, 'csv'), "1,2020-08-27T09:20:03.276000+00:00,11850.15,0.1,True\r\n")
+        self.assertEqual(json.loads(format_rows(trades, 'ndjson'))['price'], "11850.15")
+
+    @async_test
+    async def test_stream_trades_in_blocks(self):
+        queryset = FakeQuerySet([trade_row(trade_id=i) for i in range(5)])
+
+        blocks = [block async for block in stream_trades(queryset, (8, 8), 'csv', chunk_size=2)]
+
+        self.assertTrue(blocks[0].startswith("trade_id,trade_time"))
+        self.assertEqual(len(blocks), 4)
+        self.assertEqual(sum(block.count("\n") for block in blocks[1:]), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestQueryViews(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        views.api_cache().clear()
+
+    def test_invalid_parameters(self):
+        for params in ({"start": "soon"}, {"limit": "0"}, {"start": "2", "end": "1"}, {"after": "x"}):
+            response = views.trades(self.factory.get("/binance/api/trades/BTCUSDT/", params), "BTCUSDT")
+            self.assertEqual(response.status_code, 400)
+
+        response = views.bars(self.factory.get("/binance/api/bars/BTCUSDT/", {"interval": "1w"}), "BTCUSDT")
+        self.assertEqual(response.status_code, 400)
+
+    @patch('binance_websocket.views.SymbolScale.lookup', return_value=(8, 8))
+    @patch('binance_websocket.views.trade_page', return_value=([{"trade_id": 1}], "1598520003276:1"))
+    def test_closed_ranges_are_cached(self, mock_page, mock_lookup):
+        request = self.factory.get("/binance/api/trades/btcusdt/", {"start": "1598520000000", "end": "1598520060000"})
+
+        first = views.trades(request, "btcusdt")
+        second = views.trades(request, "btcusdt")
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(mock_page.call_count, 1)
+        self.assertEqual(json.loads(second.content)['next'], "1598520003276:1")
+
+    @patch('binance_websocket.views.SymbolScale.lookup', return_value=(8, 8))
+    @patch('binance_websocket.views.trade_page', return_value=([], None))
+    def test_open_ranges_are_not_cached(self, mock_page, mock_lookup):
+        request = self.factory.get("/binance/api/trades/BTCUSDT/", {"start": "1598520000000"})
+
+        views.trades(request, "BTCUSDT")
+        response = views.trades(request, "BTCUSDT")
+
+        self.assertEqual(response['X-Cache'], 'BYPASS')
+        self.assertEqual(mock_page.call_count, 2)
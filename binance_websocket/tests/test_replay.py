@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import AsyncMock
+
+from django.test import SimpleTestCase
+
+from binance_websocket.tests.utils import create_sample_trade
+
+from binance_websocket.capture import SEGMENT_SUFFIX, CaptureWriter, index_path
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.metrics import STAGE_LATENCY_SECONDS
+from binance_websocket.replay import Replayer, iter_frames, read_frames, replay_paths, synthetic_frames
+
+def trade_frame(symbol, trade_id, event_ms=1700000000000):
+    trade = create_sample_trade(symbol=symbol, trade_id=trade_id)
+    trade['E'] = event_ms
+    return json.dumps(trade)
+
+def write_segment(directory, name, lines):
+    """
+    Write ``(ns, frame)`` lines as a segment through the capture writer, so
+    the blocks and index match what a live capture produces.
+    """
+    capture = CaptureWriter(directory, block_bytes=600)
+    capture.open_segment()
+    capture.segment.close()
+    os.remove(capture.segment_path)
+    capture.segment_path = os.path.join(directory, name)
+    capture.segment = open(capture.segment_path, 'wb')
+
+    for received_ns, frame in lines:
+        capture.add(received_ns, frame)
+
+    capture.flush_block()
+    capture.close_segment()
+    return capture.segment_path
+
+class TestReadFrames(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.lines = [
+            (1000 + index, trade_frame("BTCUSDT" if index % 3 else "ETHUSDT", index))
+            for index in range(30)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def segment(self, name=f"frames-20240101T000000Z-100-000001{SEGMENT_SUFFIX}", lines=None):
+        return write_segment(self.directory, name, self.lines if lines is None else lines)
+
+    def test_reads_indexed_segment(self):
+        path = self.segment()
+
+        self.assertEqual(list(read_frames(path)), self.lines)
+
+    def test_reads_segment_without_index(self):
+        path = self.segment()
+        os.remove(index_path(path))
+
+        self.assertEqual(list(read_frames(path)), self.lines)
+
+    def test_truncated_segment_keeps_complete_frames(self):
+        path = self.segment()
+        os.remove(index_path(path))
+
+        with open(path, 'rb') as segment_file:
+            data = segment_file.read()
+
+        with open(path, 'wb') as segment_file:
+            segment_file.write(data[:-40])
+
+        frames = list(read_frames(path))
+        self.assertGreater(len(frames), 0)
+        self.assertLess(len(frames), len(self.lines))
+        self.assertEqual(frames, self.lines[:len(frames)])
+
+    def test_time_and_symbol_filters(self):
+        path = self.segment()
+
+        frames = list(read_frames(path, start_ns=1010, end_ns=1020, symbols={"ETHUSDT"}))
+
+        self.assertEqual(frames, [line for line in self.lines[10:20] if '"ETHUSDT"' in line[1]])
+
+    def test_ndjson_lines(self):
+        path = os.path.join(self.directory, 'frames.jsonl')
+
+        with open(path, 'w') as frame_file:
+            frame_file.write(f"{trade_frame('BTCUSDT', 1, event_ms=5)}\n\n")
+            frame_file.write(f"7000000\t{trade_frame('BTCUSDT', 2)}\n")
+            frame_file.write('{"result":null,"id":1}\n')
+
+        self.assertEqual([timestamp for timestamp, _ in read_frames(path)], [5000000, 7000000, None])
+
+    def test_segments_of_each_process_are_merged_in_time_order(self):
+        first = self.segment(f"frames-20240101T000000Z-100-000001{SEGMENT_SUFFIX}", [(1, trade_frame("BTCUSDT", 1))])
+        self.segment(f"frames-20240101T000100Z-100-000002{SEGMENT_SUFFIX}", [(4, trade_frame("BTCUSDT", 4))])
+        self.segment(f"frames-20240101T000000Z-200-000001{SEGMENT_SUFFIX}", [
+            (2, trade_frame("ETHUSDT", 2)), (3, trade_frame("ETHUSDT", 3)),
+        ])
+
+        self.assertEqual(len(replay_paths([self.directory])), 2)
+        self.assertEqual([timestamp for timestamp, _ in iter_frames([self.directory])], [1, 2, 3, 4])
+        self.assertEqual([timestamp for timestamp, _ in iter_frames([first])], [1])
+
+    def test_synthetic_frames_use_event_time(self):
+        frames = list(synthetic_frames(5, seed=1))
+
+        self.assertEqual(len(frames), 5)
+        self.assertEqual(frames[0][0], json.loads(frames[0][1])['E'] * 1000000)
+
+class TestReplayer(SimpleTestCase):
+
+    def make_client(self, **kwargs):
+        client = BinanceWebSocketClient(**kwargs)
+        client.save_to_database = AsyncMock()
+        client.channel_layer = AsyncMock()
+        return client
+
+    async def test_replays_as_fast_as_possible(self):
+        client = self.make_client()
+        frames = [(index * 1000000000, trade_frame("BTCUSDT", index)) for index in range(5)]
+
+        replayer = Replayer(client, speed=0)
+        started = time.monotonic()
+        await replayer.run(frames)
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(replayer.frames, 5)
+        self.assertEqual([call.args[0]['trade_id'] for call in client.save_to_database.call_args_list], list(range(5)))
+        self.assertEqual(client.channel_layer.group_send.call_count, 5)
+        self.assertFalse(client.running)
+
+    async def test_historical_event_times_are_not_measured(self):
+        client = self.make_client()
+        exchange, parse = STAGE_LATENCY_SECONDS.labels('exchange'), STAGE_LATENCY_SECONDS.labels('parse')
+        before = sum(exchange.counts), sum(parse.counts)
+
+        await Replayer(client, speed=0).run([(0, trade_frame("BTCUSDT", 1))])
+
+        self.assertEqual((sum(exchange.counts), sum(parse.counts)), (before[0], before[1] + 1))
+        trace = client.channel_layer.group_send.call_args_list[0].args[1]['trace']
+        self.assertEqual(sorted(trace), ['b', 'p', 'r'])
+
+    async def test_speed_keeps_recorded_spacing(self):
+        client = self.make_client()
+        frames = [(0, trade_frame("BTCUSDT", 1)), (1000000000, trade_frame("BTCUSDT", 2))]
+
+        replayer = Replayer(client, speed=10)
+        started = time.monotonic()
+        await replayer.run(frames)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        self.assertEqual(client.save_to_database.call_count, 2)
+
+    async def test_batches_and_pipeline_are_flushed_at_the_end(self):
+        writer = AsyncMock()
+        client = self.make_client(batch_size=100, queue_size=10, writer=writer)
+
+        await Replayer(client, speed=0).run(
+            (index, trade_frame("BTCUSDT", index)) for index in range(3)
+        )
+
+        [batch] = [call.args[0] for call in writer.flush.call_args_list]
+        self.assertEqual([trade['trade_id'] for trade in batch], [0, 1, 2])
+        self.assertEqual(client.message_buffer, [])
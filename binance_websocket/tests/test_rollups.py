@@ -0,0 +1,152 @@
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from binance_websocket.candles import Bar
+from binance_websocket.models import Candle, PriceUpdate, RollupWatermark
+from binance_websocket.rollups import Rollup, bucket_runs, build_bars, from_ms, merge_bars
+
+START_MS = 1598522400000
+
+def trade(offset_ms, price, volume="1"):
+    return START_MS + offset_ms, Decimal(price), Decimal(volume)
+
+class TestRollupHelpers(unittest.TestCase):
+
+    def test_bucket_runs(self):
+        starts = {START_MS + 120000, START_MS, START_MS + 60000, START_MS + 600000}
+
+        self.assertEqual(bucket_runs(starts, 60000), [
+            (START_MS, START_MS + 180000),
+            (START_MS + 600000, START_MS + 660000),
+        ])
+
+    def test_build_bars(self):
+        bars = build_bars("BTCUSDT", "1m", [
+            trade(1000, "100", "1"),
+            trade(2000, "103", "2"),
+            trade(61000, "99", "0.5"),
+        ])
+
+        self.assertEqual([(bar.open_time_ms - START_MS, bar.trade_count) for bar in bars], [(0, 2), (60000, 1)])
+        self.assertEqual((bars[0].open, bars[0].high, bars[0].close, bars[0].volume), (Decimal("100"), Decimal("103"), Decimal("103"), Decimal("3")))
+
+    def test_merge_bars(self):
+        minutes = build_bars("BTCUSDT", "1m", [
+            trade(1000, "100"),
+            trade(61000, "110"),
+            trade(62000, "95"),
+            trade(3 * 60000, "101"),
+        ])
+        minutes.insert(2, Bar("BTCUSDT", "1m", START_MS + 120000, 60000, Decimal("95")))
+
+        hours = merge_bars("BTCUSDT", "1h", minutes)
+
+        self.assertEqual(len(hours), 1)
+        hour = hours[0]
+        self.assertEqual(hour.open_time_ms, START_MS)
+        self.assertEqual((hour.open, hour.high, hour.low, hour.close), (Decimal("100"), Decimal("110"), Decimal("95"), Decimal("101")))
+        self.assertEqual(hour.volume, Decimal("4"))
+        self.assertEqual(hour.trade_count, 4)
+
+
+INGESTED = from_ms(START_MS + 3600 * 1000)
+NOW = INGESTED + timedelta(hours=1)
+
+def store_trade(trade_id, offset_ms, price, volume="1", symbol="BTCUSDT", ingested_after=0):
+    """
+    Store a trade ``offset_ms`` into the test hour, ingested
+    ``ingested_after`` seconds after the test ingest time.
+    """
+    row = PriceUpdate.objects.create(
+        ticker_symbol=symbol,
+        price=Decimal(price),
+        volume=Decimal(volume),
+        trade_id=trade_id,
+        trade_time=from_ms(START_MS + offset_ms),
+    )
+    PriceUpdate.objects.filter(pk=row.pk).update(timestamp=INGESTED + timedelta(seconds=ingested_after))
+    return row
+
+def candle(interval, offset_ms=0, symbol="BTCUSDT"):
+    return Candle.objects.get(ticker_symbol=symbol, interval=interval, open_time=from_ms(START_MS + offset_ms))
+
+class TestRollup(TestCase):
+
+    def test_run_builds_every_interval_and_advances_watermark(self):
+        store_trade(1, 1000, "100", "1")
+        store_trade(2, 2000, "103", "2")
+        last = store_trade(3, 61000, "99", "0.5")
+
+        self.assertEqual(Rollup().run(NOW), 3)
+
+        minute = candle("1m")
+        self.assertEqual((minute.open, minute.high, minute.close, minute.volume), (Decimal("100"), Decimal("103"), Decimal("103"), Decimal("3")))
+        self.assertEqual(candle("1m", 60000).trade_count, 1)
+        self.assertEqual((candle("1h").low, candle("1h").trade_count), (Decimal("99"), 3))
+        self.assertEqual(Candle.objects.filter(interval="1d").count(), 1)
+
+        watermark = RollupWatermark.objects.get(ticker_symbol="BTCUSDT")
+        self.assertEqual(watermark.last_id, last.pk)
+
+    def test_chunks_stop_at_chunk_size(self):
+        rows = [store_trade(trade_id, trade_id * 60000, "100") for trade_id in range(5)]
+        rollup = Rollup(chunk_size=2)
+
+        self.assertEqual(rollup.run_chunk("BTCUSDT", NOW), 2)
+        self.assertEqual(RollupWatermark.objects.get(ticker_symbol="BTCUSDT").last_id, rows[1].pk)
+        self.assertEqual(Candle.objects.filter(interval="1m").count(), 2)
+
+        self.assertEqual(rollup.run(NOW), 3)
+        self.assertEqual(RollupWatermark.objects.get(ticker_symbol="BTCUSDT").last_id, rows[-1].pk)
+        self.assertEqual(Candle.objects.filter(interval="1m").count(), 5)
+        self.assertEqual(candle("1h").trade_count, 5)
+
+    def test_late_trade_recomputes_its_bucket(self):
+        store_trade(1, 1000, "100")
+        store_trade(2, 61000, "101")
+        Rollup().run(NOW)
+
+        store_trade(3, 2000, "120", ingested_after=60)
+        self.assertEqual(Rollup().run(NOW), 1)
+
+        self.assertEqual((candle("1m").high, candle("1m").trade_count), (Decimal("120"), 2))
+        self.assertEqual(candle("1m", 60000).trade_count, 1)
+        self.assertEqual((candle("1h").high, candle("1h").trade_count), (Decimal("120"), 3))
+
+    def test_rerun_is_idempotent(self):
+        store_trade(1, 1000, "100")
+        store_trade(2, 61000, "101")
+        Rollup().run(NOW)
+        candles = list(Candle.objects.order_by('interval', 'open_time').values_list('interval', 'close', 'trade_count'))
+
+        self.assertEqual(Rollup().run(NOW), 0)
+        Rollup(chunk_size=1).recompute("BTCUSDT", {START_MS})
+
+        self.assertEqual(list(Candle.objects.order_by('interval', 'open_time').values_list('interval', 'close', 'trade_count')), candles)
+
+    def test_rows_still_settling_are_left_for_the_next_run(self):
+        store_trade(1, 1000, "100")
+        store_trade(2, 2000, "101", ingested_after=3600 - 2)
+
+        self.assertEqual(Rollup().run(NOW), 1)
+        self.assertEqual(Rollup().run(NOW + timedelta(seconds=10)), 1)
+        self.assertEqual(candle("1m").trade_count, 2)
+
+    def test_pending_symbols_are_the_ones_past_their_watermark(self):
+        store_trade(1, 1000, "100", symbol="BTCUSDT")
+        store_trade(1, 1000, "10", symbol="ETHUSDT")
+        Rollup().run(NOW)
+
+        self.assertEqual(Rollup().pending_symbols(), [])
+
+        store_trade(2, 2000, "11", symbol="ETHUSDT", ingested_after=60)
+        store_trade(1, 2000, "1", symbol="SOLUSDT", ingested_after=60)
+
+        self.assertEqual(Rollup().pending_symbols(), ["ETHUSDT", "SOLUSDT"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+from django.test import SimpleTestCase
+from websockets import ConnectionClosedOK
+
+from binance_websocket.tests.utils import create_sample_trade
+
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.rotation import TradeDeduplicator
+
+class FakeConnection:
+    """
+    Yields fed frames in order; after ``close`` it drains what is buffered
+    and then ends, like a websockets connection.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.closed = False
+
+    def feed(self, *trade_ids):
+        for trade_id in trade_ids:
+            self.queue.put_nowait(json.dumps(create_sample_trade(trade_id=trade_id)))
+
+    async def close(self):
+        if not self.closed:
+            self.closed = True
+            self.queue.put_nowait(None)
+
+    async def recv(self):
+        message = await self.queue.get()
+
+        if message is None:
+            self.queue.put_nowait(None)
+            raise ConnectionClosedOK(None, None)
+
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.queue.get()
+
+        if message is None:
+            raise StopAsyncIteration
+
+        return message
+
+async def wait_for(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.005)
+
+def saved_trade_ids(client):
+    return [call.args[0]['trade_id'] for call in client.save_to_database.call_args_list]
+
+class TestTradeDeduplicator(SimpleTestCase):
+
+    def test_only_overlap_is_deduplicated(self):
+        dedupe = TradeDeduplicator()
+
+        self.assertFalse(dedupe.is_duplicate("BTCUSDT", 10))
+        self.assertFalse(dedupe.is_duplicate("BTCUSDT", 10))
+
+        dedupe.start_overlap()
+        results = [
+            dedupe.is_duplicate("BTCUSDT", 12),
+            dedupe.is_duplicate("BTCUSDT", 10),
+            dedupe.is_duplicate("BTCUSDT", 11),
+            dedupe.is_duplicate("BTCUSDT", 11),
+            dedupe.is_duplicate("BTCUSDT", 12),
+            dedupe.is_duplicate("ETHUSDT", 1),
+        ]
+        self.assertEqual(results, [False, True, False, True, True, False])
+        self.assertEqual(dedupe.duplicates, 3)
+
+        dedupe.end_overlap()
+        self.assertFalse(dedupe.overlapping)
+        self.assertEqual(dedupe.last_ids, {"BTCUSDT": 12, "ETHUSDT": 1})
+
+    def test_ids_at_or_below_the_last_one_are_dropped_after_an_overlap(self):
+        dedupe = TradeDeduplicator()
+        dedupe.is_duplicate("BTCUSDT", 5)
+        dedupe.start_overlap()
+        dedupe.is_duplicate("BTCUSDT", 6)
+        dedupe.end_overlap()
+
+        self.assertEqual(
+            [dedupe.is_duplicate("BTCUSDT", trade_id) for trade_id in (5, 6, 7, 7)],
+            [True, True, False, True],
+        )
+        self.assertEqual(dedupe.last_ids, {"BTCUSDT": 7})
+
+class TestConnectionRotation(SimpleTestCase):
+
+    def setUp(self):
+        self.connections = []
+        self.connect_patch = patch('websockets.connect', new=AsyncMock(side_effect=self.open_connection))
+        self.interval_patch = patch(
+            'binance_websocket.management.commands.binance_websocket_client.ROTATION_CHECK_INTERVAL', 0.01
+        )
+        self.connect_patch.start()
+        self.interval_patch.start()
+
+    def tearDown(self):
+        self.connect_patch.stop()
+        self.interval_patch.stop()
+
+    async def open_connection(self, url):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection
+
+    def make_client(self, **kwargs):
+        client = BinanceWebSocketClient(**kwargs)
+        client.save_to_database = AsyncMock()
+        client.channel_layer = AsyncMock()
+        return client
+
+    async def stop(self, client, task):
+        client.running = False
+        task.cancel()
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def test_planned_rotation_loses_and_repeats_nothing(self):
+        client = self.make_client(rotate_after=0.05, rotation_overlap=0.1)
+        task = asyncio.create_task(client.listen())
+
+        await wait_for(lambda: len(self.connections) == 1)
+        first = self.connections[0]
+        first.feed(1, 2, 3, 4, 5)
+
+        await wait_for(lambda: client.standby is not None)
+        second = self.connections[1]
+        client.rotate_after = None
+        first.feed(6, 7)
+        second.feed(4, 5, 6, 7, 8)
+
+        await wait_for(lambda: client.connection is second and first.closed)
+        second.feed(9)
+        await wait_for(lambda: 9 in saved_trade_ids(client))
+
+        self.assertEqual(sorted(saved_trade_ids(client)), list(range(1, 10)))
+        self.assertFalse(client.dedupe.overlapping)
+        self.assertEqual(len(self.connections), 2)
+
+        await self.stop(client, task)
+
+    async def test_frames_buffered_on_the_standby_after_promotion_are_dropped(self):
+        client = self.make_client(rotate_after=0.05, rotation_overlap=0.05)
+        task = asyncio.create_task(client.listen())
+
+        await wait_for(lambda: len(self.connections) == 1)
+        first = self.connections[0]
+        first.feed(1, 2, 3)
+
+        await wait_for(lambda: client.standby is not None)
+        second = self.connections[1]
+        client.rotate_after = None
+        first.feed(4, 5)
+
+        await wait_for(lambda: client.connection is second and first.closed)
+        await wait_for(lambda: not client.dedupe.overlapping)
+        second.feed(3, 4, 5, 6)
+        await wait_for(lambda: 6 in saved_trade_ids(client))
+
+        self.assertEqual(saved_trade_ids(client), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(client.dedupe.duplicates, 3)
+
+        await self.stop(client, task)
+
+    async def test_primary_dropping_during_overlap_promotes_standby(self):
+        client = self.make_client(rotate_after=None, stale_after=0.05, rotation_overlap=10)
+        task = asyncio.create_task(client.listen())
+
+        await wait_for(lambda: client.standby is not None)
+        first, second = self.connections
+        second.feed(1, 2)
+        await first.close()
+
+        await wait_for(lambda: client.connection is second)
+        second.feed(3)
+        await wait_for(lambda: 3 in saved_trade_ids(client))
+
+        self.assertEqual(saved_trade_ids(client), [1, 2, 3])
+        self.assertEqual(len(self.connections), 2)
+
+        await self.stop(client, task)
+
+    async def test_promotion_lets_the_standby_finish_its_frame(self):
+        client = self.make_client()
+        saving = asyncio.Event()
+        release = asyncio.Event()
+
+        async def save(message):
+            if message['trade_id'] == 2:
+                saving.set()
+                await release.wait()
+
+        client.save_to_database.side_effect = save
+        client.connection = FakeConnection()
+
+        await client.open_standby("test")
+        standby = self.connections[0]
+        standby.feed(2, 3)
+        await saving.wait()
+
+        promotion = asyncio.create_task(client.promote_standby())
+        await asyncio.sleep(0.02)
+        self.assertFalse(promotion.done())
+
+        release.set()
+        self.assertTrue(await promotion)
+
+        self.assertIs(client.connection, standby)
+        self.assertEqual(saved_trade_ids(client), [2])
+        self.assertEqual(standby.queue.qsize(), 1)
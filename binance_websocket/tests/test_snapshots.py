@@ -0,0 +1,107 @@
+from unittest.mock import AsyncMock
+
+from django.core.cache.backends.redis import RedisCache
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from binance_websocket.tests.utils import IN_MEMORY_CHANNEL_LAYERS, WebsocketCommunicator, create_sample_trade
+
+from binance_websocket.consumers import BinanceConsumer
+from binance_websocket.decoding import TradeRecord
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient, Command
+from binance_websocket.snapshots import SYMBOLS_KEY, SnapshotWriter, is_process_local, load_snapshots, snapshot_cache
+
+SNAPSHOT_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'binance-snapshot-tests',
+    },
+}
+
+def trade_message(symbol, price="1.0"):
+    return {"ticker_symbol": symbol, "price": price, "volume": "1.0", "trade_time": "2020-08-27T09:20:03+00:00"}
+
+@override_settings(CACHES=SNAPSHOT_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestSnapshots(SimpleTestCase):
+
+    def setUp(self):
+        snapshot_cache().clear()
+
+    async def test_writer_keeps_last_message_per_symbol(self):
+        writer = SnapshotWriter()
+
+        writer.update(trade_message("BTCUSDT", "1.0"))
+        writer.update(trade_message("BTCUSDT", "2.0"))
+        writer.update(trade_message("ETHUSDT", "3.0"))
+
+        self.assertEqual(await writer.flush(), 2)
+        self.assertEqual(await writer.flush(), 0)
+
+        snapshots = await load_snapshots()
+        self.assertEqual([(message['ticker_symbol'], message['price']) for message in snapshots], [("BTCUSDT", "2.0"), ("ETHUSDT", "3.0")])
+        self.assertEqual(await load_snapshots(["ethusdt", "BNBUSDT"]), [trade_message("ETHUSDT", "3.0")])
+
+    async def test_symbol_index_is_merged(self):
+        first, second = SnapshotWriter(), SnapshotWriter()
+
+        first.update(trade_message("BTCUSDT"))
+        second.update(trade_message("ETHUSDT"))
+        await first.flush()
+        await second.flush()
+
+        self.assertEqual(await snapshot_cache().aget(SYMBOLS_KEY), ["BTCUSDT", "ETHUSDT"])
+
+    async def test_snapshot_sent_on_connect_and_subscribe(self):
+        writer = SnapshotWriter()
+        writer.update(trade_message("BTCUSDT"))
+        writer.update(trade_message("ETHUSDT"))
+        await writer.flush()
+
+        communicator = WebsocketCommunicator(BinanceConsumer.as_asgi(), "/ws/binance/")
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual(snapshot['type'], 'snapshot')
+        self.assertEqual([message['ticker_symbol'] for message in snapshot['messages']], ["BTCUSDT", "ETHUSDT"])
+
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["ethusdt"]})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'subscriptions')
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual([message['ticker_symbol'] for message in snapshot['messages']], ["ETHUSDT"])
+
+        await communicator.disconnect()
+
+    async def test_no_snapshot_when_cache_is_empty(self):
+        communicator = WebsocketCommunicator(BinanceConsumer.as_asgi(), "/ws/binance/")
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_client_records_published_trades(self):
+        client = BinanceWebSocketClient(snapshots=SnapshotWriter())
+        client.channel_layer = AsyncMock()
+
+        await client.send_to_channel_layer(TradeRecord.from_message(create_sample_trade(price="123.45")))
+        await client.flush_snapshots()
+
+        snapshots = await load_snapshots(["BTCUSDT"])
+        self.assertEqual(snapshots[0]['price'], "123.45")
+
+
+class TestSnapshotCacheCheck(SimpleTestCase):
+
+    def test_process_local_caches(self):
+        self.assertFalse(is_process_local(RedisCache('redis://127.0.0.1:6379/1', {})))
+
+        with override_settings(CACHES=SNAPSHOT_CACHES):
+            self.assertTrue(is_process_local(snapshot_cache()))
+
+    @override_settings(CACHES=SNAPSHOT_CACHES)
+    def test_command_refuses_process_local_cache(self):
+        with self.assertRaisesMessage(CommandError, 'shared with the ASGI processes'):
+            Command().check_snapshot_cache({'snapshots': True})
+
+        Command().check_snapshot_cache({'snapshots': False})
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from binance_websocket.tests.utils import async_test, create_sample_trade
+
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.streams import (
+    build_stream_names,
+    build_stream_url,
+    load_stream_file,
+    parse_stream_list,
+    shard_streams,
+    unwrap_combined_message,
+)
+
+class TestStreamHelpers(unittest.TestCase):
+
+    def test_build_stream_names(self):
+        streams = build_stream_names(["BTCUSDT", "ethusdt"], ["trade", "depth"])
+
+        self.assertEqual(streams, ["btcusdt@trade", "btcusdt@depth", "ethusdt@trade", "ethusdt@depth"])
+
+    def test_parse_stream_list(self):
+        streams = parse_stream_list(["btcusdt", " ETHUSDT@aggTrade", "", "btcusdt@trade"], ["trade"])
+
+        self.assertEqual(streams, ["btcusdt@trade", "ethusdt@aggTrade"])
+
+    def test_load_stream_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as stream_file:
+            stream_file.write("# majors\nbtcusdt\nethusdt, bnbusdt@aggTrade\n\n")
+
+        try:
+            streams = load_stream_file(stream_file.name, ["trade"])
+        finally:
+            os.unlink(stream_file.name)
+
+        self.assertEqual(streams, ["btcusdt@trade", "ethusdt@trade", "bnbusdt@aggTrade"])
+
+    def test_shard_streams(self):
+        streams = [f"sym{i}@trade" for i in range(5)]
+
+        shards = shard_streams(streams, 2)
+
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(shards[-1], ["sym4@trade"])
+
+        with self.assertRaises(ValueError):
+            shard_streams(streams, 0)
+
+    def test_build_stream_url(self):
+        self.assertEqual(
+            build_stream_url(["btcusdt@trade"]),
+            "wss://stream.binance.com:9443/ws/btcusdt@trade"
+        )
+        self.assertEqual(
+            build_stream_url(["btcusdt@trade", "ethusdt@trade"]),
+            "wss://stream.binance.com:9443/stream?streams=btcusdt@trade/ethusdt@trade"
+        )
+
+    def test_unwrap_combined_message(self):
+        trade = create_sample_trade()
+
+        self.assertEqual(unwrap_combined_message({"stream": "btcusdt@trade", "data": trade}), trade)
+        self.assertEqual(unwrap_combined_message(trade), trade)
+
+
+class TestCombinedStreamClient(unittest.TestCase):
+
+    def test_combined_url(self):
+        client = BinanceWebSocketClient(streams=["btcusdt@trade", "ethusdt@trade"])
+
+        self.assertEqual(
+            client.ws_url,
+            "wss://stream.binance.com:9443/stream?streams=btcusdt@trade/ethusdt@trade"
+        )
+
+    @async_test
+    async def test_wrapped_frame_is_processed(self):
+        client = BinanceWebSocketClient(streams=["btcusdt@trade", "ethusdt@trade"])
+        frame = json.dumps({"stream": "ethusdt@trade", "data": create_sample_trade(symbol="ETHUSDT")})
+
+        with patch.object(client, 'save_to_database', new_callable=AsyncMock) as mock_save:
+            with patch.object(client, 'send_to_channel_layer', new_callable=AsyncMock) as mock_channel:
+                await client.process_message(frame)
+
+                mock_save.assert_called_once()
+                self.assertEqual(mock_save.call_args[0][0]['ticker_symbol'], "ETHUSDT")
+                mock_channel.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from binance_websocket.logsampling import ThroughputStats
+from binance_websocket.metrics import Counter, Registry, render
+from binance_websocket.supervisor import Supervisor, assign_streams
+
+class FakeProcess:
+
+    def __init__(self, target, args, name):
+        self.target = target
+        self.args = args
+        self.name = name
+        self.pid = None
+        self.exitcode = None
+        self.signals = []
+
+    def start(self):
+        # Keep a copy of the worker's end of the pipe, as a child would.
+        self.connection = Connection(os.dup(self.args[3].fileno()))
+        self.pid = 1000 + len(FakeContext.started)
+        FakeContext.started.append(self)
+
+    def terminate(self):
+        self.signals.append('TERM')
+        self.exitcode = -15
+
+    def kill(self):
+        self.signals.append('KILL')
+        self.exitcode = -9
+
+    def join(self, timeout=None):
+        pass
+
+class FakeContext:
+    started = []
+
+    def Process(self, target, args, name):
+        return FakeProcess(target, args, name)
+
+    def Pipe(self, duplex=True):
+        return multiprocessing.Pipe(duplex)
+
+def worker_summary(symbol, messages):
+    return {'elapsed': 1.0, 'symbols': {symbol: {'messages': messages, 'bytes': messages * 100}}, 'parse_failures': 1}
+
+class TestSupervisor(SimpleTestCase):
+
+    def setUp(self):
+        FakeContext.started = []
+
+    def test_assign_streams_keeps_symbols_together(self):
+        streams = ["btcusdt@trade", "btcusdt@depth", "ethusdt@trade", "bnbusdt@trade", "xrpusdt@trade"]
+
+        assignments = assign_streams(streams, 2)
+
+        self.assertEqual(assignments, [["btcusdt@trade", "btcusdt@depth", "xrpusdt@trade"], ["ethusdt@trade", "bnbusdt@trade"]])
+        self.assertEqual(assign_streams(["btcusdt@trade"], 4), [["btcusdt@trade"]])
+
+    def test_dead_and_stalled_workers_are_restarted(self):
+        supervisor = Supervisor([["btcusdt@trade"], ["ethusdt@trade"]], {}, stall_timeout=5, restart_delay=1, context=FakeContext())
+
+        supervisor.check_workers(100.0)
+        first, second = FakeContext.started
+        self.assertEqual(first.args[:2], (0, ["btcusdt@trade"]))
+
+        first.exitcode = 1
+        supervisor.slots[1].last_seen = 104.0
+        supervisor.check_workers(106.0)
+        self.assertEqual(len(FakeContext.started), 2)
+
+        supervisor.check_workers(107.0)
+        self.assertEqual(len(FakeContext.started), 3)
+        self.assertEqual(FakeContext.started[2].args[:2], (0, ["btcusdt@trade"]))
+
+        supervisor.check_workers(110.0)
+        self.assertEqual(second.signals, ['TERM'])
+
+        supervisor.check_workers(111.0)
+        self.assertEqual(FakeContext.started[3].args[:2], (1, ["ethusdt@trade"]))
+        self.assertEqual([slot.restarts for slot in supervisor.slots], [1, 1])
+
+    def test_worker_throughput_is_aggregated(self):
+        supervisor = Supervisor([["btcusdt@trade"], ["ethusdt@trade"]], {}, stats_interval=10, context=FakeContext())
+        supervisor.check_workers(100.0)
+
+        for process, symbol in zip(FakeContext.started, ("BTCUSDT", "ETHUSDT")):
+            process.connection.send(worker_summary(symbol, 5))
+            process.connection.send(worker_summary(symbol, 3))
+
+        for _ in range(4):
+            supervisor.receive(0.1)
+
+        with patch('binance_websocket.supervisor.logger') as logger:
+            supervisor.reported_at = 0
+            supervisor.report(10.0)
+
+        report = logger.info.call_args.args[0]
+        self.assertIn("16 messages, 4 parse failures", report)
+        self.assertIn("BTCUSDT", report)
+        self.assertIn("ETHUSDT", report)
+        self.assertGreater(supervisor.slots[0].last_seen, 100.0)
+
+    def test_stop_terminates_then_waits(self):
+        supervisor = Supervisor([["btcusdt@trade"]], {}, context=FakeContext())
+        supervisor.check_workers(100.0)
+        [process] = FakeContext.started
+
+        supervisor.stop()
+
+        self.assertEqual(process.signals, ['TERM'])
+        self.assertIsNone(supervisor.slots[0].process)
+
+    def test_throughput_add_summary(self):
+        stats = ThroughputStats()
+        stats.record("BTCUSDT", 10)
+        stats.add_summary(worker_summary("BTCUSDT", 2))
+        stats.add_summary(worker_summary("ETHUSDT", 1))
+
+        summary = stats.summary()
+        self.assertEqual(summary['symbols']['BTCUSDT']['messages'], 3)
+        self.assertEqual(summary['symbols']['BTCUSDT']['bytes'], 210)
+        self.assertEqual(summary['messages'], 4)
+        self.assertEqual(summary['parse_failures'], 2)
+
+    def test_worker_metrics_are_served_with_worker_label(self):
+        supervisor = Supervisor([["btcusdt@trade"]], {}, context=FakeContext())
+        supervisor.check_workers(100.0)
+        [process] = FakeContext.started
+
+        registry = Registry()
+        Counter('binance_test_total', 'Test counter', ['symbol'], registry=registry).labels("BTCUSDT").inc(7)
+        process.connection.send(dict(worker_summary("BTCUSDT", 1), metrics=registry.collect()))
+        supervisor.receive(0.1)
+
+        text = render(supervisor.collect_metrics())
+        self.assertIn('binance_test_total{worker="0",symbol="BTCUSDT"} 7', text)
+        self.assertIn('binance_worker_restarts_total{worker="supervisor"}', text)
+        self.assertEqual(supervisor.throughput.summary()['messages'], 1)
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, override_settings
+
+from binance_websocket.tests.utils import IN_MEMORY_CHANNEL_LAYERS, WebsocketCommunicator, create_sample_trade
+
+from binance_websocket.consumers import BinanceConsumer
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.metrics import STAGE_LATENCY_SECONDS
+
+def recent_trade(trade_id=1):
+    trade = create_sample_trade(trade_id=trade_id)
+    trade['E'] = int(time.time() * 1000) - 5
+    return json.dumps(trade)
+
+def observations(stage):
+    return sum(STAGE_LATENCY_SECONDS.labels(stage).counts)
+
+async def frames(*messages):
+    for message in messages:
+        yield message
+
+class TestClientTracing(SimpleTestCase):
+
+    def make_client(self, **kwargs):
+        client = BinanceWebSocketClient(**kwargs)
+        client.save_to_database = AsyncMock()
+        client.channel_layer = AsyncMock()
+        return client
+
+    def sent_event(self, client):
+        return client.channel_layer.group_send.call_args_list[0].args[1]
+
+    async def test_trades_are_stamped_through_the_stages(self):
+        client = self.make_client()
+        before = {stage: observations(stage) for stage in ('exchange', 'parse', 'publish')}
+
+        await client.receive_messages(frames(recent_trade()))
+
+        trace = self.sent_event(client)['trace']
+        self.assertLessEqual(trace['r'], trace['p'])
+        self.assertLessEqual(trace['p'], trace['b'])
+        self.assertGreater(trace['r'], trace['E'])
+
+        for stage, count in before.items():
+            self.assertEqual(observations(stage), count + 1)
+
+        message = json.loads(self.sent_event(client)['text'])['message']
+        self.assertEqual(round(datetime.fromisoformat(message['event_time']).timestamp() * 1000), trace['E'])
+        self.assertNotIn('trace', message)
+
+    async def test_trace_option_adds_stamps_to_messages(self):
+        client = self.make_client(trace=True)
+
+        await client.receive_messages(frames(recent_trade()))
+
+        event = self.sent_event(client)
+        self.assertTrue(event['forward_trace'])
+        self.assertEqual(json.loads(event['text'])['message']['trace'], event['trace'])
+
+    async def test_receive_stamp_travels_through_the_pipeline(self):
+        client = self.make_client(queue_size=10)
+        client.start_pipeline()
+
+        client.received_ns = 1000
+        await client.enqueue_message(recent_trade())
+        client.received_ns = None
+
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        client.cancel_pipeline()
+        self.assertEqual(self.sent_event(client)['trace']['r'], 1000 / 1e6)
+
+    async def test_frames_without_receive_stamp_are_not_traced(self):
+        client = self.make_client()
+
+        await client.process_message(recent_trade())
+
+        self.assertNotIn('trace', self.sent_event(client))
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestConsumerTracing(SimpleTestCase):
+
+    async def test_browser_receives_full_trace(self):
+        communicator = WebsocketCommunicator(BinanceConsumer.as_asgi(), "/ws/binance/")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["btcusdt"]})
+        await communicator.receive_json_from()
+
+        client = BinanceWebSocketClient(trace=True)
+        client.save_to_database = AsyncMock()
+        client.channel_layer = get_channel_layer()
+        before = observations('deliver'), observations('end_to_end')
+
+        await client.receive_messages(frames(recent_trade()))
+
+        trace = (await communicator.receive_json_from())['message']['trace']
+        self.assertEqual(sorted(trace), ['E', 'b', 'p', 'r', 's'])
+        self.assertLessEqual(trace['b'], trace['s'])
+        self.assertEqual((observations('deliver'), observations('end_to_end')), (before[0] + 1, before[1] + 1))
+
+        await communicator.disconnect()
+
+    async def test_replayed_trace_skips_end_to_end(self):
+        communicator = WebsocketCommunicator(BinanceConsumer.as_asgi(), "/ws/binance/")
+        await communicator.connect()
+        await communicator.receive_json_from()
+        await communicator.send_json_to({"action": "subscribe", "symbols": ["btcusdt"]})
+        await communicator.receive_json_from()
+
+        client = BinanceWebSocketClient(trace=True)
+        client.replaying = True
+        client.save_to_database = AsyncMock()
+        client.channel_layer = get_channel_layer()
+        before = observations('deliver'), observations('end_to_end')
+
+        await client.receive_messages(frames(recent_trade()))
+
+        trace = (await communicator.receive_json_from())['message']['trace']
+        self.assertEqual(sorted(trace), ['b', 'p', 'r', 's'])
+        self.assertEqual((observations('deliver'), observations('end_to_end')), (before[0] + 1, before[1]))
+
+        await communicator.disconnect()
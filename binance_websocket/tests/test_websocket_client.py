@@ -83,24 +83,68 @@ class TestBinanceWebSocketClient(unittest.TestCase):
     async def test_batch_processing(self):
         batch_client = BinanceWebSocketClient(symbol="btcusdt", channel="trade", batch_size=3)
         
-        with patch.object(batch_client, 'save_to_database', new_callable=AsyncMock) as mock_save:
+        with patch.object(batch_client.writer, 'flush', new_callable=AsyncMock) as mock_flush:
             with patch.object(batch_client, 'send_to_channel_layer', new_callable=AsyncMock) as mock_channel:
                 
                 for i in range(2):
                     message = create_sample_trade(trade_id=i+1)
                     await batch_client.process_message(json.dumps(message))
                 
-                mock_save.assert_not_called()
+                mock_flush.assert_not_called()
                 
                 self.assertEqual(mock_channel.call_count, 2)
                 
                 message = create_sample_trade(trade_id=3)
                 await batch_client.process_message(json.dumps(message))
                 
-                self.assertEqual(mock_save.call_count, 3)
+                mock_flush.assert_called_once()
+                self.assertEqual([data['trade_id'] for data in mock_flush.call_args[0][0]], [1, 2, 3])
+                self.assertEqual(batch_client.message_buffer, [])
                 
                 self.assertEqual(mock_channel.call_count, 3)
+        
+        batch_client.writer.close()
 
+    @async_test
+    async def test_failed_batch_is_retried_once(self):
+        batch_client = BinanceWebSocketClient(symbol="btcusdt", channel="trade", batch_size=100)
+        batch_client.message_buffer = [{'trade_id': 1}]
+        
+        with patch.object(batch_client.writer, 'flush', new_callable=AsyncMock) as mock_flush:
+            mock_flush.side_effect = [Exception("connection lost"), 1]
+            await batch_client.process_batch()
+            
+            self.assertEqual(mock_flush.call_count, 2)
+            self.assertEqual(mock_flush.call_args_list[1][0][0], [{'trade_id': 1}])
+            
+            mock_flush.reset_mock()
+            mock_flush.side_effect = Exception("connection lost")
+            batch_client.message_buffer = [{'trade_id': 2}]
+            await batch_client.process_batch()
+            
+            self.assertEqual(mock_flush.call_count, 2)
+            self.assertEqual(batch_client.message_buffer, [])
+        
+        batch_client.writer.close()
+
+    @async_test
+    async def test_flush_deadline(self):
+        batch_client = BinanceWebSocketClient(symbol="btcusdt", channel="trade", batch_size=100, flush_interval=0.01)
+        
+        with patch.object(batch_client.writer, 'flush', new_callable=AsyncMock) as mock_flush:
+            with patch.object(batch_client, 'send_to_channel_layer', new_callable=AsyncMock):
+                await batch_client.process_message(json.dumps(create_sample_trade()))
+                
+                batch_client.running = True
+                flush_task = asyncio.create_task(batch_client.flush_periodically())
+                await asyncio.sleep(0.05)
+                batch_client.running = False
+                flush_task.cancel()
+                
+                mock_flush.assert_called_once()
+                self.assertEqual(len(mock_flush.call_args[0][0]), 1)
+        
+        batch_client.writer.close()
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,155 @@
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+from django.db import DatabaseError
+
+from binance_websocket.tests.utils import async_test, create_sample_trade
+
+from binance_websocket.management.commands.binance_websocket_client import BinanceWebSocketClient
+from binance_websocket.writers import BatchWriter, PartitionCoverage
+
+class TestBatchWriter(unittest.TestCase):
+
+    def setUp(self):
+        client = BinanceWebSocketClient()
+        self.batch = [
+            client.parse_trade_message(create_sample_trade(trade_id=i, price=f"{100 + i}.5"))
+            for i in range(3)
+        ]
+        self.writer = BatchWriter(copy_threshold=2)
+
+    def tearDown(self):
+        self.writer.close()
+
+    def test_build_rows(self):
+        rows = self.writer.build_rows(self.batch)
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1].price, Decimal("101.5"))
+        self.assertEqual(rows[1].exchange, "Binance")
+        self.assertEqual(rows[1].trade_id, 1)
+        self.assertEqual(rows[1].trade_time, self.batch[1]['trade_time'])
+        self.assertTrue(rows[1].is_market_maker)
+
+    @patch('binance_websocket.writers.PARTITIONS')
+    @patch('binance_websocket.writers.close_old_connections')
+    @patch('binance_websocket.writers.transaction')
+    @patch('binance_websocket.writers.PriceUpdate')
+    def test_write_uses_single_bulk_insert(self, mock_model, mock_transaction, mock_close, mock_partitions):
+        self.writer.copy_threshold = None
+
+        written = self.writer.write(self.batch)
+
+        self.assertEqual(written, 3)
+        mock_model.objects.bulk_create.assert_called_once()
+        self.assertEqual(len(mock_model.objects.bulk_create.call_args[0][0]), 3)
+        self.assertTrue(mock_model.objects.bulk_create.call_args[1]['ignore_conflicts'])
+        mock_transaction.atomic.assert_called_once()
+        mock_partitions.ensure.assert_called_with(self.batch)
+
+    @patch('binance_websocket.writers.PARTITIONS')
+    @patch('binance_websocket.writers.close_old_connections')
+    @patch('binance_websocket.writers.transaction')
+    @patch('binance_websocket.writers.connection')
+    def test_write_uses_copy_for_large_batches(self, mock_connection, mock_transaction, mock_close, mock_partitions):
+        mock_connection.vendor = 'postgresql'
+        mock_connection.ops.quote_name.side_effect = lambda name: f'"{name}"'
+        cursor = MagicMock()
+        mock_connection.cursor.return_value.__enter__.return_value = cursor
+
+        self.writer.write(self.batch)
+
+        cursor.copy_expert.assert_called_once()
+        sql, buffer = cursor.copy_expert.call_args[0]
+        self.assertTrue(sql.startswith('COPY "binance_websocket_priceupdate_staging"'))
+        lines = buffer.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("BTCUSDT,100.5,0.1,"))
+        self.assertTrue(lines[0].endswith(",Binance,0,2020-08-27T09:20:03.276000+00:00,2020-08-27T09:20:03.277000+00:00,t"))
+
+        merge_sql = cursor.execute.call_args_list[-1][0][0]
+        self.assertTrue(merge_sql.startswith('INSERT INTO "binance_websocket_priceupdate"'))
+        self.assertTrue(merge_sql.endswith('ON CONFLICT DO NOTHING'))
+
+    @patch('binance_websocket.writers.PARTITIONS')
+    @patch('binance_websocket.writers.close_old_connections')
+    @patch('binance_websocket.writers.transaction')
+    @patch('binance_websocket.writers.insert_trades')
+    def test_connection_is_only_checked_after_a_failed_write(self, mock_insert, mock_transaction, mock_close, mock_partitions):
+        self.writer.copy_threshold = None
+
+        self.writer.write(self.batch)
+        mock_close.assert_not_called()
+
+        mock_insert.side_effect = DatabaseError("connection lost")
+
+        with self.assertRaises(DatabaseError):
+            self.writer.write(self.batch)
+
+        mock_close.assert_called_once()
+
+    @async_test
+    async def test_flush_runs_write_in_executor(self):
+        with patch.object(self.writer, 'write', return_value=3) as mock_write:
+            written = await self.writer.flush(self.batch)
+
+        self.assertEqual(written, 3)
+        mock_write.assert_called_once_with(self.batch)
+
+    @async_test
+    async def test_flush_skips_empty_batch(self):
+        with patch.object(self.writer, 'write') as mock_write:
+            written = await self.writer.flush([])
+
+        self.assertEqual(written, 0)
+        mock_write.assert_not_called()
+
+
+@patch('binance_websocket.writers.transaction', MagicMock())
+@patch('binance_websocket.writers.connection')
+@patch('binance_websocket.writers.ensure_partitions')
+class TestPartitionCoverage(unittest.TestCase):
+
+    def setUp(self):
+        client = BinanceWebSocketClient()
+        self.trade = client.parse_trade_message(create_sample_trade())
+        self.coverage = PartitionCoverage()
+
+    def test_partitions_are_checked_once_per_period(self, mock_ensure, mock_connection):
+        mock_connection.vendor = 'postgresql'
+        end = self.trade['trade_time'].replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        mock_ensure.return_value = (end, ['binance_websocket_priceupdate_p20200827'])
+
+        with self.assertLogs('binance_websocket_client', level='WARNING') as logs:
+            self.coverage.ensure([self.trade])
+            self.coverage.ensure([self.trade])
+
+        mock_ensure.assert_called_once()
+        self.assertEqual(mock_ensure.call_args.args[2], self.trade['trade_time'])
+        self.assertIn('p20200827', logs.output[0])
+
+        self.coverage.ensure([{'trade_time': end}])
+        self.assertEqual(mock_ensure.call_count, 2)
+
+    def test_other_backends_are_skipped(self, mock_ensure, mock_connection):
+        mock_connection.vendor = 'sqlite'
+
+        self.coverage.ensure([self.trade])
+
+        mock_ensure.assert_not_called()
+
+    def test_failure_is_logged_and_raised(self, mock_ensure, mock_connection):
+        mock_connection.vendor = 'postgresql'
+        mock_ensure.side_effect = DatabaseError("permission denied")
+
+        with self.assertLogs('binance_websocket_client', level='ERROR'):
+            with self.assertRaises(DatabaseError):
+                self.coverage.ensure([self.trade])
+
+        self.assertIsNone(self.coverage.covered_until)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,8 @@ import json
 from decimal import Decimal
 from unittest.mock import patch, AsyncMock
 
+from asgiref.testing import ApplicationCommunicator
+
 def async_test(test_case):
     def wrapper(*args, **kwargs):
         loop = asyncio.new_event_loop()
@@ -13,6 +15,52 @@ def async_test(test_case):
             loop.close()
     return wrapper
 
+IN_MEMORY_CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
+class WebsocketCommunicator(ApplicationCommunicator):
+    """
+    Minimal websocket test client; ``channels.testing`` needs daphne, which
+    is not a dependency of this project.
+    """
+
+    def __init__(self, application, path, subprotocols=None):
+        super().__init__(application, {
+            "type": "websocket",
+            "path": path,
+            "headers": [],
+            "subprotocols": subprotocols or [],
+        })
+
+    async def connect(self, timeout=1):
+        await self.send_input({"type": "websocket.connect"})
+        response = await self.receive_output(timeout)
+        return response["type"] == "websocket.accept", response
+
+    async def send_to(self, text_data):
+        await self.send_input({"type": "websocket.receive", "text": text_data})
+
+    async def send_json_to(self, data):
+        await self.send_to(json.dumps(data))
+
+    async def receive_from(self, timeout=1):
+        response = await self.receive_output(timeout)
+        return response["text"]
+
+    async def receive_bytes_from(self, timeout=1):
+        response = await self.receive_output(timeout)
+        return response["bytes"]
+
+    async def receive_json_from(self, timeout=1):
+        return json.loads(await self.receive_from(timeout))
+
+    async def disconnect(self, code=1000, timeout=1):
+        await self.send_input({"type": "websocket.disconnect", "code": code})
+        await self.wait(timeout)
+
 SAMPLE_TRADE_MESSAGE = {
     "e": "trade",
     "E": 1598520003277,
@@ -3,4 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('api/trades/<str:symbol>/', views.trades, name='api_trades'),
+    path('api/bars/<str:symbol>/', views.bars, name='api_bars'),
+    path('api/export/<str:symbol>/', views.export_trades, name='api_export'),
+    path('metrics/', views.metrics, name='metrics'),
 ] 
\ No newline at end of file
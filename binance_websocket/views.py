@@ -1,4 +1,27 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
+
+from binance_websocket.metrics import CONTENT_TYPE, REGISTRY, render as render_metrics
+from binance_websocket.models import SymbolScale
+from binance_websocket.queries import (
+    EXPORT_FORMATS,
+    QueryError,
+    bar_page,
+    cache_key,
+    is_closed_range,
+    parse_cursor,
+    parse_interval,
+    parse_limit,
+    parse_range,
+    parse_symbol,
+    stream_trades,
+    trade_page,
+    trade_queryset,
+)
 
 
 def index(request):
@@ -6,3 +29,126 @@ def index(request):
     Simple view to render the WebSocket test page.
     """
     return render(request, 'binance_websocket/index.html')
+
+
+def api_cache():
+    return caches[getattr(settings, 'BINANCE_API_CACHE', 'default')]
+
+
+def cached_query(request, end, build):
+    """
+    Serve a query response, caching it when its time range is closed.
+    ``build`` returns the response body as a dict.
+    """
+    if not is_closed_range(end):
+        response = JsonResponse(build())
+        response['X-Cache'] = 'BYPASS'
+        return response
+
+    cache = api_cache()
+    key = cache_key(request.path, request.GET.dict())
+    body = cache.get(key)
+    status = 'HIT'
+
+    if body is None:
+        body = build()
+        cache.set(key, body, getattr(settings, 'BINANCE_API_CACHE_TTL', 300))
+        status = 'MISS'
+
+    response = JsonResponse(body)
+    response['X-Cache'] = status
+    return response
+
+
+@require_GET
+def trades(request, symbol):
+    """
+    Trades for one symbol ordered by trade time. Pass the returned ``next``
+    cursor as ``after`` to read the following page.
+    """
+    try:
+        symbol = parse_symbol(symbol)
+        start, end = parse_range(request.GET)
+        after = parse_cursor(request.GET.get('after'))
+        limit = parse_limit(request.GET.get('limit'))
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    def build():
+        scales = SymbolScale.lookup('Binance', symbol)
+        rows, next_cursor = trade_page(symbol, start, end, after, limit, scales)
+        return {'symbol': symbol, 'trades': rows, 'next': next_cursor}
+
+    return cached_query(request, end, build)
+
+
+@require_GET
+def bars(request, symbol):
+    """
+    Candles for one symbol and ``interval`` (default ``1m``) ordered by open
+    time, paginated the same way as ``trades``.
+    """
+    try:
+        symbol = parse_symbol(symbol)
+        interval = parse_interval(request.GET.get('interval', '1m'))
+        start, end = parse_range(request.GET)
+        after = parse_cursor(request.GET.get('after'))
+        limit = parse_limit(request.GET.get('limit'))
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    def build():
+        rows, next_cursor = bar_page(symbol, interval, start, end, after, limit)
+        return {'symbol': symbol, 'interval': interval, 'bars': rows, 'next': next_cursor}
+
+    return cached_query(request, end, build)
+
+
+@require_GET
+async def export_trades(request, symbol):
+    """
+    Stream every trade in a range as CSV (default) or NDJSON (``format``).
+    """
+    export_format = request.GET.get('format', 'csv')
+
+    try:
+        symbol = parse_symbol(symbol)
+        start, end = parse_range(request.GET)
+        if export_format not in EXPORT_FORMATS:
+            raise QueryError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    scales = await sync_to_async(SymbolScale.lookup)('Binance', symbol)
+    response = StreamingHttpResponse(
+        stream_trades(trade_queryset(symbol, start, end), scales, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{symbol.lower()}_trades.{export_format}"'
+    return response
+
+
+def may_read_metrics(request):
+    """
+    Scrapers on an address in ``BINANCE_METRICS_ALLOWED_IPS`` (loopback by
+    default) and logged-in staff may read the metrics.
+    """
+    allowed_ips = getattr(settings, 'BINANCE_METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+
+    if request.META.get('REMOTE_ADDR') in allowed_ips:
+        return True
+
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_active and user.is_staff
+
+
+@require_GET
+def metrics(request):
+    """
+    Counters and histograms of this server process in the Prometheus text
+    format. The ingest command serves its own with ``--metrics-port``.
+    """
+    if not may_read_metrics(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_metrics(REGISTRY.collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,331 @@
+import asyncio
+import csv
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from binance_websocket.models import Candle, PriceUpdate, SymbolScale
+from binance_websocket.partitions import ensure_partitions
+
+logger = logging.getLogger('binance_websocket_client')
+
+
+def price_columns(data, scales=None):
+    """
+    Return ``(price, volume, price_units, volume_units)`` for a trade. With
+    fixed-point ``scales`` only the integer unit columns are filled, unless
+    the trade does not fit its symbol's scale: then it is stored as Decimals
+    rather than failing the whole batch.
+    """
+    if scales is None:
+        return data['price'], data['volume'], None, None
+
+    symbol = data['ticker_symbol']
+    price_text = data.get('price_text') or str(data['price'])
+    volume_text = data.get('volume_text') or str(data['volume'])
+
+    try:
+        price_units, volume_units = scales.encode(symbol, price_text, volume_text)
+    except (ValueError, OverflowError) as e:
+        if symbol not in scales.fallback_symbols:
+            scales.fallback_symbols.add(symbol)
+            logger.warning(f"Storing {symbol} trades that do not fit its fixed-point scale as decimals: {e}")
+        return data['price'], data['volume'], None, None
+
+    return None, None, price_units, volume_units
+
+
+def register_symbol_scales(symbols, scales, exchange='Binance'):
+    """
+    Record the scale of each symbol the first time it is written. A scale that
+    is already stored wins over the configured one, so units written by earlier
+    runs stay readable.
+    """
+    for symbol in symbols:
+        price_scale, volume_scale = scales.for_symbol(symbol)
+        symbol_scale, created = SymbolScale.objects.get_or_create(
+            exchange=exchange,
+            ticker_symbol=symbol,
+            defaults={'price_scale': price_scale, 'volume_scale': volume_scale},
+        )
+
+        if not created and (symbol_scale.price_scale, symbol_scale.volume_scale) != (price_scale, volume_scale):
+            logger.warning(
+                f"Using stored scale {symbol_scale.price_scale}:{symbol_scale.volume_scale} for {symbol} "
+                f"instead of {price_scale}:{volume_scale}"
+            )
+
+        scales.set_symbol(symbol, symbol_scale.price_scale, symbol_scale.volume_scale)
+
+
+def build_price_update(data, exchange='Binance', scales=None):
+    price, volume, price_units, volume_units = price_columns(data, scales)
+
+    return PriceUpdate(
+        ticker_symbol=data['ticker_symbol'],
+        price=price,
+        volume=volume,
+        price_units=price_units,
+        volume_units=volume_units,
+        exchange=exchange,
+        trade_id=data.get('trade_id'),
+        trade_time=data.get('trade_time'),
+        event_time=data.get('event_time'),
+        is_market_maker=data.get('is_market_maker'),
+    )
+
+
+def register_new_symbols(batch, scales, registered_symbols, exchange='Binance'):
+    new_symbols = {data['ticker_symbol'] for data in batch} - registered_symbols
+
+    if new_symbols:
+        register_symbol_scales(sorted(new_symbols), scales, exchange)
+        registered_symbols.update(new_symbols)
+
+
+class PartitionCoverage:
+    """
+    Makes sure PostgreSQL has a partition for the trades about to be written.
+    Rows past the last partition would land in the default partition, whose
+    check constraint rejects them and fails the whole insert, so missing
+    partitions are created first. The database is only asked when a trade
+    is past the end of the last partition seen.
+    """
+
+    def __init__(self):
+        self.covered_until = None
+        self.lock = threading.Lock()
+
+    def ensure(self, batch):
+        if connection.vendor != 'postgresql':
+            return
+
+        latest = max((data.get('trade_time') for data in batch if data.get('trade_time') is not None), default=None)
+
+        if latest is None or (self.covered_until is not None and latest < self.covered_until):
+            return
+
+        with self.lock:
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    coverage = ensure_partitions(cursor, connection.ops.quote_name, latest)
+            except DatabaseError as e:
+                logger.error(f"No PriceUpdate partition for trades at {latest.isoformat()} and creating one failed: {e}")
+                raise
+
+        if coverage is None:
+            # Not partitioned: the table takes any trade time.
+            self.covered_until = datetime.max.replace(tzinfo=dt_timezone.utc)
+            return
+
+        self.covered_until, created = coverage
+
+        for name in created:
+            logger.warning(
+                f"Created partition {name} for incoming trades; run priceupdate_partitions regularly "
+                f"so partitions exist before trades arrive"
+            )
+
+
+PARTITIONS = PartitionCoverage()
+
+
+def insert_trades(batch, exchange='Binance', scales=None, registered_symbols=None):
+    PARTITIONS.ensure(batch)
+
+    if scales is not None:
+        register_new_symbols(batch, scales, registered_symbols if registered_symbols is not None else set(), exchange)
+
+    return PriceUpdate.objects.bulk_create(
+        [build_price_update(data, exchange, scales) for data in batch],
+        ignore_conflicts=True,
+    )
+
+
+CANDLE_KEY = ['exchange', 'ticker_symbol', 'interval', 'open_time']
+CANDLE_VALUES = ['open', 'high', 'low', 'close', 'volume', 'trade_count', 'is_partial']
+
+
+def build_candle(bar, exchange='Binance'):
+    return Candle(
+        ticker_symbol=bar.ticker_symbol,
+        exchange=exchange,
+        interval=bar.interval,
+        open_time=bar.open_time,
+        open=bar.open,
+        high=bar.high,
+        low=bar.low,
+        close=bar.close,
+        volume=bar.volume,
+        trade_count=bar.trade_count,
+        is_partial=bar.partial,
+    )
+
+
+def insert_candles(bars, exchange='Binance'):
+    """
+    Upsert complete bars, so they replace a partial bar stored by an earlier
+    run; partial bars are only inserted where no bar is stored yet.
+    """
+    complete = [build_candle(bar, exchange) for bar in bars if not bar.partial]
+    partial = [build_candle(bar, exchange) for bar in bars if bar.partial]
+    created = []
+
+    try:
+        if complete:
+            created += Candle.objects.bulk_create(
+                complete,
+                update_conflicts=True,
+                unique_fields=CANDLE_KEY,
+                update_fields=CANDLE_VALUES,
+            )
+
+        if partial:
+            created += Candle.objects.bulk_create(partial, ignore_conflicts=True)
+    except DatabaseError:
+        close_old_connections()
+        raise
+
+    return created
+
+
+class BatchWriter:
+    """
+    Flushes buffered trades to the database as one multi-row insert per batch.
+
+    Writes run on a dedicated single-thread executor so every flush reuses the
+    same database connection and flushes never overlap. The connection is only
+    checked after a failed write, and replaced if it is broken or older than
+    ``CONN_MAX_AGE``. Batches of at least
+    ``copy_threshold`` rows use PostgreSQL ``COPY FROM STDIN`` instead of
+    ``bulk_create`` when the backend supports it.
+
+    Both paths skip trades that are already stored (``ON CONFLICT DO NOTHING``
+    on exchange, symbol and trade id), so replayed or overlapping frames never
+    create duplicate rows. COPY cannot skip conflicts itself, so it loads a
+    temporary staging table that is then merged into the real one.
+
+    With fixed-point ``scales`` prices and volumes are written only as scaled
+    integers in ``price_units``/``volume_units``.
+    """
+
+    copy_columns = (
+        'ticker_symbol', 'price', 'volume', 'price_units', 'volume_units', 'timestamp', 'exchange',
+        'trade_id', 'trade_time', 'event_time', 'is_market_maker',
+    )
+    staging_table = 'binance_websocket_priceupdate_staging'
+
+    def __init__(self, copy_threshold=None, exchange='Binance', scales=None):
+        self.copy_threshold = copy_threshold
+        self.exchange = exchange
+        self.scales = scales
+        self.registered_symbols = set()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch-writer')
+        self.closed = False
+
+    def use_copy(self, size):
+        return (
+            self.copy_threshold is not None
+            and size >= self.copy_threshold
+            and connection.vendor == 'postgresql'
+        )
+
+    def build_rows(self, batch):
+        return [build_price_update(data, self.exchange, self.scales) for data in batch]
+
+    def copy_rows(self, batch):
+        recorded_at = timezone.now().isoformat()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        for data in batch:
+            price, volume, price_units, volume_units = price_columns(data, self.scales)
+            writer.writerow([
+                data['ticker_symbol'],
+                self.csv_value(price),
+                self.csv_value(volume),
+                self.csv_value(price_units),
+                self.csv_value(volume_units),
+                recorded_at,
+                self.exchange,
+                self.csv_value(data.get('trade_id')),
+                self.csv_value(data.get('trade_time')),
+                self.csv_value(data.get('event_time')),
+                self.csv_value(data.get('is_market_maker')),
+            ])
+
+        buffer.seek(0)
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(PriceUpdate._meta.db_table)
+        staging = quote_name(self.staging_table)
+        columns = ', '.join(quote_name(column) for column in self.copy_columns)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+                f"AS SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING"
+            )
+
+    @staticmethod
+    def csv_value(value):
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    def write(self, batch):
+        try:
+            # Outside the transaction, so a failed insert keeps the partitions.
+            PARTITIONS.ensure(batch)
+
+            with transaction.atomic():
+                if self.use_copy(len(batch)):
+                    if self.scales is not None:
+                        register_new_symbols(batch, self.scales, self.registered_symbols, self.exchange)
+                    self.copy_rows(batch)
+                else:
+                    insert_trades(batch, self.exchange, self.scales, self.registered_symbols)
+        except DatabaseError:
+            close_old_connections()
+            raise
+
+        return len(batch)
+
+    async def flush(self, batch):
+        if not batch:
+            return 0
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.write, batch)
+
+    async def flush_candles(self, bars):
+        if not bars:
+            return 0
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, insert_candles, bars, self.exchange)
+        return len(bars)
+
+    def close_connection(self):
+        connection.close()
+
+    def close(self):
+        if self.closed:
+            return
+
+        self.closed = True
+        self.executor.submit(self.close_connection).result()
+        self.executor.shutdown(wait=True)
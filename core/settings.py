@@ -63,6 +63,9 @@ DATABASES = {
         'PASSWORD': '', 
         'HOST': 'localhost',
         'PORT': '5432',
+        # The ingest writer keeps one connection open across flushes.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -75,6 +78,15 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared by the ingest command and the ASGI processes: trade snapshots are
+# written by one and read by the other.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
 
 
 AUTH_PASSWORD_VALIDATORS = [